@@ -1,15 +1,18 @@
+import asyncio
+import hmac
 import os
 import logging
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
-from werkzeug.middleware.proxy_fix import ProxyFix
 import threading
-import time
 from datetime import datetime
-import pandas as pd
-from trading_bots import TWAPBot, SmartBot
-from jupiter_api import JupiterAPI
-from data_logger import DataLogger
-from chart_generator import ChartGenerator
+from time import perf_counter
+from flask import Flask, Response, abort, g, render_template, request, redirect, url_for, flash, jsonify, send_file, stream_with_context
+from werkzeug.middleware.proxy_fix import ProxyFix
+from data_logger import SERIES_COLUMNS
+from chart_generator import ChartGenerator, CHART_METHODS, IMAGE_MIME_TYPES
+from downsampling import DOWNSAMPLING_METHODS, downsample, time_range_slice
+from metrics import REGISTRY, HTTP_REQUEST_SECONDS, Gauge
+from profiler import ProfileManager, ProfilerBusyError, PROFILE_FORMATS, DEFAULT_DURATION, DEFAULT_INTERVAL, install_signal_handler
+from session_manager import SessionManager, SessionCapacityError
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -19,16 +22,88 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Global variables for simulation state
-simulation_running = False
-simulation_thread = None
-simulation_data = {
-    'twap_bot': None,
-    'smart_bot': None,
-    'data_logger': None,
-    'start_time': None,
-    'duration_minutes': 60
+# Concurrent simulations; all sessions share one JupiterAPI quote cache and rate limiter
+session_manager = SessionManager()
+
+# Every recorded run, for analysis across runs; built on the first history query since it
+# brings in pandas and pyarrow, which the status and control endpoints never need
+_history_catalog = None
+_history_catalog_lock = threading.Lock()
+
+def get_history_catalog():
+    global _history_catalog
+    with _history_catalog_lock:
+        if _history_catalog is None:
+            from history_catalog import HistoryCatalog
+            _history_catalog = HistoryCatalog()
+        return _history_catalog
+
+# On-demand profiles of every thread: POST /admin/profile, or with PROFILE_ON_SIGNAL=1, `kill -USR2 <pid>`
+# to write one under data/profiles/
+profile_manager = ProfileManager()
+
+def install_profile_signal_handler() -> bool:
+    """
+    Profile on SIGUSR2 if PROFILE_ON_SIGNAL is set; returns whether the handler was installed
+    
+    Not done on import: under gunicorn --preload the import runs in the master, whose watcher
+    thread does not survive the fork and whose handler each worker resets. The __main__ blocks
+    and gunicorn.conf.py's post_worker_init hook call this in the serving process instead.
+    """
+    if os.environ.get('PROFILE_ON_SIGNAL', '').lower() not in ('1', 'true', 'yes'):
+        return False
+    return install_signal_handler(profile_manager)
+
+# Admin endpoints need this token (X-Admin-Token header); without it they are disabled
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Scrape-time views of the session registry and bot scheduler
+REGISTRY.register(Gauge(
+    'simulation_sessions', 'Retained simulation sessions by state', ('state',),
+    callback=lambda: {(state,): count for state, count in session_manager.get_metrics()['sessions'].items()}))
+REGISTRY.register(Gauge(
+    'bot_scheduler_lag_seconds', 'Delay between a bot step falling due and starting, over recent steps', ('quantile',),
+    callback=lambda: {(q,): session_manager.scheduler.get_metrics()[f'lag_p{q[2:]}'] for q in ('0.50', '0.95', '0.99')}))
+
+# Client-side chart payloads stay at a bounded size however long the run
+SERIES_DEFAULT_POINTS = 1000
+SERIES_MAX_POINTS = 5000
+SERIES_DEFAULT_METHODS = {'cumulative': 'lttb', 'slippage': 'minmax', 'price': 'lttb'}
+
+# Quote ladders: (input mint, output mint, input token base units) per trade direction
+QUOTE_MINTS = {
+    'SOL_TO_USDC': ('So11111111111111111111111111111111111111112', 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v', 1e9),
+    'USDC_TO_SOL': ('EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v', 'So11111111111111111111111111111111111111112', 1e6)
 }
+QUOTE_LADDER_MAX_AMOUNTS = 20
+
+@app.before_request
+def start_request_timer():
+    g.request_started = perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    """Per-endpoint latency; streamed responses are timed until the stream starts"""
+    started = g.get('request_started')
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(request.endpoint or 'unmatched', str(response.status_code)).observe(
+            perf_counter() - started)
+    return response
+
+@app.url_defaults
+def add_session_id(endpoint, values):
+    """Links rendered for a session keep pointing at that session"""
+    if 'session_id' in values or 'session_id' not in g:
+        return
+    if app.url_map.is_endpoint_expecting(endpoint, 'session_id'):
+        values['session_id'] = g.session_id
+
+def get_session(session_id=None):
+    """Session by ID, or the most recent one when no ID is given"""
+    session = session_manager.get(session_id) if session_id else session_manager.latest()
+    if session is not None:
+        g.session_id = session.id
+    return session
 
 @app.route('/')
 def index():
@@ -37,115 +112,303 @@ def index():
 
 @app.route('/start_simulation', methods=['POST'])
 def start_simulation():
-    """Start the trading simulation"""
-    global simulation_running, simulation_thread, simulation_data
-    
-    if simulation_running:
-        flash('Simulation is already running!', 'warning')
-        return redirect(url_for('simulation_dashboard'))
-    
+    """Start a new trading simulation session"""
     try:
         # Get configuration from form
         trade_amount = float(request.form.get('trade_amount', 1.0))
         slippage_threshold = float(request.form.get('slippage_threshold', 0.2))
         duration_minutes = int(request.form.get('duration_minutes', 60))
         trade_direction = request.form.get('trade_direction', 'SOL_TO_USDC')
+        seed = request.form.get('seed', type=int)
+        virtual_time = bool(request.form.get('virtual_time'))
         
-        # Initialize components
-        jupiter_api = JupiterAPI()
-        data_logger = DataLogger()
-        
-        # Create bots
-        twap_bot = TWAPBot(
-            trade_amount=trade_amount,
-            interval_minutes=5,
-            jupiter_api=jupiter_api,
-            data_logger=data_logger,
-            trade_direction=trade_direction
-        )
-        
-        smart_bot = SmartBot(
+        session = session_manager.create_session(
             trade_amount=trade_amount,
             slippage_threshold=slippage_threshold,
-            jupiter_api=jupiter_api,
-            data_logger=data_logger,
-            trade_direction=trade_direction
+            duration_minutes=duration_minutes,
+            trade_direction=trade_direction,
+            seed=seed,
+            virtual_time=virtual_time
         )
         
-        # Store simulation data
-        simulation_data.update({
-            'twap_bot': twap_bot,
-            'smart_bot': smart_bot,
-            'data_logger': data_logger,
-            'start_time': datetime.now(),
-            'duration_minutes': duration_minutes
-        })
-        
-        # Start simulation in separate thread
-        simulation_thread = threading.Thread(target=run_simulation, args=(duration_minutes,))
-        simulation_running = True
-        simulation_thread.start()
-        
         flash('Simulation started successfully!', 'success')
-        return redirect(url_for('simulation_dashboard'))
+        return redirect(url_for('simulation_dashboard', session_id=session.id))
         
+    except SessionCapacityError as e:
+        logging.warning(f"Rejected simulation: {e}")
+        flash(f'Too many simulations running: {str(e)}. Try again when one finishes.', 'warning')
+        return redirect(url_for('index'))
     except Exception as e:
         logging.error(f"Error starting simulation: {e}")
         flash(f'Error starting simulation: {str(e)}', 'danger')
         return redirect(url_for('index'))
 
 @app.route('/simulation')
-def simulation_dashboard():
+@app.route('/simulation/<session_id>')
+def simulation_dashboard(session_id=None):
     """Real-time simulation dashboard"""
-    global simulation_running, simulation_data
-    
-    if not simulation_running and simulation_data['twap_bot'] is None:
+    session = get_session(session_id)
+    if session is None:
         flash('No simulation running. Please start a simulation first.', 'info')
         return redirect(url_for('index'))
     
     return render_template('simulation.html', 
-                         simulation_running=simulation_running,
-                         simulation_data=simulation_data)
+                         simulation_running=session.running,
+                         session=session)
+
+@app.route('/api/sessions')
+def list_sessions():
+    """All retained sessions plus worker budget usage"""
+    return jsonify({
+        'sessions': [session.summary() for session in session_manager.list_sessions()],
+        'capacity': session_manager.get_metrics()
+    })
 
 @app.route('/api/simulation_status')
-def get_simulation_status():
+@app.route('/api/simulation_status/<session_id>')
+def get_simulation_status(session_id=None):
     """API endpoint for real-time simulation status"""
-    global simulation_running, simulation_data
-    
-    if not simulation_data['twap_bot']:
+    session = get_session(session_id)
+    if session is None:
         return jsonify({'running': False, 'error': 'No simulation initialized'})
     
     try:
-        # Calculate elapsed time
-        elapsed_minutes = 0
-        if simulation_data['start_time']:
-            elapsed = datetime.now() - simulation_data['start_time']
-            elapsed_minutes = elapsed.total_seconds() / 60
+        return jsonify(session.status_snapshot())
         
-        # Get bot statistics
-        twap_stats = simulation_data['twap_bot'].get_stats()
-        smart_stats = simulation_data['smart_bot'].get_stats()
+    except Exception as e:
+        logging.error(f"Error getting simulation status: {e}")
+        return jsonify({'running': False, 'error': str(e)})
+
+@app.route('/api/status_stream')
+@app.route('/api/status_stream/<session_id>')
+def status_stream(session_id=None):
+    """Server-Sent Events stream of status snapshots, pushed when a bot trades, skips or changes state"""
+    session = get_session(session_id)
+    if session is None:
+        return jsonify({'error': 'No simulation initialized'}), 404
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    response = Response(stream_with_context(session.broadcaster.subscribe(last_event_id)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from buffering the stream
+    return response
+
+@app.route('/api/series/<kind>')
+@app.route('/api/series/<session_id>/<kind>')
+def get_series(kind, session_id=None):
+    """
+    Downsampled per-bot series for client-side charts
+    
+    Query parameters:
+        max_points: Points per bot (default 1000, at most 5000)
+        method: 'lttb' or 'minmax' (default depends on the series)
+        start, end: Optional time range in epoch milliseconds
+    """
+    session = get_session(session_id)
+    if kind not in SERIES_COLUMNS:
+        return jsonify({'error': f'Unknown series: {kind}'}), 404
+    if session is None:
+        return jsonify({'error': 'No simulation data available'}), 404
+    data_logger = session.data_logger
+    
+    try:
+        max_points = min(SERIES_MAX_POINTS, max(3, request.args.get('max_points', SERIES_DEFAULT_POINTS, type=int)))
+        method = request.args.get('method', SERIES_DEFAULT_METHODS[kind])
+        if method not in DOWNSAMPLING_METHODS:
+            return jsonify({'error': f'Unknown method: {method}'}), 400
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        
+        version = chart_version(data_logger)
+        series = {}
+        for bot_type, points in data_logger.get_bot_series(kind).items():
+            window = time_range_slice(points['t'], start, end)
+            t, y = points['t'][window], points['y'][window]
+            keep = downsample(t, y, max_points, method)
+            series[bot_type] = {
+                't': t[keep].tolist(),
+                'y': y[keep].tolist(),
+                'total_points': len(t)
+            }
         
         return jsonify({
-            'running': simulation_running,
-            'elapsed_minutes': elapsed_minutes,
-            'duration_minutes': simulation_data['duration_minutes'],
-            'twap_stats': twap_stats,
-            'smart_stats': smart_stats,
-            'progress_percent': min(100, (elapsed_minutes / simulation_data['duration_minutes']) * 100)
+            'kind': kind,
+            'method': method,
+            'max_points': max_points,
+            'version': version,
+            'series': series
         })
         
     except Exception as e:
-        logging.error(f"Error getting simulation status: {e}")
-        return jsonify({'running': False, 'error': str(e)})
+        logging.error(f"Error building {kind} series: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/history')
+def get_history():
+    """
+    Recorded runs matching a query, with their combined trade statistics
+    
+    Query parameters:
+        start, end: Optional ISO timestamps
+        bot_type, direction: Optional filters; repeat to allow several values
+        by_run: Also return statistics per run
+    """
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid time range: {e}'}), 400
+    bot_types = request.args.getlist('bot_type') or None
+    directions = request.args.getlist('direction') or None
+    
+    try:
+        history_catalog = get_history_catalog()
+        runs = history_catalog.runs(start, end, bot_types, directions)
+        response = {
+            'runs': [{key: entry[key] for key in ('run', 'format', 'start', 'end', 'rows', 'bot_types', 'directions')}
+                     for entry in runs],
+            'summary': history_catalog.aggregate(start, end, bot_types, directions).summary()
+        }
+        if request.args.get('by_run', type=int):
+            per_run = history_catalog.aggregate(start, end, bot_types, directions, by_run=True)
+            response['by_run'] = {run: aggregates.summary() for run, aggregates in per_run.items()}
+        return jsonify(response)
+        
+    except Exception as e:
+        logging.error(f"Error querying trade history: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/quote_ladder')
+def get_quote_ladder():
+    """
+    Quotes for several trade sizes at once, fetched concurrently
+
+    Query parameters:
+        direction: SOL_TO_USDC (default) or USDC_TO_SOL
+        amount: Trade size in input tokens; repeat for each rung (default 0.1, 1 and 10)
+        slippage_bps: Slippage tolerance in basis points (default 50)
+    """
+    direction = request.args.get('direction', 'SOL_TO_USDC')
+    if direction not in QUOTE_MINTS:
+        return jsonify({'error': f"direction must be one of {', '.join(QUOTE_MINTS)}"}), 400
+    try:
+        amounts = [float(amount) for amount in request.args.getlist('amount')] or [0.1, 1.0, 10.0]
+        slippage_bps = int(request.args.get('slippage_bps', 50))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    if len(amounts) > QUOTE_LADDER_MAX_AMOUNTS or any(amount <= 0 for amount in amounts):
+        return jsonify({'error': f'Give 1 to {QUOTE_LADDER_MAX_AMOUNTS} positive amounts'}), 400
+
+    input_mint, output_mint, input_decimals = QUOTE_MINTS[direction]
+    requests = [{'input_mint': input_mint, 'output_mint': output_mint, 'amount': int(amount * input_decimals),
+                 'slippage_bps': slippage_bps} for amount in amounts]
+
+    async def fetch():
+        # Deferred so app startup does not import httpx
+        from async_jupiter_api import AsyncJupiterAPI
+        jupiter_api = session_manager.jupiter_api
+        async with AsyncJupiterAPI(base_url=jupiter_api.base_url, timeout=jupiter_api.timeout,
+                                   rate_limiter=jupiter_api.rate_limiter) as client:
+            return await client.get_quotes(requests)
+
+    try:
+        quotes = asyncio.run(fetch())
+        return jsonify({
+            'direction': direction,
+            'quotes': [{
+                'amount': amount,
+                'price': quote.get('price') if quote else None,
+                'out_amount': int(quote.get('outAmount', 0)) if quote else None,
+                'price_impact_pct': quote.get('priceImpactPct') if quote else None,
+                'fallback': bool(quote.get('fallback')) if quote else None
+            } for amount, quote in zip(amounts, quotes)]
+        })
+
+    except Exception as e:
+        logging.error(f"Error fetching quote ladder: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/metrics')
+def metrics():
+    """Counters and latency histograms in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def require_admin():
+    """
+    Abort unless the request carries the admin token
+    
+    Without ADMIN_TOKEN the admin routes do not exist (404). remote_addr is no substitute:
+    behind ProxyFix it comes from the client-supplied X-Forwarded-For header.
+    """
+    if not ADMIN_TOKEN:
+        abort(404)
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        abort(403)
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """
+    GET lists recent profiles; POST starts a sampling profile of all threads
+    
+    Query parameters (POST):
+        seconds: Profile length, capped at 10 minutes (default 30)
+        interval: Seconds between samples (default 0.01)
+    """
+    require_admin()
+    if request.method == 'GET':
+        return jsonify({'profiles': [profile.summary() for profile in profile_manager.list_profiles()]})
+    
+    try:
+        seconds = float(request.args.get('seconds', DEFAULT_DURATION))
+        interval = float(request.args.get('interval', DEFAULT_INTERVAL))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid profile parameters: {e}'}), 400
+    
+    try:
+        profile = profile_manager.start(seconds, interval)
+    except ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    response = profile.summary()
+    response['downloads'] = {fmt: url_for('admin_profile_download', profile_id=profile.id, fmt=fmt)
+                             for fmt in PROFILE_FORMATS}
+    return jsonify(response), 202
+
+@app.route('/admin/profile/<profile_id>', methods=['GET', 'DELETE'])
+def admin_profile_status(profile_id):
+    """Profile progress; DELETE stops it early and keeps the samples taken so far"""
+    require_admin()
+    profile = profile_manager.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Unknown profile'}), 404
+    if request.method == 'DELETE':
+        profile.stop()
+        profile.wait(5)
+    return jsonify(profile.summary())
+
+@app.route('/admin/profile/<profile_id>.<fmt>')
+def admin_profile_download(profile_id, fmt):
+    """Download a finished profile as collapsed stacks (flamegraph.pl) or a speedscope file"""
+    require_admin()
+    profile = profile_manager.get(profile_id)
+    if profile is None or fmt not in PROFILE_FORMATS:
+        abort(404)
+    if profile.state == 'running':
+        return jsonify({'error': 'Profile is still running', 'profile': profile.summary()}), 409
+    
+    extension = 'speedscope.json' if fmt == 'speedscope' else 'txt'
+    return Response(profile.export(fmt), mimetype=PROFILE_FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename=profile_{profile.id}.{extension}'})
 
 @app.route('/stop_simulation', methods=['POST'])
-def stop_simulation():
-    """Stop the running simulation"""
-    global simulation_running
+@app.route('/stop_simulation/<session_id>', methods=['POST'])
+def stop_simulation(session_id=None):
+    """Stop a running simulation"""
+    session = get_session(session_id)
     
-    if simulation_running:
-        simulation_running = False
+    if session is not None and session_manager.stop(session.id):
         flash('Simulation stopped successfully!', 'info')
     else:
         flash('No simulation is currently running.', 'warning')
@@ -153,82 +416,97 @@ def stop_simulation():
     return redirect(url_for('simulation_dashboard'))
 
 @app.route('/results')
-def results():
+@app.route('/results/<session_id>')
+def results(session_id=None):
     """View simulation results and charts"""
-    global simulation_data
-    
-    if not simulation_data['data_logger']:
+    session = get_session(session_id)
+    if session is None:
         flash('No simulation data available. Please run a simulation first.', 'info')
         return redirect(url_for('index'))
     
     try:
-        # Generate charts
-        chart_generator = ChartGenerator(simulation_data['data_logger'])
-        charts = chart_generator.generate_all_charts()
+        # Charts are fetched by the browser from the cacheable image routes
+        version = chart_version(session.data_logger)
+        charts = {name: url_for('versioned_chart_image', version=version, name=name, fmt='png')
+                  for name in CHART_METHODS}
         
         # Get summary statistics
-        summary_stats = simulation_data['data_logger'].get_summary_stats()
+        summary_stats = session.data_logger.get_summary_stats()
         
         return render_template('results.html', 
                              charts=charts, 
-                             summary_stats=summary_stats)
+                             summary_stats=summary_stats,
+                             session=session)
         
     except Exception as e:
         logging.error(f"Error generating results: {e}")
         flash(f'Error generating results: {str(e)}', 'danger')
         return redirect(url_for('index'))
 
+def chart_version(data_logger) -> str:
+    """Token that changes whenever the charted data changes"""
+    return f"{data_logger.run_id}-{data_logger.data_version}"
+
+def _chart_response(data_logger, name, fmt, version, cache_control):
+    if name not in CHART_METHODS or fmt not in IMAGE_MIME_TYPES:
+        abort(404)
+    
+    # Charts are a pure function of the data version, so a matching ETag needs no rendering
+    etag = f"{version}-{name}.{fmt}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        generator = ChartGenerator(data_logger)
+        image = generator.generate_chart(name, image_format=fmt)
+        rendered = f"{data_logger.run_id}-{generator.version}"
+        if rendered != version:
+            # Trades arrived before the data was snapshotted; label the image with what it shows
+            etag = f"{rendered}-{name}.{fmt}"
+            cache_control = 'no-cache'
+        response = Response(image, mimetype=IMAGE_MIME_TYPES[fmt])
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@app.route('/charts/<name>.<fmt>')
+@app.route('/charts/<session_id>/<name>.<fmt>')
+def chart_image(name, fmt, session_id=None):
+    """Current chart image; clients revalidate with If-None-Match"""
+    session = get_session(session_id)
+    if session is None:
+        abort(404)
+    return _chart_response(session.data_logger, name, fmt, chart_version(session.data_logger), 'no-cache')
+
+@app.route('/charts/<session_id>/<version>/<name>.<fmt>')
+def versioned_chart_image(session_id, version, name, fmt):
+    """Chart image at a fixed data version; safe to cache forever"""
+    session = get_session(session_id)
+    if session is None:
+        abort(404)
+    current = chart_version(session.data_logger)
+    if version != current:
+        # Only the latest version is kept; point stale links at it
+        return redirect(url_for('versioned_chart_image', version=current, name=name, fmt=fmt))
+    return _chart_response(session.data_logger, name, fmt, version, 'public, max-age=31536000, immutable')
+
 @app.route('/download_csv')
-def download_csv():
+@app.route('/download_csv/<session_id>')
+def download_csv(session_id=None):
     """Download simulation data as CSV"""
-    global simulation_data
-    
-    if not simulation_data['data_logger']:
+    session = get_session(session_id)
+    if session is None:
         flash('No simulation data available.', 'error')
         return redirect(url_for('index'))
     
     try:
-        csv_path = simulation_data['data_logger'].export_to_csv()
-        return send_file(csv_path, as_attachment=True, download_name='trading_simulation_data.csv')
+        csv_path = session.data_logger.export_to_csv(f"data/trading_simulation_export_{session.id}.csv")
+        return send_file(csv_path, as_attachment=True, download_name=f'trading_simulation_{session.id}.csv')
     except Exception as e:
         logging.error(f"Error downloading CSV: {e}")
         flash(f'Error downloading CSV: {str(e)}', 'danger')
         return redirect(url_for('results'))
 
-def run_simulation(duration_minutes):
-    """Run the trading simulation for specified duration"""
-    global simulation_running, simulation_data
-    
-    try:
-        logging.info(f"Starting simulation for {duration_minutes} minutes")
-        
-        # Start both bots
-        twap_thread = threading.Thread(target=simulation_data['twap_bot'].run)
-        smart_thread = threading.Thread(target=simulation_data['smart_bot'].run)
-        
-        twap_thread.start()
-        smart_thread.start()
-        
-        # Wait for duration or until stopped
-        start_time = time.time()
-        while simulation_running and (time.time() - start_time) < (duration_minutes * 60):
-            time.sleep(1)
-        
-        # Stop bots
-        simulation_data['twap_bot'].stop()
-        simulation_data['smart_bot'].stop()
-        
-        # Wait for threads to finish
-        twap_thread.join(timeout=10)
-        smart_thread.join(timeout=10)
-        
-        simulation_running = False
-        logging.info("Simulation completed")
-        
-    except Exception as e:
-        logging.error(f"Error in simulation: {e}")
-        simulation_running = False
-
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
@@ -238,4 +516,5 @@ def internal_error(error):
     return render_template('500.html'), 500
 
 if __name__ == '__main__':
+    install_profile_signal_handler()
     app.run(debug=True, host='0.0.0.0', port=5000)
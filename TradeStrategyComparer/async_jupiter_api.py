@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from jupiter_api import DEFAULT_BASE_URL, process_quote_response, generate_fallback_quote, quote_direction
+from metrics import QUOTE_HTTP_SECONDS, QUOTES
+from rate_limiter import PRIORITY_NORMAL
+
+
+class HTTPStatusError(Exception):
+    """Non-200 response from the quote API"""
+
+    def __init__(self, status: int, body: bytes):
+        super().__init__(f"{status} - {body[:200].decode('utf-8', 'replace')}")
+        self.status = status
+        self.body = body
+
+
+class AsyncJupiterAPI:
+    """Asyncio Jupiter API client that fans many quotes out over a pooled set of connections"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, max_concurrency: int = 32,
+                 timeout: float = 10, rate_limiter=None):
+        """
+        Args:
+            base_url: Quote API root, e.g. https://quote-api.jup.ag/v6
+            max_concurrency: Maximum requests (and pooled connections) in flight at once
+            timeout: Per-request timeout in seconds, including any wait for a rate limiter token
+            rate_limiter: Optional TokenBucketRateLimiter, e.g. shared with a JupiterAPI instance
+        """
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {'requests': 0, 'errors': 0, 'fallbacks': 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close all pooled connections"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily, like the semaphore, so the client can be constructed outside a running loop.
+        # httpx handles keep-alive, gzip, redirects and HTTP(S)_PROXY from the environment.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={'User-Agent': 'TWAP-Smart-Bot/1.0', 'Accept': 'application/json'},
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _wait_for_rate_limit(self, priority: int):
+        if self.rate_limiter is None:
+            return
+        # Queue alongside blocked JupiterAPI threads so priorities apply across both
+        reservation = self.rate_limiter.reserve(priority)
+        try:
+            while True:
+                delay = self.rate_limiter.poll(reservation)
+                if delay <= 0:
+                    return
+                await asyncio.sleep(delay)
+        finally:
+            self.rate_limiter.cancel(reservation)
+
+    async def _rate_limited_get(self, path: str, params: Dict[str, str], priority: int) -> httpx.Response:
+        await self._wait_for_rate_limit(priority)
+        return await self._get_client().get(path, params=params)
+
+    async def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                        priority: int = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
+        """Get a quote; same response handling and fallback as JupiterAPI.get_quote"""
+        params = {
+            'inputMint': input_mint,
+            'outputMint': output_mint,
+            'amount': str(amount),
+            'slippageBps': str(slippage_bps),
+            'onlyDirectRoutes': 'false',
+            'asLegacyTransaction': 'false'
+        }
+        direction = quote_direction(input_mint)
+
+        try:
+            async with self._get_semaphore():
+                # The rate-limit wait counts towards the timeout, so a starved quote falls back too
+                started = time.perf_counter()
+                try:
+                    response = await asyncio.wait_for(self._rate_limited_get('/quote', params, priority),
+                                                      self.timeout)
+                except Exception:
+                    QUOTE_HTTP_SECONDS.labels(direction, 'exception').observe(time.perf_counter() - started)
+                    raise
+                self.stats['requests'] += 1
+                QUOTE_HTTP_SECONDS.labels(direction, str(response.status_code)).observe(time.perf_counter() - started)
+
+            if response.status_code != 200:
+                raise HTTPStatusError(response.status_code, response.content)
+            quote = process_quote_response(response.json())
+            QUOTES.labels(direction, 'api').inc()
+            return quote
+
+        except Exception as e:
+            self.stats['errors'] += 1
+            logging.error(f"Async Jupiter API request failed: {e!r}")
+
+        quote = generate_fallback_quote(input_mint, output_mint, amount)
+        if quote is not None:
+            self.stats['fallbacks'] += 1
+            QUOTES.labels(direction, 'fallback').inc()
+        return quote
+
+    async def get_quotes(self, requests: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Fetch many quotes concurrently, bounded by max_concurrency
+
+        Args:
+            requests: get_quote keyword arguments per quote
+
+        Returns:
+            Quotes in the same order as requests
+        """
+        started = time.perf_counter()
+        quotes = await asyncio.gather(*(self.get_quote(**request) for request in requests))
+        logging.debug(f"Fetched {len(quotes)} quotes in {time.perf_counter() - started:.3f}s")
+        return list(quotes)
+
+    async def get_current_price(self, input_mint: str = 'So11111111111111111111111111111111111111112',
+                                output_mint: str = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v') -> Optional[float]:
+        """Get current SOL/USDC price"""
+        quote = await self.get_quote(input_mint, output_mint, int(1e9))
+        return quote.get('price') if quote else None
+
+    async def health_check(self) -> bool:
+        """Check if the quote API is accessible"""
+        try:
+            async with self._get_semaphore():
+                response = await self._get_client().get('/tokens', timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
@@ -0,0 +1,261 @@
+import argparse
+import bisect
+import csv
+import glob
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from clock import VirtualClock, make_rng
+from trading_bots import TWAPBot, SmartBot
+from data_logger import DataLogger
+
+SOL_MINT = 'So11111111111111111111111111111111111111112'
+USDC_MINT = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'
+
+DEFAULT_DATA_PATTERN = 'data/trading_data_*.csv'
+
+
+def _row_price(row: Dict[str, str]) -> Optional[float]:
+    """Extract the quoted SOL/USDC price from a recorded trade row (either CSV schema)"""
+    try:
+        if 'sol_amount' in row:
+            # Legacy schema: sol_amount, usdc_received, expected_usdc
+            sol_amount = float(row['sol_amount'])
+            expected_usdc = float(row.get('expected_usdc') or 0)
+            if sol_amount > 0 and expected_usdc > 0:
+                return expected_usdc / sol_amount
+            return float(row['price']) if row.get('price') else None
+
+        input_amount = float(row.get('input_amount') or 0)
+        expected_output = float(row.get('expected_output') or 0)
+        if input_amount > 0 and expected_output > 0:
+            if row.get('trade_direction', 'SOL_TO_USDC') == 'SOL_TO_USDC':
+                return expected_output / input_amount  # USDC per SOL
+            return input_amount / expected_output  # USDC per SOL (inverted)
+        return float(row['price']) if row.get('price') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def load_price_history(paths: Optional[List[str]] = None, pattern: str = DEFAULT_DATA_PATTERN) -> List[Tuple[datetime, float]]:
+    """
+    Load the recorded SOL/USDC quote path from trade log CSVs
+
+    Args:
+        paths: Explicit list of CSV files; defaults to every file matching pattern
+        pattern: Glob used when paths is not given
+
+    Returns:
+        List of (timestamp, price) tuples sorted by timestamp
+    """
+    if paths is None:
+        paths = sorted(glob.glob(pattern))
+
+    history = []
+    for path in paths:
+        try:
+            with open(path, newline='') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    if str(row.get('success', 'True')) != 'True':
+                        continue
+                    price = _row_price(row)
+                    if price is None or price <= 0:
+                        continue
+                    history.append((datetime.fromisoformat(row['timestamp']), price))
+        except Exception as e:
+            logging.error(f"Error loading price history from {path}: {e}")
+
+    history.sort(key=lambda point: point[0])
+    logging.info(f"Loaded {len(history)} recorded quotes from {len(paths)} files")
+    return history
+
+
+class ReplayJupiterAPI:
+    """JupiterAPI stand-in that serves quotes from a recorded price path"""
+
+    def __init__(self, price_history: List[Tuple[datetime, float]], clock: VirtualClock):
+        if not price_history:
+            raise ValueError("Price history is empty")
+        self.timestamps = [ts for ts, _ in price_history]
+        self.prices = [price for _, price in price_history]
+        self.clock = clock
+        self.quotes_served = 0
+
+    def _price_at(self, moment: datetime) -> float:
+        """Latest recorded price at or before the given moment"""
+        index = bisect.bisect_right(self.timestamps, moment) - 1
+        return self.prices[max(index, 0)]
+
+    def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                  priority: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Build a Jupiter-shaped quote from the recorded price at the replay clock's time"""
+        price = self._price_at(self.clock.now())
+
+        if input_mint == SOL_MINT:
+            output_amount = int(amount / 1e9 * price * 1e6)  # lamports -> micro USDC
+        else:
+            output_amount = int(amount / 1e6 / price * 1e9)  # micro USDC -> lamports
+
+        self.quotes_served += 1
+        return {
+            'inputMint': input_mint,
+            'inAmount': str(amount),
+            'outputMint': output_mint,
+            'outAmount': str(output_amount),
+            'price': price,
+            'priceImpactPct': 0.0,
+            'slippageBps': slippage_bps,
+            'otherAmountThreshold': str(int(output_amount * (1 - slippage_bps / 10000))),
+            'swapMode': 'ExactIn',
+            'replay': True
+        }
+
+    def get_current_price(self, input_mint: str = SOL_MINT, output_mint: str = USDC_MINT) -> Optional[float]:
+        """Get the recorded SOL/USDC price at the replay clock's time"""
+        return self._price_at(self.clock.now())
+
+    def health_check(self) -> bool:
+        return True
+
+
+class Backtester:
+    """Replay recorded quotes through TWAPBot and SmartBot without sleeping"""
+
+    def __init__(self, price_history: List[Tuple[datetime, float]], trade_amount: float = 1.0,
+                 slippage_threshold: float = 0.2, interval_minutes: int = 5, check_interval: float = 30,
+                 trade_direction: str = 'SOL_TO_USDC', duration_minutes: Optional[float] = None,
+                 log_file: Optional[str] = None, seed: Optional[int] = None):
+        if not price_history:
+            raise ValueError("Cannot backtest without recorded quotes")
+
+        self.price_history = price_history
+        self.start_time = price_history[0][0]
+        if duration_minutes is None:
+            self.end_time = price_history[-1][0]
+        else:
+            self.end_time = self.start_time + timedelta(minutes=duration_minutes)
+
+        if log_file is None:
+            log_file = f"data/backtests/backtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+        self.clock = VirtualClock(self.start_time)
+        self.jupiter_api = ReplayJupiterAPI(price_history, self.clock)
+        self.data_logger = DataLogger(log_file=log_file)
+
+        self.twap_bot = TWAPBot(
+            trade_amount=trade_amount,
+            interval_minutes=interval_minutes,
+            jupiter_api=self.jupiter_api,
+            data_logger=self.data_logger,
+            trade_direction=trade_direction,
+            clock=self.clock,
+            rng=make_rng(seed, 'TWAPBot')
+        )
+
+        self.smart_bot = SmartBot(
+            trade_amount=trade_amount,
+            slippage_threshold=slippage_threshold,
+            jupiter_api=self.jupiter_api,
+            data_logger=self.data_logger,
+            trade_direction=trade_direction,
+            clock=self.clock,
+            rng=make_rng(seed, 'SmartBot')
+        )
+        self.smart_bot.check_interval = check_interval
+
+    def run(self) -> Dict[str, Any]:
+        """Run both bots over the recorded time range and return their statistics"""
+        started = time.perf_counter()
+
+        twap_interval = timedelta(seconds=self.twap_bot.interval_seconds)
+        smart_interval = timedelta(seconds=self.smart_bot.check_interval)
+        next_twap = self.start_time
+        next_smart = self.start_time
+
+        self.twap_bot.running = True
+        self.smart_bot.running = True
+
+        # Walk virtual time event by event; on ties TWAP goes first, as in a live run
+        while True:
+            moment = min(next_twap, next_smart)
+            if moment > self.end_time:
+                break
+
+            self.clock.advance_to(moment)
+            if next_twap <= next_smart:
+                self.twap_bot.step()
+                next_twap += twap_interval
+            else:
+                self.smart_bot.step()
+                next_smart += smart_interval
+
+        self.twap_bot.stop()
+        self.smart_bot.stop()
+        self.data_logger.close()
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Backtest replayed {self.end_time - self.start_time} of history in {elapsed:.2f}s")
+
+        return {
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat(),
+            'quotes_loaded': len(self.price_history),
+            'quotes_served': self.jupiter_api.quotes_served,
+            'elapsed_seconds': elapsed,
+            'log_file': self.data_logger.log_file,
+            'twap_stats': self.twap_bot.get_stats(),
+            'smart_stats': self.smart_bot.get_stats(),
+            'summary_stats': self.data_logger.get_summary_stats()
+        }
+
+
+def run_backtest(paths: Optional[List[str]] = None, pattern: str = DEFAULT_DATA_PATTERN, **kwargs) -> Dict[str, Any]:
+    """Load recorded quotes and backtest both strategies over them"""
+    price_history = load_price_history(paths, pattern)
+    return Backtester(price_history, **kwargs).run()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Backtest TWAP vs Smart bots against recorded trade logs")
+    parser.add_argument('files', nargs='*', help="Recorded trade CSVs (default: all files matching --pattern)")
+    parser.add_argument('--pattern', default=DEFAULT_DATA_PATTERN, help="Glob for recorded trade CSVs")
+    parser.add_argument('--trade-amount', type=float, default=1.0)
+    parser.add_argument('--slippage-threshold', type=float, default=0.2)
+    parser.add_argument('--interval-minutes', type=int, default=5)
+    parser.add_argument('--check-interval', type=float, default=30, help="SmartBot check interval in seconds")
+    parser.add_argument('--direction', choices=['SOL_TO_USDC', 'USDC_TO_SOL'], default='SOL_TO_USDC')
+    parser.add_argument('--duration-minutes', type=float, default=None, help="Replay window (default: whole history)")
+    parser.add_argument('--log-file', default=None, help="Where to write the backtest trade log")
+    parser.add_argument('--seed', type=int, default=None, help="Seed the simulated slippage for a reproducible run")
+    parser.add_argument('--output', default=None, help="Write the JSON result here instead of stdout")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    result = run_backtest(
+        paths=args.files or None,
+        pattern=args.pattern,
+        trade_amount=args.trade_amount,
+        slippage_threshold=args.slippage_threshold,
+        interval_minutes=args.interval_minutes,
+        check_interval=args.check_interval,
+        trade_direction=args.direction,
+        duration_minutes=args.duration_minutes,
+        log_file=args.log_file,
+        seed=args.seed
+    )
+
+    output = json.dumps(result, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
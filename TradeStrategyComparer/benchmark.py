@@ -0,0 +1,407 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional
+
+from backtester import SOL_MINT
+from clock import VirtualClock, make_rng
+from data_logger import DataLogger
+from rate_limiter import PRIORITY_NORMAL
+from trading_bots import TWAPBot
+
+BENCH_SEED = 0
+BENCH_START = datetime(2025, 1, 1)
+DEFAULT_SIZES = [1000, 100000, 1000000]
+QUICK_SIZES = [1000, 10000]
+CHART_MAX_TRADES = 100000  # Rendering is linear in trades; larger sizes only repeat the same measurement
+DEFAULT_THRESHOLD = 0.2
+# Latency changes smaller than this are timer noise, whatever their relative size
+NOISE_FLOOR_SECONDS = 5e-5
+SUITES = ('trade_path', 'analytics', 'charts', 'status', 'startup')
+
+# Cold `import app` in a fresh interpreter, as a gunicorn worker boots. These are absolute
+# limits checked on every run with the startup suite, not just against a baseline.
+STARTUP_BUDGET_SECONDS = 0.6
+STARTUP_BUDGET_RSS_MB = 90
+# Loaded on first use only; none of them should be imported by app startup
+STARTUP_DEFERRED_MODULES = ('pandas', 'matplotlib', 'sqlalchemy', 'pyarrow', 'httpx')
+_STARTUP_PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+try:
+    # Peak RSS of this process image only; Linux carries ru_maxrss over from the parent through fork/exec
+    with open('/proc/self/status') as status:
+        rss_mb = next(int(line.split()[1]) for line in status if line.startswith('VmHWM:')) / 1024
+except (OSError, StopIteration):
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+print(json.dumps({'seconds': elapsed, 'rss_mb': rss_mb,
+                  'loaded': [name for name in %r if name in sys.modules]}))
+''' % (STARTUP_DEFERRED_MODULES,)
+
+
+class StubJupiterAPI:
+    """Zero-latency stand-in for JupiterAPI that quotes a fixed price, so benchmarks measure only our code"""
+
+    def __init__(self, price: float = 175.0, price_impact: float = 0.05):
+        self.price = price
+        self.price_impact = price_impact
+
+    def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                  priority: int = PRIORITY_NORMAL) -> Dict[str, Any]:
+        if input_mint == SOL_MINT:
+            output_amount = int(amount / 1e9 * self.price * 1e6)
+        else:
+            output_amount = int(amount / 1e6 / self.price * 1e9)
+        return {
+            'inputMint': input_mint,
+            'inAmount': str(amount),
+            'outputMint': output_mint,
+            'outAmount': str(output_amount),
+            'price': self.price,
+            'priceImpactPct': self.price_impact,
+            'slippageBps': slippage_bps
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {}
+
+
+def _metric(value: float, unit: str, higher_is_better: bool) -> Dict[str, Any]:
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def _median_seconds(fn: Callable[[], Any], repeats: int) -> float:
+    """Median wall time of fn over repeats calls"""
+    gc.collect()
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def _size_label(size: int) -> str:
+    if size >= 1000000 and size % 1000000 == 0:
+        return f"{size // 1000000}M"
+    if size >= 1000 and size % 1000 == 0:
+        return f"{size // 1000}k"
+    return str(size)
+
+
+def _synthetic_trade(i: int, rng) -> Dict[str, Any]:
+    """Deterministic trade alternating between the two bots, one per second"""
+    expected_output = 175.0 + rng.uniform(-1, 1)
+    actual_output = expected_output * (1 - rng.uniform(0.001, 0.01))
+    return {
+        'timestamp': BENCH_START + timedelta(seconds=i),
+        'bot_type': 'TWAPBot' if i % 2 == 0 else 'SmartBot',
+        'trade_direction': 'SOL_TO_USDC',
+        'input_amount': 1.0,
+        'input_symbol': 'SOL',
+        'output_received': actual_output,
+        'output_symbol': 'USDC',
+        'expected_output': expected_output,
+        'slippage_percent': (expected_output - actual_output) / expected_output * 100,
+        'price': actual_output,
+        'success': i % 50 != 0
+    }
+
+
+def _filled_logger(trades: int):
+    """DataLogger holding `trades` synthetic trades, and the seconds spent inside log_trade"""
+    data_logger = DataLogger(log_file=os.devnull)
+    rng = make_rng(BENCH_SEED, 'trades')
+    spent = 0.0
+    for i in range(trades):
+        trade = _synthetic_trade(i, rng)
+        started = time.perf_counter()
+        data_logger.log_trade(trade)
+        spent += time.perf_counter() - started
+    return data_logger, spent
+
+
+def bench_trade_path(sizes: List[int]) -> Dict[str, Dict[str, Any]]:
+    """execute_trade + log_trade throughput against the stub API"""
+    trades = min(max(sizes), 20000)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_logger = DataLogger(log_file=os.path.join(tmp, 'trades.csv'))
+        clock = VirtualClock(BENCH_START)
+        bot = TWAPBot(1.0, 5, StubJupiterAPI(), data_logger, clock=clock, rng=make_rng(BENCH_SEED, 'TWAPBot'))
+
+        gc.collect()
+        started = time.perf_counter()
+        for _ in range(trades):
+            bot.execute_trade()
+            clock.advance(1)
+        elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        data_logger.flush()
+        drain = time.perf_counter() - started
+        data_logger.close()
+
+    return {
+        'trade_path.trades_per_second': _metric(trades / elapsed, 'trades/s', True),
+        'trade_path.csv_drain_seconds': _metric(drain, 's', False)
+    }
+
+
+def bench_analytics(sizes: List[int], loggers: Dict[int, Any]) -> Dict[str, Dict[str, Any]]:
+    """get_summary_stats / get_time_series_data / get_recent_trades latency per history size"""
+    results = {}
+    for size in sizes:
+        data_logger, spent = loggers[size]
+        label = _size_label(size)
+        results[f'log_trade.{label}.trades_per_second'] = _metric(size / spent, 'trades/s', True)
+        results[f'summary_stats.{label}.seconds'] = _metric(
+            _median_seconds(data_logger.get_summary_stats, 50), 's', False)
+        results[f'time_series.{label}.seconds'] = _metric(
+            _median_seconds(data_logger.get_time_series_data, 5), 's', False)
+        next_index = data_logger.get_time_series_data(since=10 ** 12)['next_index']
+        results[f'time_series_incremental.{label}.seconds'] = _metric(
+            _median_seconds(lambda: data_logger.get_time_series_data(since=max(0, next_index - 10)), 50), 's', False)
+        results[f'recent_trades.{label}.seconds'] = _metric(
+            _median_seconds(lambda: data_logger.get_recent_trades(10), 50), 's', False)
+    return results
+
+
+def bench_charts(sizes: List[int], loggers: Dict[int, Any]) -> Dict[str, Dict[str, Any]]:
+    """generate_all_charts wall time with an empty and a warm render cache"""
+    from chart_generator import ChartGenerator, clear_render_cache
+
+    results = {}
+    for size in [size for size in sizes if size <= CHART_MAX_TRADES]:
+        data_logger, _ = loggers[size]
+        label = _size_label(size)
+        generator = ChartGenerator(data_logger)
+
+        def cold():
+            clear_render_cache()
+            generator.generate_all_charts(parallel=False)
+
+        results[f'charts.{label}.cold_seconds'] = _metric(_median_seconds(cold, 3), 's', False)
+        results[f'charts.{label}.warm_seconds'] = _metric(
+            _median_seconds(lambda: generator.generate_all_charts(parallel=False), 20), 's', False)
+    return results
+
+
+def bench_status(requests: int = 2000) -> Dict[str, Dict[str, Any]]:
+    """/api/simulation_status requests per second through the WSGI app (no network)"""
+    from app import app, session_manager
+
+    # Keep the run's trade log out of data/, which backtests, history and migration read
+    with tempfile.TemporaryDirectory() as tmp:
+        session = session_manager.create_session(seed=BENCH_SEED, virtual_time=True,
+                                                 log_file=os.path.join(tmp, 'trades.csv'))
+        try:
+            while session.active:
+                time.sleep(0.01)
+            client = app.test_client()
+            url = f'/api/simulation_status/{session.id}'
+            client.get(url)
+
+            gc.collect()
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(requests):
+                request_started = time.perf_counter()
+                client.get(url)
+                latencies.append(time.perf_counter() - request_started)
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+        finally:
+            session.stop()
+            while session.active:
+                time.sleep(0.01)
+            session.close()
+
+    return {
+        'status.requests_per_second': _metric(requests / elapsed, 'req/s', True),
+        'status.p95_seconds': _metric(latencies[int(0.95 * (len(latencies) - 1))], 's', False)
+    }
+
+
+def bench_startup(repeats: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Time, peak RSS and heavy modules of a cold `import app`, each in a fresh interpreter"""
+    probes = []
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, '-c', _STARTUP_PROBE], capture_output=True, text=True, check=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        probes.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    loaded = sorted({name for probe in probes for name in probe['loaded']})
+    if loaded:
+        logging.warning(f"App startup imported deferred modules: {', '.join(loaded)}")
+
+    return {
+        'startup.import_seconds': _metric(statistics.median(probe['seconds'] for probe in probes), 's', False),
+        'startup.peak_rss_mb': _metric(max(probe['rss_mb'] for probe in probes), 'MB', False),
+        'startup.deferred_modules_loaded': _metric(len(loaded), 'modules', False)
+    }
+
+
+def check_startup_budgets(results: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Startup metrics over their absolute budgets, as messages (empty when within budget)"""
+    failures = []
+    budgets = (('startup.import_seconds', STARTUP_BUDGET_SECONDS), ('startup.peak_rss_mb', STARTUP_BUDGET_RSS_MB),
+               ('startup.deferred_modules_loaded', 0))
+    for name, budget in budgets:
+        result = results.get(name)
+        if result is not None and result['value'] > budget:
+            failures.append(f"{name} = {result['value']:.6g} {result['unit']} exceeds the budget of {budget}")
+    return failures
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(sizes: List[int] = DEFAULT_SIZES, suites: List[str] = SUITES) -> Dict[str, Any]:
+    """Run the selected suites and return a JSON-serializable report"""
+    results = {}
+    # First, before the heavy suites grow this process and warm shared caches
+    if 'startup' in suites:
+        results.update(bench_startup())
+
+    if 'trade_path' in suites:
+        results.update(bench_trade_path(sizes))
+
+    if 'analytics' in suites or 'charts' in suites:
+        loggers = {}
+        for size in sizes:
+            logging.info(f"Building a {size}-trade history")
+            loggers[size] = _filled_logger(size)
+        if 'analytics' in suites:
+            results.update(bench_analytics(sizes, loggers))
+        if 'charts' in suites:
+            results.update(bench_charts(sizes, loggers))
+        for data_logger, _ in loggers.values():
+            data_logger.close()
+        del loggers
+
+    if 'status' in suites:
+        results.update(bench_status())
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sizes': sizes,
+            'suites': list(suites)
+        },
+        'results': results
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare two reports metric by metric
+
+    A metric regresses when it moves in its bad direction by more than threshold (a fraction
+    of the baseline value), and improves when it moves as far the other way. Latencies that
+    moved by less than NOISE_FLOOR_SECONDS are always ok.
+    """
+    rows = []
+    base_results, current_results = baseline['results'], current['results']
+    for name in sorted(set(base_results) | set(current_results)):
+        base, now = base_results.get(name), current_results.get(name)
+        row = {'name': name, 'baseline': base['value'] if base else None, 'current': now['value'] if now else None,
+               'change': None}
+        if base is None:
+            row['status'] = 'new'
+        elif now is None:
+            row['status'] = 'missing'
+        else:
+            change = (now['value'] - base['value']) / base['value'] if base['value'] else 0.0
+            worse = -change if now['higher_is_better'] else change
+            row['change'] = change
+            if now['unit'] == 's' and abs(now['value'] - base['value']) < NOISE_FLOOR_SECONDS:
+                row['status'] = 'ok'
+            else:
+                row['status'] = 'regression' if worse > threshold else 'improvement' if worse < -threshold else 'ok'
+        rows.append(row)
+    return rows
+
+
+def _print_comparison(rows: List[Dict[str, Any]]):
+    def fmt(value):
+        return '-' if value is None else f"{value:.6g}"
+
+    width = max(len(row['name']) for row in rows) if rows else 10
+    print(f"{'metric':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}  status")
+    for row in rows:
+        change = '-' if row['change'] is None else f"{row['change'] * 100:+.1f}%"
+        print(f"{row['name']:<{width}}  {fmt(row['baseline']):>12}  {fmt(row['current']):>12}  {change:>8}  {row['status']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the trade path, logger, analytics, charts, status API and app startup")
+    parser.add_argument('--sizes', type=int, nargs='+', default=None,
+                        help=f"Trade history sizes (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--quick', action='store_true', help=f"Use sizes {' '.join(map(str, QUICK_SIZES))}")
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--output', default=None,
+                        help="Where to save the JSON report (default: data/benchmarks/benchmark_<time>.json)")
+    parser.add_argument('--compare', default=None, metavar='BASELINE', help="Baseline report to compare against")
+    parser.add_argument('--current', default=None, metavar='REPORT',
+                        help="Compare this saved report instead of running the benchmarks")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change counted as a regression (default: 0.2)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    if args.current:
+        with open(args.current) as f:
+            report = json.load(f)
+    else:
+        sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+        report = run_benchmarks(sizes, args.suites)
+        output = args.output or f"data/benchmarks/benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {len(report['results'])} metrics to {output}")
+
+    failures = check_startup_budgets(report['results'])
+    for failure in failures:
+        print(f"Startup budget exceeded: {failure}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, report, args.threshold)
+        _print_comparison(rows)
+        if any(row['status'] == 'regression' for row in rows):
+            sys.exit(1)
+    elif not args.current:
+        for name, result in report['results'].items():
+            print(f"{name}: {result['value']:.6g} {result['unit']}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
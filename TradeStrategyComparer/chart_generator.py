@@ -1,25 +1,143 @@
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
-import numpy as np
 import logging
 import os
 import io
 import base64
+import threading
+import time
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from metrics import CHART_RENDER_SECONDS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# matplotlib is imported by _load_pyplot() when a chart is first rendered, so web workers
+# that only serve status endpoints or cached charts never pay for it
+plt = None
+mdates = None
+
+CHART_METHODS = OrderedDict([
+    ('cumulative_performance', 'generate_cumulative_performance_chart'),
+    ('slippage_comparison', 'generate_slippage_comparison_chart'),
+    ('execution_efficiency', 'generate_execution_efficiency_chart'),
+    ('price_tracking', 'generate_price_tracking_chart'),
+])
+
+IMAGE_MIME_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+_EMPTY_PNG = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+_EMPTY_SVG = b'<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"/>'
+
+# Rendered charts keyed by (data logger, data version, chart, format), least recently used first
+RENDER_CACHE_MAX_ENTRIES = 64
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RENDER_TIMEOUT = 60
+_render_cache = OrderedDict()
+_render_cache_bytes = 0
+_render_cache_lock = threading.Lock()
+
+# pyplot is not thread-safe: cache misses render in a small process pool, or in-process
+# under a lock on single-core hosts
+_render_pool = None
+_render_pool_lock = threading.Lock()
+_pyplot_lock = threading.Lock()
+
+class _DataSnapshot:
+    """Picklable stand-in for DataLogger holding just the data one chart needs"""
+    
+    def __init__(self, time_series=None, trades=None, summary=None):
+        self.time_series = time_series
+        self.trades = trades
+        self.summary = summary
+    
+    def get_time_series_data(self) -> Dict[str, List]:
+        return self.time_series
+    
+    def get_trades_dataframe(self) -> 'pd.DataFrame':
+        return self.trades
+    
+    def get_summary_stats(self) -> Dict[str, Any]:
+        return self.summary
+
+def _load_pyplot():
+    global plt, mdates
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend
+        import matplotlib.dates
+        import matplotlib.pyplot
+        matplotlib.pyplot.style.use('dark_background')  # Dark theme to match UI
+        mdates, plt = matplotlib.dates, matplotlib.pyplot
+
+def _render_chart(name: str, snapshot: _DataSnapshot, image_format: str) -> Any:
+    """Render one chart from a snapshot (runs in a render worker process)"""
+    return getattr(ChartGenerator(snapshot, image_format), CHART_METHODS[name])()
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: forking a process that runs bot and request threads is unsafe
+            _render_pool = ProcessPoolExecutor(max_workers=len(CHART_METHODS),
+                                               mp_context=multiprocessing.get_context('spawn'))
+        return _render_pool
+
+def _reset_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+def _cache_get(key) -> Any:
+    with _render_cache_lock:
+        chart = _render_cache.get(key)
+        if chart is not None:
+            _render_cache.move_to_end(key)
+        return chart
+
+def _cache_put(key, chart: Any):
+    global _render_cache_bytes
+    if len(chart) > RENDER_CACHE_MAX_BYTES:
+        return
+    with _render_cache_lock:
+        if key in _render_cache:
+            _render_cache_bytes -= len(_render_cache.pop(key))
+        _render_cache[key] = chart
+        _render_cache_bytes += len(chart)
+        while len(_render_cache) > RENDER_CACHE_MAX_ENTRIES or _render_cache_bytes > RENDER_CACHE_MAX_BYTES:
+            _, evicted = _render_cache.popitem(last=False)
+            _render_cache_bytes -= len(evicted)
+
+def clear_render_cache():
+    """Drop all cached chart renders"""
+    global _render_cache_bytes
+    with _render_cache_lock:
+        _render_cache.clear()
+        _render_cache_bytes = 0
 
 class ChartGenerator:
     """Generate performance comparison charts"""
     
-    def __init__(self, data_logger):
+    def __init__(self, data_logger, image_format: str = 'data_uri'):
+        """
+        Args:
+            data_logger: Source of trade data
+            image_format: 'data_uri' (base64 PNG string for inline use), 'png' or 'svg' (raw bytes)
+        """
+        if image_format != 'data_uri' and image_format not in IMAGE_MIME_TYPES:
+            raise ValueError(f"Unsupported image format: {image_format}")
         self.data_logger = data_logger
-        plt.style.use('dark_background')  # Dark theme to match UI
+        self.image_format = image_format
+        self.version = None  # Data version the charts of the last generate call show
         
     def generate_cumulative_performance_chart(self) -> str:
         """Generate cumulative performance comparison chart"""
+        _load_pyplot()
         try:
             time_series = self.data_logger.get_time_series_data()
             
@@ -56,6 +174,7 @@ class ChartGenerator:
     
     def generate_slippage_comparison_chart(self) -> str:
         """Generate slippage comparison chart"""
+        _load_pyplot()
         try:
             df = self.data_logger.get_trades_dataframe()
             
@@ -112,6 +231,7 @@ class ChartGenerator:
     
     def generate_execution_efficiency_chart(self) -> str:
         """Generate execution efficiency comparison chart"""
+        _load_pyplot()
         try:
             stats = self.data_logger.get_summary_stats()
             
@@ -164,6 +284,7 @@ class ChartGenerator:
     
     def generate_price_tracking_chart(self) -> str:
         """Generate price tracking chart"""
+        _load_pyplot()
         try:
             df = self.data_logger.get_trades_dataframe()
             
@@ -209,26 +330,138 @@ class ChartGenerator:
             logging.error(f"Error generating price tracking chart: {e}")
             return self._create_empty_chart(f"Error: {str(e)}")
     
-    def generate_all_charts(self) -> Dict[str, str]:
-        """Generate all performance charts"""
-        return {
-            'cumulative_performance': self.generate_cumulative_performance_chart(),
-            'slippage_comparison': self.generate_slippage_comparison_chart(),
-            'execution_efficiency': self.generate_execution_efficiency_chart(),
-            'price_tracking': self.generate_price_tracking_chart()
-        }
-    
-    def _fig_to_base64(self, fig) -> str:
-        """Convert matplotlib figure to base64 string"""
+    def generate_all_charts(self, parallel: bool = True) -> Dict[str, str]:
+        """Generate all performance charts as base64 data URIs"""
+        return self._generate(list(CHART_METHODS), 'data_uri', parallel)
+    
+    def generate_chart(self, name: str, image_format: str = 'png', parallel: bool = True) -> Any:
+        """Generate one chart: raw PNG/SVG bytes, or a data URI for image_format='data_uri'"""
+        if name not in CHART_METHODS:
+            raise KeyError(name)
+        return self._generate([name], image_format, parallel)[name]
+    
+    def _generate(self, names: List[str], image_format: str, parallel: bool) -> Dict[str, Any]:
+        """
+        Serve charts from the render cache, rendering only the missing ones
+        
+        Charts are cached per data logger and data version, so repeat views with no new
+        trades skip rendering. Misses render from snapshots cut at the point the version
+        they are cached under (self.version) was read, so a trade logged meanwhile cannot end
+        up in a chart labelled with an older version. Only the version and the read marks are
+        taken under data_lock; the snapshots are built after it is released, so logging trades
+        never waits on DataFrame construction or SQL queries. On multi-core hosts misses
+        render concurrently in worker processes unless parallel is False.
+        """
+        version = getattr(self.data_logger, 'data_version', None)
+        charts = self._cached(names, image_format, version)
+        
+        missing = [name for name in names if name not in charts]
+        if missing:
+            with getattr(self.data_logger, 'data_lock', None) or nullcontext():
+                snapshot_version = getattr(self.data_logger, 'data_version', None)
+                if snapshot_version != version:
+                    # Trades arrived since the lookup; every chart must show the same version
+                    version = snapshot_version
+                    charts = self._cached(names, image_format, version)
+                    missing = [name for name in names if name not in charts]
+                get_read_marks = getattr(self.data_logger, 'get_read_marks', None)
+                marks = get_read_marks() if get_read_marks else None
+            snapshots = self._snapshots(missing, marks)
+            
+            # A pool cannot beat in-process rendering on a single core
+            if parallel and (os.cpu_count() or 1) > 1:
+                rendered = self._render_parallel(missing, image_format, snapshots)
+            else:
+                rendered = self._render_serial(missing, image_format, snapshots)
+            
+            if version is not None:
+                for name, chart in rendered.items():
+                    _cache_put(self._cache_key(version, name, image_format), chart)
+            charts.update(rendered)
+        
+        self.version = version
+        return {name: charts[name] for name in names}
+    
+    def _cache_key(self, version: int, name: str, image_format: str) -> tuple:
+        return (id(self.data_logger), getattr(self.data_logger, 'run_id', None), version, name, image_format)
+    
+    def _cached(self, names: List[str], image_format: str, version) -> Dict[str, Any]:
+        charts = {}
+        if version is not None:
+            for name in names:
+                chart = _cache_get(self._cache_key(version, name, image_format))
+                if chart is not None:
+                    charts[name] = chart
+        return charts
+    
+    def _render_serial(self, names: List[str], image_format: str,
+                       snapshots: Dict[str, _DataSnapshot]) -> Dict[str, Any]:
+        charts = {}
+        with _pyplot_lock:
+            for name in names:
+                with CHART_RENDER_SECONDS.labels(name, image_format).time():
+                    charts[name] = _render_chart(name, snapshots[name], image_format)
+        return charts
+    
+    def _snapshots(self, names: List[str], marks: Optional[Dict[str, Any]] = None) -> Dict[str, _DataSnapshot]:
+        """Picklable copies of just the data each chart needs, cut at marks (DataLogger.get_read_marks) if given"""
+        snapshots = {}
+        trades = None
+        for name in names:
+            if name == 'cumulative_performance':
+                if marks is not None:
+                    time_series = self.data_logger.get_time_series_data(until=marks['series_points'])
+                else:
+                    time_series = self.data_logger.get_time_series_data()
+                snapshots[name] = _DataSnapshot(time_series=time_series)
+            elif name == 'execution_efficiency':
+                if marks is not None and marks['aggregates'] is not None:
+                    summary = marks['aggregates'].summary()
+                else:
+                    summary = self.data_logger.get_summary_stats()
+                snapshots[name] = _DataSnapshot(summary=summary)
+            else:
+                if trades is None:
+                    if marks is not None:
+                        trades = self.data_logger.get_trades_dataframe(rows=marks['rows'])
+                    else:
+                        trades = self.data_logger.get_trades_dataframe()
+                snapshots[name] = _DataSnapshot(trades=trades)
+        return snapshots
+    
+    def _render_parallel(self, names: List[str], image_format: str,
+                         snapshots: Dict[str, _DataSnapshot]) -> Dict[str, Any]:
+        """Render each chart in its own worker process from a snapshot of the data"""
+        try:
+            pool = _get_render_pool()
+            started = time.perf_counter()
+            futures = {}
+            for name in names:
+                futures[name] = pool.submit(_render_chart, name, snapshots[name], image_format)
+                # Submit to completion, so it includes waiting for a free worker process
+                futures[name].add_done_callback(
+                    lambda _, timer=CHART_RENDER_SECONDS.labels(name, image_format): timer.observe(time.perf_counter() - started))
+            return {name: future.result(timeout=RENDER_TIMEOUT) for name, future in futures.items()}
+        except Exception as e:
+            logging.error(f"Parallel chart rendering failed, rendering in-process: {e}")
+            _reset_render_pool()
+            with _pyplot_lock:
+                return {name: _render_chart(name, snapshots[name], image_format) for name in names}
+    
+    def _fig_to_base64(self, fig) -> Any:
+        """Convert matplotlib figure to base64 string (raw bytes when image_format is png/svg)"""
         try:
+            image_format = 'png' if self.image_format == 'data_uri' else self.image_format
             buffer = io.BytesIO()
-            fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight', 
+            fig.savefig(buffer, format=image_format, dpi=150, bbox_inches='tight', 
                        facecolor='#1a1a1a', edgecolor='none')
             buffer.seek(0)
-            
-            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
             plt.close(fig)  # Free memory
             
+            if self.image_format != 'data_uri':
+                return buffer.getvalue()
+            
+            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
             return f"data:image/png;base64,{image_base64}"
             
         except Exception as e:
@@ -238,6 +471,7 @@ class ChartGenerator:
     
     def _create_empty_chart(self, message: str) -> str:
         """Create an empty chart with a message"""
+        _load_pyplot()
         try:
             fig, ax = plt.subplots(figsize=(10, 6))
             ax.text(0.5, 0.5, message, ha='center', va='center', 
@@ -250,4 +484,8 @@ class ChartGenerator:
             
         except Exception as e:
             logging.error(f"Error creating empty chart: {e}")
-            return "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+            if self.image_format == 'png':
+                return base64.b64decode(_EMPTY_PNG)
+            if self.image_format == 'svg':
+                return _EMPTY_SVG
+            return f"data:image/png;base64,{_EMPTY_PNG}"
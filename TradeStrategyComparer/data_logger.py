@@ -2,200 +2,318 @@ import csv
 import logging
 import os
 from datetime import datetime
-from typing import Dict, Any, List
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+import numpy as np
 import json
+import threading
+import uuid
+from time import perf_counter
+from metrics import LOG_TRADE_SECONDS
+from trade_writer import BufferedCSVWriter
+from trade_storage import DEFAULT_STORE_ROOT, ParquetTradeWriter, parquet_available
+from trade_store import ColumnarTradeStore
+from running_stats import TradeAggregates
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Trade column behind each get_bot_series kind
+SERIES_COLUMNS = {
+    'cumulative': 'output_received',
+    'slippage': 'slippage_percent',
+    'price': 'price'
+}
+
+# Where runs without an explicit log file record trades: 'csv', 'parquet' (needs pyarrow)
+# or 'sql' (DATABASE_URL, SQLite by default)
+DEFAULT_STORAGE = os.environ.get('TRADE_LOG_STORAGE', 'csv')
 
 class DataLogger:
     """Logger for trading data and statistics"""
     
-    def __init__(self):
-        self.trades_data = []
+    def __init__(self, log_file: str = None, durability: str = 'flush', flush_interval: float = 1.0,
+                 batch_size: int = 500, storage: str = None, store_root: str = DEFAULT_STORE_ROOT,
+                 database_url: str = None):
+        """
+        Args:
+            log_file: CSV log path; giving one always selects CSV storage
+            storage: 'csv' (one file per run), 'parquet' (date/run partitions under store_root) or
+                     'sql' (rows in a shared database); defaults to TRADE_LOG_STORAGE
+            database_url: SQLAlchemy URL for 'sql' storage (default DATABASE_URL, else local SQLite)
+        """
+        self.trade_store = ColumnarTradeStore()
+        self.data_version = 0  # Bumped on every logged trade; keys derived caches such as rendered charts
+        self.run_id = uuid.uuid4().hex[:12]  # Distinguishes versions of different runs in ETags and URLs
+        # Held while a trade is applied to the in-memory data; hold it to read data_version and
+        # the data it describes together
+        self.data_lock = threading.Lock()
+        
+        # Cumulative output series, extended on every logged trade
+        self._series_lock = threading.Lock()
+        self._series_timestamps = []
+        self._series_last_timestamp = None
+        self._series_twap = []
+        self._series_smart = []
+        self._twap_total = 0.0
+        self._smart_total = 0.0
+        
+        # Per-bot running aggregates behind get_summary_stats
+        self._aggregates_lock = threading.Lock()
+        self._aggregates = TradeAggregates()
+        
+        if storage is None:
+            storage = 'csv' if log_file is not None else DEFAULT_STORAGE
+        if storage == 'parquet' and not parquet_available():
+            logging.error("Parquet trade storage needs pyarrow (install the parquet extra: pip install -e '.[parquet]'); logging to CSV instead")
+            storage = 'csv'
+        self.storage = storage
+        self.store_root = store_root
+        self.sql_store = None
+        
         # Create data directory if it doesn't exist
         os.makedirs('data', exist_ok=True)
-        self.log_file = f"data/trading_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        generated_log_file = False
+        if storage in ('parquet', 'sql'):
+            # Rows are keyed by run_id rather than written to a per-run file
+            log_file = None
+        elif log_file is None:
+            # The run id keeps runs started in the same second (concurrent sessions) apart
+            log_file = f"data/trading_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.run_id}.csv"
+            generated_log_file = True
+        else:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        self.log_file = log_file
         self.csv_headers = [
             'timestamp', 'bot_type', 'trade_direction', 'input_amount', 'input_symbol',
             'output_received', 'output_symbol', 'expected_output', 'slippage_percent', 'price', 'success'
         ]
         
-        # Initialize CSV file
-        self._init_csv_file()
+        if storage not in ('parquet', 'sql'):
+            # Outside the try below: a clash on a generated name must not fall through to appending
+            self._init_csv_file(exclusive=generated_log_file)
         
-    def _init_csv_file(self):
-        """Initialize CSV file with headers"""
+        # Rows are appended by a background writer thread
         try:
-            with open(self.log_file, 'w', newline='') as csvfile:
+            if storage == 'parquet':
+                self._writer = ParquetTradeWriter(store_root, self.run_id, batch_size=batch_size,
+                                                  flush_interval=flush_interval, durability=durability)
+            elif storage == 'sql':
+                # Imported here so processes without SQL storage never load SQLAlchemy
+                from sql_trade_store import SQLTradeStore, SQLTradeWriter
+                self.sql_store = SQLTradeStore(database_url) if database_url else SQLTradeStore()
+                self._writer = SQLTradeWriter(self.sql_store, self.run_id, batch_size=batch_size,
+                                              flush_interval=flush_interval, durability=durability)
+            else:
+                self._writer = BufferedCSVWriter(self.log_file, self.csv_headers, batch_size=batch_size,
+                                                 flush_interval=flush_interval, durability=durability)
+        except Exception as e:
+            logging.error(f"Error opening trade log for writing: {e}")
+            self._writer = None
+        
+    def _init_csv_file(self, exclusive: bool = False):
+        """
+        Initialize CSV file with headers
+        
+        Args:
+            exclusive: Create the file, raising FileExistsError rather than truncating another run's log
+        """
+        try:
+            with open(self.log_file, 'x' if exclusive else 'w', newline='') as csvfile:
                 writer = csv.DictWriter(csvfile, fieldnames=self.csv_headers)
                 writer.writeheader()
             logging.info(f"Initialized CSV log file: {self.log_file}")
+        except FileExistsError:
+            raise
         except Exception as e:
             logging.error(f"Error initializing CSV file: {e}")
     
     def log_trade(self, trade_data: Dict[str, Any]):
-        """Log a single trade to memory and CSV"""
+        """Log a single trade to memory and the trade log"""
+        started = perf_counter()
         try:
             # Add to memory
-            self.trades_data.append(trade_data.copy())
+            with self.data_lock:
+                self.trade_store.append(trade_data)
+                self._update_time_series(trade_data)
+                with self._aggregates_lock:
+                    self._aggregates.add(trade_data)
+                    self.data_version += 1
             
-            # Write to CSV
-            with open(self.log_file, 'a', newline='') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=self.csv_headers)
-                
-                # Prepare row data
-                row_data = {
-                    'timestamp': trade_data['timestamp'].isoformat(),
-                    'bot_type': trade_data['bot_type'],
-                    'trade_direction': trade_data.get('trade_direction', 'SOL_TO_USDC'),
-                    'input_amount': trade_data.get('input_amount', 0),
-                    'input_symbol': trade_data.get('input_symbol', 'SOL'),
-                    'output_received': trade_data.get('output_received', 0),
-                    'output_symbol': trade_data.get('output_symbol', 'USDC'),
-                    'expected_output': trade_data.get('expected_output', 0),
-                    'slippage_percent': trade_data.get('slippage_percent', 0),
-                    'price': trade_data.get('price', 0),
-                    'success': trade_data.get('success', False)
-                }
-                
-                writer.writerow(row_data)
+            # Queue the row; the writer thread does the file I/O off the trade path
+            row_data = {
+                'timestamp': trade_data['timestamp'].isoformat(),
+                'bot_type': trade_data['bot_type'],
+                'trade_direction': trade_data.get('trade_direction', 'SOL_TO_USDC'),
+                'input_amount': trade_data.get('input_amount', 0),
+                'input_symbol': trade_data.get('input_symbol', 'SOL'),
+                'output_received': trade_data.get('output_received', 0),
+                'output_symbol': trade_data.get('output_symbol', 'USDC'),
+                'expected_output': trade_data.get('expected_output', 0),
+                'slippage_percent': trade_data.get('slippage_percent', 0),
+                'price': trade_data.get('price', 0),
+                'success': trade_data.get('success', False)
+            }
+            
+            if self._writer is None:
+                raise RuntimeError(f"Trade log for run {self.run_id} is not writable")
+            self._writer.write(row_data)
             
             logging.debug(f"Logged trade: {trade_data['bot_type']} - {trade_data.get('input_amount', 0)} {trade_data.get('input_symbol', 'INPUT')}")
+            LOG_TRADE_SECONDS.labels(row_data['bot_type'], row_data['trade_direction']).observe(perf_counter() - started)
             
         except Exception as e:
             logging.error(f"Error logging trade: {e}")
     
-    def get_trades_dataframe(self) -> pd.DataFrame:
-        """Get all trades as pandas DataFrame"""
-        try:
-            if not self.trades_data:
-                return pd.DataFrame()
+    def flush(self, timeout: float = None) -> bool:
+        """Block until every logged trade has been written to the trade log"""
+        return self._writer.flush(timeout) if self._writer else True
+    
+    def close(self):
+        """Write any queued trades and stop the background writer"""
+        if self._writer:
+            self._writer.close()
+    
+    def get_writer_metrics(self) -> Dict[str, Any]:
+        """Queue depth and write latency of the trade log writer"""
+        return self._writer.get_metrics() if self._writer else {}
+    
+    def _update_time_series(self, trade_data: Dict[str, Any]):
+        """Extend the cumulative output series with one trade"""
+        if not trade_data.get('success', False):
+            return
+        
+        with self._series_lock:
+            bot_type = trade_data['bot_type']
+            if bot_type == 'TWAPBot':
+                self._twap_total += trade_data.get('output_received', 0)
+            elif bot_type == 'SmartBot':
+                self._smart_total += trade_data.get('output_received', 0)
             
-            df = pd.DataFrame(self.trades_data)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            return df
+            # Bot threads can log a few microseconds out of order; clamp such trades to the
+            # latest timestamp so the series stays sorted and strictly append-only
+            timestamp = trade_data['timestamp']
+            if self._series_last_timestamp is None or timestamp > self._series_last_timestamp:
+                self._series_last_timestamp = timestamp
+            self._series_timestamps.append(self._series_last_timestamp.isoformat())
+            self._series_twap.append(float(self._twap_total))
+            self._series_smart.append(float(self._smart_total))
+    
+    @property
+    def trades_data(self) -> List[Dict[str, Any]]:
+        """All trades as a list of dicts (materialized on each access; prefer trade_store)"""
+        return self.trade_store.rows()
+    
+    def get_trades_dataframe(self, rows: Optional[int] = None) -> 'pd.DataFrame':
+        """
+        Get all trades as pandas DataFrame
+        
+        Args:
+            rows: Only the first `rows` trades (see get_read_marks)
+        """
+        import pandas as pd  # Deferred: only analytics and charts need it
+        try:
+            return self.trade_store.to_dataframe(rows)
             
         except Exception as e:
             logging.error(f"Error creating trades DataFrame: {e}")
             return pd.DataFrame()
     
     def get_summary_stats(self) -> Dict[str, Any]:
-        """Generate summary statistics"""
+        """
+        Generate summary statistics from the running aggregates
+        
+        With SQL storage they are aggregated by the database instead, so any worker sharing
+        it sees the same figures (trades still queued for the writer are not yet included).
+        """
         try:
-            df = self.get_trades_dataframe()
-            
-            if df.empty:
-                return {
-                    'total_trades': 0,
-                    'twap_trades': 0,
-                    'smart_trades': 0,
-                    'total_input_traded': 0,
-                    'total_output_received': 0,
-                    'average_slippage': 0,
-                    'success_rate': 0,
-                    'twap_stats': {
-                        'total_trades': 0,
-                        'total_input': 0,
-                        'total_output': 0,
-                        'avg_slippage': 0,
-                        'avg_price': 0
-                    },
-                    'smart_stats': {
-                        'total_trades': 0,
-                        'total_input': 0,
-                        'total_output': 0,
-                        'avg_slippage': 0,
-                        'avg_price': 0
-                    }
-                }
-            
-            # Filter successful trades
-            successful_df = df[df['success'] == True]
-            
-            # Calculate statistics by bot type
-            twap_df = successful_df[successful_df['bot_type'] == 'TWAPBot']
-            smart_df = successful_df[successful_df['bot_type'] == 'SmartBot']
-            
-            stats = {
-                'total_trades': len(df),
-                'successful_trades': len(successful_df),
-                'twap_trades': len(twap_df),
-                'smart_trades': len(smart_df),
-                'total_input_traded': float(successful_df['input_amount'].sum()),
-                'total_output_received': float(successful_df['output_received'].sum()),
-                'average_slippage': float(successful_df['slippage_percent'].mean()) if len(successful_df) > 0 else 0,
-                'success_rate': float(len(successful_df) / len(df) * 100) if len(df) > 0 else 0,
-                'twap_stats': {
-                    'total_trades': len(twap_df),
-                    'total_input': float(twap_df['input_amount'].sum()) if len(twap_df) > 0 else 0,
-                    'total_output': float(twap_df['output_received'].sum()) if len(twap_df) > 0 else 0,
-                    'avg_slippage': float(twap_df['slippage_percent'].mean()) if len(twap_df) > 0 else 0,
-                    'avg_price': float(twap_df['price'].mean()) if len(twap_df) > 0 else 0
-                },
-                'smart_stats': {
-                    'total_trades': len(smart_df),
-                    'total_input': float(smart_df['input_amount'].sum()) if len(smart_df) > 0 else 0,
-                    'total_output': float(smart_df['output_received'].sum()) if len(smart_df) > 0 else 0,
-                    'avg_slippage': float(smart_df['slippage_percent'].mean()) if len(smart_df) > 0 else 0,
-                    'avg_price': float(smart_df['price'].mean()) if len(smart_df) > 0 else 0
-                }
-            }
-            
-            return stats
+            if self.sql_store is not None:
+                return self.sql_store.get_summary_stats(self.run_id)
+            with self._aggregates_lock:
+                return self._aggregates.summary()
             
         except Exception as e:
             logging.error(f"Error calculating summary stats: {e}")
             return {}
     
-    def get_time_series_data(self) -> Dict[str, List]:
-        """Get time series data for charting"""
-        try:
-            df = self.get_trades_dataframe()
-            
-            if df.empty:
-                return {'timestamps': [], 'twap_cumulative': [], 'smart_cumulative': []}
-            
-            # Filter successful trades
-            successful_df = df[df['success'] == True]
-            
-            # Sort by timestamp
-            successful_df = successful_df.sort_values('timestamp')
-            
-            # Calculate cumulative output by bot type
-            twap_df = successful_df[successful_df['bot_type'] == 'TWAPBot'].copy()
-            smart_df = successful_df[successful_df['bot_type'] == 'SmartBot'].copy()
-            
-            # Create time series
-            all_timestamps = successful_df['timestamp'].unique()
-            all_timestamps = sorted(all_timestamps)
-            
-            twap_cumulative = []
-            smart_cumulative = []
-            twap_total = 0
-            smart_total = 0
-            
-            for timestamp in all_timestamps:
-                # Add TWAP trades up to this timestamp
-                twap_trades = twap_df[twap_df['timestamp'] <= timestamp]
-                if not twap_trades.empty:
-                    twap_total = twap_trades['output_received'].sum()
-                
-                # Add Smart trades up to this timestamp
-                smart_trades = smart_df[smart_df['timestamp'] <= timestamp]
-                if not smart_trades.empty:
-                    smart_total = smart_trades['output_received'].sum()
-                
-                twap_cumulative.append(float(twap_total))
-                smart_cumulative.append(float(smart_total))
-            
+    def get_aggregates(self) -> TradeAggregates:
+        """Snapshot of the running aggregates, e.g. to merge across runs or shards"""
+        with self._aggregates_lock:
+            return self._aggregates.copy()
+    
+    def get_time_series_data(self, since: int = 0, until: Optional[int] = None) -> Dict[str, List]:
+        """
+        Get time series data for charting
+        
+        Args:
+            since: Only return points from this index on; pass the previous next_index
+                   for incremental live-chart updates
+            until: Stop before this index (see get_read_marks)
+        
+        One point is recorded per successful trade, so trades sharing a timestamp
+        appear as consecutive points with the same time. With SQL storage the running
+        totals are computed by window functions in the database.
+        """
+        if self.sql_store is not None:
+            try:
+                return self.sql_store.get_time_series_data(self.run_id, since, until)
+            except Exception as e:
+                logging.error(f"Error querying time series data: {e}")
+                return {'timestamps': [], 'twap_cumulative': [], 'smart_cumulative': [], 'next_index': since}
+        
+        with self._series_lock:
+            end = len(self._series_timestamps) if until is None else max(0, min(until, len(self._series_timestamps)))
+            since = max(0, min(since, end))
             return {
-                'timestamps': [ts.isoformat() for ts in all_timestamps],
-                'twap_cumulative': twap_cumulative,
-                'smart_cumulative': smart_cumulative
+                'timestamps': self._series_timestamps[since:end],
+                'twap_cumulative': self._series_twap[since:end],
+                'smart_cumulative': self._series_smart[since:end],
+                'next_index': end
             }
-            
-        except Exception as e:
-            logging.error(f"Error getting time series data: {e}")
-            return {'timestamps': [], 'twap_cumulative': [], 'smart_cumulative': []}
+    
+    def get_read_marks(self) -> Dict[str, Any]:
+        """
+        How far the in-memory data reaches right now, to read one consistent version later
+        
+        Call it under data_lock together with data_version; the data_lock can then be released
+        before the expensive reads: get_trades_dataframe(rows=...) and
+        get_time_series_data(until=...) return exactly the trades of that version, and
+        'aggregates' (None with SQL storage) is a copy of the running aggregates.
+        """
+        with self._series_lock:
+            series_points = len(self._series_timestamps)
+        return {
+            'rows': len(self.trade_store),
+            'series_points': series_points,
+            'aggregates': self.get_aggregates() if self.sql_store is None else None
+        }
+    
+    def get_bot_series(self, kind: str) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Per-bot series over successful trades, read straight from the columnar store
+        
+        Args:
+            kind: 'cumulative' (running output received), 'slippage' or 'price'
+        
+        Returns:
+            {bot_type: {'t': epoch milliseconds, 'y': values}} with non-decreasing t
+        """
+        column = SERIES_COLUMNS[kind]
+        store = self.trade_store
+        n = len(store)  # Columns may grow while we read; slice them all to the same length
+        timestamps = store.column('timestamp')[:n].view(np.int64) // 1000
+        values = store.column(column)[:n]
+        success = store.column('success')[:n]
+        bot_codes = store.column('bot_type')[:n]
+        
+        series = {}
+        for code, bot_type in enumerate(store.categories('bot_type')):
+            mask = success & (bot_codes == code)
+            t = timestamps[mask].astype(np.float64)
+            # Each bot logs from a single thread; clamp in case the wall clock stepped back
+            np.maximum.accumulate(t, out=t)
+            y = np.cumsum(values[mask]) if kind == 'cumulative' else values[mask]
+            series[bot_type] = {'t': t, 'y': y}
+        return series
     
     def export_to_csv(self, filename: str = None) -> str:
         """Export all data to CSV file"""
@@ -224,15 +342,9 @@ class DataLogger:
     def get_recent_trades(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get most recent trades"""
         try:
-            if not self.trades_data:
-                return []
-            
-            # Sort by timestamp (most recent first)
-            sorted_trades = sorted(self.trades_data, 
-                                 key=lambda x: x['timestamp'], 
-                                 reverse=True)
-            
-            return sorted_trades[:limit]
+            if self.sql_store is not None:
+                return self.sql_store.get_recent_trades(self.run_id, limit)
+            return self.trade_store.most_recent(limit)
             
         except Exception as e:
             logging.error(f"Error getting recent trades: {e}")
@@ -0,0 +1,87 @@
+import numpy as np
+from typing import Optional
+
+DOWNSAMPLING_METHODS = ('lttb', 'minmax')
+
+
+def time_range_slice(x: np.ndarray, start: Optional[float] = None, end: Optional[float] = None) -> slice:
+    """Index range of a sorted x array falling inside [start, end]"""
+    lo = 0 if start is None else int(np.searchsorted(x, start, side='left'))
+    hi = len(x) if end is None else int(np.searchsorted(x, end, side='right'))
+    return slice(lo, max(lo, hi))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: pick `threshold` points that preserve the visual shape
+
+    Keeps the first and last points; every bucket in between contributes the point forming
+    the largest triangle with the previously selected point and the next bucket's mean.
+    Python-level work is one iteration per output point, so cost stays bounded by threshold
+    plus a vectorized pass over the input.
+
+    Returns:
+        Sorted indices into x/y
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3")
+
+    x = x.astype(np.float64, copy=False)
+    y = y.astype(np.float64, copy=False)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)  # threshold - 2 inner buckets
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Mean of the following bucket (the last point for the final bucket)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        bucket_x = x[lo:hi]
+        bucket_y = y[lo:hi]
+        areas = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Min/max decimation: keep the lowest and highest point of each bucket
+
+    Preserves spikes exactly (useful for slippage), at up to `threshold` points.
+
+    Returns:
+        Sorted indices into x/y
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    buckets = max(1, threshold // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+
+    selected = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        bucket = y[lo:hi]
+        selected.append(lo + int(np.argmin(bucket)))
+        selected.append(lo + int(np.argmax(bucket)))
+    return np.unique(np.array(selected, dtype=np.int64))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, method: str = 'lttb') -> np.ndarray:
+    """Indices of at most max_points points chosen with the given method"""
+    if method == 'lttb':
+        return lttb_indices(x, y, max_points)
+    if method == 'minmax':
+        return minmax_indices(x, y, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
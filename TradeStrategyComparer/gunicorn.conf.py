@@ -0,0 +1,7 @@
+# Loaded automatically by gunicorn when started from this directory
+
+
+def post_worker_init(worker):
+    """Install the opt-in SIGUSR2 profiler in each worker, after gunicorn has reset the worker's signal handlers"""
+    from app import install_profile_signal_handler
+    install_profile_signal_handler()
@@ -0,0 +1,334 @@
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from running_stats import BotAggregates, RunningStats, TradeAggregates
+from trade_storage import (CSV_LOG_PATTERN, DEFAULT_STORE_ROOT, LEGACY_COLUMNS, open_parquet_file, parquet_available,
+                           run_id_for_csv)
+from trade_store import CATEGORICAL_COLUMNS, COLUMN_DEFAULTS, COLUMN_ORDER, NUMERIC_COLUMNS
+
+CATALOG_CACHE_FILE = 'data/.history_catalog.json'
+CATALOG_CACHE_VERSION = 1
+DEFAULT_MEMORY_BUDGET = int(os.environ.get('HISTORY_MEMORY_BUDGET_MB', 256)) * 1024 * 1024
+DEFAULT_CHUNK_ROWS = 65536
+# Rough in-memory size of one trade row as a DataFrame (numeric columns plus category codes)
+ROW_BYTES = 64
+
+# Columns every read needs to apply query filters
+FILTER_COLUMNS = ('timestamp', 'bot_type', 'trade_direction')
+
+
+class HistoryBudgetError(Exception):
+    """Raised when a query's result would not fit in the catalog's memory budget"""
+
+
+def _running_stats(values: np.ndarray) -> RunningStats:
+    if len(values) == 0:
+        return RunningStats()
+    total = float(values.sum())
+    mean = total / len(values)
+    return RunningStats.from_moments(len(values), total, float(((values - mean) ** 2).sum()),
+                                     float(values.min()), float(values.max()))
+
+
+def _bot_aggregates(frame: pd.DataFrame) -> BotAggregates:
+    aggregates = BotAggregates()
+    aggregates.total_input = float(frame['input_amount'].sum())
+    aggregates.total_output = float(frame['output_received'].sum())
+    aggregates.slippage = _running_stats(frame['slippage_percent'].to_numpy(dtype=np.float64))
+    aggregates.price = _running_stats(frame['price'].to_numpy(dtype=np.float64))
+    return aggregates
+
+
+def frame_aggregates(frame: pd.DataFrame) -> TradeAggregates:
+    """TradeAggregates over a chunk of trades, computed column-wise"""
+    aggregates = TradeAggregates()
+    aggregates.total_trades = len(frame)
+    successful = frame[frame['success'].to_numpy(dtype=bool)]
+    aggregates.overall = _bot_aggregates(successful)
+    for bot_type, group in successful.groupby('bot_type', observed=True):
+        aggregates.by_bot[str(bot_type)] = _bot_aggregates(group)
+    return aggregates
+
+
+def _normalize_csv_chunk(chunk: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Bring a CSV chunk of either schema to the Parquet store's column types"""
+    chunk = chunk.rename(columns=LEGACY_COLUMNS)
+    for name in columns:
+        if name == 'timestamp':
+            chunk[name] = pd.to_datetime(chunk[name], format='ISO8601')
+        elif name == 'success':
+            if chunk[name].dtype != bool:
+                chunk[name] = chunk[name].astype(str) == 'True'
+        elif name in NUMERIC_COLUMNS:
+            chunk[name] = pd.to_numeric(chunk[name], errors='coerce').fillna(0.0) if name in chunk else 0.0
+        elif name in CATEGORICAL_COLUMNS:
+            values = chunk[name].fillna(COLUMN_DEFAULTS.get(name, '')) if name in chunk else COLUMN_DEFAULTS.get(name, '')
+            chunk[name] = pd.Series(values, index=chunk.index).astype('category')
+    return chunk[columns]
+
+
+class HistoryCatalog:
+    """
+    Index of every recorded run, queried lazily by time range, bot type and direction
+
+    Sources are the CSV trade logs and the partitioned Parquet store (a run migrated to the
+    store is read from there). Each file is summarized once -- time range, row count, bots,
+    directions and trade aggregates -- and the summaries are cached on disk keyed by size
+    and mtime, so later scans only stat the files. Queries skip files whose summary rules
+    them out, read the rest in bounded chunks (memory-mapped row groups for Parquet,
+    streamed for CSV), and answer aggregates for files wholly inside the query from the
+    cached summary without reading them at all.
+    """
+
+    def __init__(self, csv_pattern: str = CSV_LOG_PATTERN, store_root: str = DEFAULT_STORE_ROOT,
+                 cache_file: Optional[str] = CATALOG_CACHE_FILE, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        Args:
+            csv_pattern: Glob for recorded CSV logs
+            store_root: Parquet store root (ignored when pyarrow is not installed)
+            cache_file: Where file summaries are cached; None keeps them in memory only
+            memory_budget: Bytes a query may hold at once; chunks are sized to stay well within it
+                           and load() refuses results that would exceed it
+            chunk_rows: Upper bound on rows per chunk
+        """
+        self.csv_pattern = csv_pattern
+        self.store_root = store_root
+        self.cache_file = cache_file
+        self.memory_budget = memory_budget
+        self.chunk_rows = max(1, min(chunk_rows, memory_budget // (4 * ROW_BYTES)))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+            if cache.get('version') == CATALOG_CACHE_VERSION:
+                return cache['files']
+        except Exception as e:
+            logging.error(f"Error reading history catalog cache {self.cache_file}: {e}")
+        return {}
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            temp_path = f"{self.cache_file}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'version': CATALOG_CACHE_VERSION, 'files': self._entries}, f)
+            os.replace(temp_path, self.cache_file)
+        except Exception as e:
+            logging.error(f"Error writing history catalog cache {self.cache_file}: {e}")
+
+    def _sources(self) -> List[Dict[str, str]]:
+        sources = []
+        if parquet_available() and os.path.isdir(self.store_root):
+            for path in sorted(glob.glob(os.path.join(self.store_root, 'date=*', 'run=*', '*.parquet'))):
+                run_id = os.path.basename(os.path.dirname(path))[len('run='):]
+                sources.append({'path': path, 'format': 'parquet', 'run': run_id})
+        migrated = {source['run'] for source in sources}
+        for path in sorted(glob.glob(self.csv_pattern)):
+            run_id = run_id_for_csv(path)
+            if run_id not in migrated:
+                sources.append({'path': path, 'format': 'csv', 'run': run_id})
+        return sources
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Pick up new, changed and deleted files; only those are (re)summarized"""
+        with self._lock:
+            entries = {}
+            changed = False
+            for source in self._sources():
+                path = source['path']
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                cached = self._entries.get(path)
+                if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                    entries[path] = cached
+                    continue
+                try:
+                    entries[path] = self._summarize(dict(source, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+                except Exception as e:
+                    # e.g. the Parquet file of a run still being written (no footer yet)
+                    logging.debug(f"Skipping unreadable history file {path}: {e}")
+                    continue
+                changed = True
+
+            if changed or entries.keys() != self._entries.keys():
+                self._entries = entries
+                self._save_cache()
+            return list(entries.values())
+
+    def _summarize(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        rows = 0
+        start = end = None
+        bot_types, directions = set(), set()
+        aggregates = TradeAggregates()
+        for chunk in self._read_chunks(entry, COLUMN_ORDER):
+            if chunk.empty:
+                continue
+            rows += len(chunk)
+            chunk_start, chunk_end = chunk['timestamp'].min(), chunk['timestamp'].max()
+            start = chunk_start if start is None else min(start, chunk_start)
+            end = chunk_end if end is None else max(end, chunk_end)
+            bot_types.update(str(value) for value in chunk['bot_type'].unique())
+            directions.update(str(value) for value in chunk['trade_direction'].unique())
+            aggregates.merge(frame_aggregates(chunk))
+
+        entry.update({
+            'rows': rows,
+            'start': start.isoformat() if start is not None else None,
+            'end': end.isoformat() if end is not None else None,
+            'bot_types': sorted(bot_types),
+            'directions': sorted(directions),
+            'aggregates': aggregates.to_dict()
+        })
+        return entry
+
+    def _read_chunks(self, entry: Dict[str, Any], columns: List[str], start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Iterator[pd.DataFrame]:
+        """Stream one file as DataFrame chunks of at most chunk_rows rows"""
+        if entry['format'] == 'parquet':
+            parquet_file = open_parquet_file(entry['path'])
+            timestamp_index = parquet_file.schema_arrow.get_field_index('timestamp')
+            row_groups = []
+            for i in range(parquet_file.num_row_groups):
+                # Row-group min/max statistics let whole groups outside the range be skipped unread
+                statistics = parquet_file.metadata.row_group(i).column(timestamp_index).statistics
+                if statistics is not None and statistics.has_min_max:
+                    if (start is not None and statistics.max < start) or (end is not None and statistics.min > end):
+                        continue
+                row_groups.append(i)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_rows, row_groups=row_groups, columns=columns):
+                yield batch.to_pandas()
+        else:
+            with open(entry['path'], newline='') as f:
+                header = f.readline().strip().split(',')
+            available = [name for name in header if LEGACY_COLUMNS.get(name, name) in columns]
+            if not available:
+                return
+            for chunk in pd.read_csv(entry['path'], usecols=available, chunksize=self.chunk_rows):
+                yield _normalize_csv_chunk(chunk, columns)
+
+    def runs(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             bot_types: Optional[List[str]] = None, directions: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Summaries of the files that may hold matching trades, oldest first
+
+        Answered from the catalog alone; no trade data is read. A run spanning midnight in
+        the Parquet store has one entry per date partition.
+        """
+        matches = []
+        for entry in self.refresh():
+            if not entry['rows']:
+                continue
+            if start is not None and datetime.fromisoformat(entry['end']) < start:
+                continue
+            if end is not None and datetime.fromisoformat(entry['start']) > end:
+                continue
+            if bot_types is not None and not set(bot_types) & set(entry['bot_types']):
+                continue
+            if directions is not None and not set(directions) & set(entry['directions']):
+                continue
+            matches.append(entry)
+        matches.sort(key=lambda entry: entry['start'])
+        return matches
+
+    def scan(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             bot_types: Optional[List[str]] = None, directions: Optional[List[str]] = None,
+             columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream matching trades as DataFrame chunks, with a 'run' column
+
+        Only one chunk is held at a time, so a scan over any amount of history stays within
+        the memory budget as long as the caller does not keep the chunks.
+        """
+        columns = list(columns) if columns else list(COLUMN_ORDER)
+        for entry in self.runs(start, end, bot_types, directions):
+            for chunk in self._scan_entry(entry, columns, start, end, bot_types, directions):
+                chunk['run'] = entry['run']
+                yield chunk
+
+    def _scan_entry(self, entry: Dict[str, Any], columns: List[str], start: Optional[datetime],
+                    end: Optional[datetime], bot_types: Optional[List[str]],
+                    directions: Optional[List[str]]) -> Iterator[pd.DataFrame]:
+        """Rows of one file matching the query, projected to columns"""
+        read_columns = columns + [name for name in FILTER_COLUMNS if name not in columns]
+        for chunk in self._read_chunks(entry, read_columns, start, end):
+            mask = np.ones(len(chunk), dtype=bool)
+            if start is not None:
+                mask &= (chunk['timestamp'] >= start).to_numpy()
+            if end is not None:
+                mask &= (chunk['timestamp'] <= end).to_numpy()
+            if bot_types is not None:
+                mask &= chunk['bot_type'].isin(bot_types).to_numpy()
+            if directions is not None:
+                mask &= chunk['trade_direction'].isin(directions).to_numpy()
+            if mask.any():
+                yield chunk.loc[mask, columns]
+
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             bot_types: Optional[List[str]] = None, directions: Optional[List[str]] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Matching trades as one DataFrame
+
+        Raises:
+            HistoryBudgetError: If the result would exceed the memory budget; narrow the query,
+                                request fewer columns, or use scan()/aggregate() instead
+        """
+        chunks = []
+        used = 0
+        for chunk in self.scan(start, end, bot_types, directions, columns):
+            used += int(chunk.memory_usage(deep=True).sum())
+            if used > self.memory_budget:
+                raise HistoryBudgetError(
+                    f"History query exceeds the {self.memory_budget // (1024 * 1024)} MB memory budget"
+                )
+            chunks.append(chunk)
+        if not chunks:
+            return pd.DataFrame(columns=(list(columns) if columns else list(COLUMN_ORDER)) + ['run'])
+        return pd.concat(chunks, ignore_index=True)
+
+    def aggregate(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  bot_types: Optional[List[str]] = None, directions: Optional[List[str]] = None,
+                  by_run: bool = False):
+        """
+        Trade aggregates over matching history, in constant memory
+
+        Files wholly inside the query are answered from their cached summaries; only files
+        cut by the time range or filters are scanned.
+
+        Returns:
+            TradeAggregates, or {run_id: TradeAggregates} with by_run
+        """
+        results: Dict[str, TradeAggregates] = {}
+        for entry in self.runs(start, end, bot_types, directions):
+            aggregates = results.setdefault(entry['run'] if by_run else '', TradeAggregates())
+            covered = ((start is None or datetime.fromisoformat(entry['start']) >= start)
+                       and (end is None or datetime.fromisoformat(entry['end']) <= end)
+                       and (bot_types is None or set(entry['bot_types']) <= set(bot_types))
+                       and (directions is None or set(entry['directions']) <= set(directions)))
+            if covered:
+                aggregates.merge(TradeAggregates.from_dict(entry['aggregates']))
+                continue
+            for chunk in self._scan_entry(entry, list(COLUMN_ORDER), start, end, bot_types, directions):
+                aggregates.merge(frame_aggregates(chunk))
+
+        if by_run:
+            return results
+        return results.get('', TradeAggregates())
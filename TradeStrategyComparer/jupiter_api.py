@@ -2,50 +2,229 @@ import requests
 import logging
 import os
 from typing import Dict, Any, Optional
-import time
 import random
+import threading
+from collections import OrderedDict
+from time import perf_counter
+from clock import WALL_CLOCK
+from metrics import QUOTE_HTTP_SECONDS, QUOTES
+from rate_limiter import TokenBucketRateLimiter, PRIORITY_NORMAL
+
+# Point at a local stand-in (jupiter_stub_server.py) with JUPITER_API_URL for offline load tests
+DEFAULT_BASE_URL = os.environ.get('JUPITER_API_URL') or "https://quote-api.jup.ag/v6"
+SOL_MINT = 'So11111111111111111111111111111111111111112'
+
+def quote_direction(input_mint: str) -> str:
+    """Trade direction of a quote, as used in metric labels"""
+    return 'SOL_TO_USDC' if input_mint == SOL_MINT else 'USDC_TO_SOL'
+
+def process_quote_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Add calculated fields to a raw Jupiter quote response"""
+    input_amount = int(data.get('inAmount', 0))
+    output_amount = int(data.get('outAmount', 0))
+    
+    # Calculate price (USDC per SOL)
+    if input_amount > 0:
+        price = (output_amount / 1e6) / (input_amount / 1e9)  # Convert units
+        data['price'] = price
+        logging.debug(f"Jupiter quote: {input_amount/1e9:.4f} SOL -> {output_amount/1e6:.2f} USDC (price: ${price:.2f})")
+    
+    # Calculate impact and slippage estimates
+    data['priceImpactPct'] = float(data.get('priceImpactPct', 0))
+    
+    return data
+
+def generate_fallback_quote(input_mint: str, output_mint: str, amount: int, rng=None) -> Dict[str, Any]:
+    """
+    Generate a realistic fallback quote when API is unavailable
+    This simulates current SOL/USDC market conditions
+    
+    Args:
+        rng: random.Random to draw market noise from (default: the global random module)
+    """
+    rng = rng if rng is not None else random
+    try:
+        # Simulate SOL price between $150-$200 with some volatility
+        base_price = 175.0 + rng.uniform(-25, 25)
+        
+        # Add some market volatility
+        volatility = rng.uniform(-0.02, 0.02)  # ±2% volatility
+        current_price = base_price * (1 + volatility)
+        
+        # Calculate output amount
+        input_sol = amount / 1e9  # Convert lamports to SOL
+        output_usdc = input_sol * current_price
+        output_amount = int(output_usdc * 1e6)  # Convert to micro USDC
+        
+        # Simulate price impact (higher for larger trades)
+        trade_size_usd = input_sol * current_price
+        if trade_size_usd > 10000:
+            price_impact = 0.1 + (trade_size_usd - 10000) / 100000 * 0.1
+        elif trade_size_usd > 1000:
+            price_impact = 0.05 + (trade_size_usd - 1000) / 10000 * 0.05
+        else:
+            price_impact = 0.01 + trade_size_usd / 1000 * 0.04
+        
+        price_impact = min(price_impact, 0.5)  # Cap at 0.5%
+        
+        logging.debug(f"Fallback quote: {input_sol:.4f} SOL -> {output_usdc:.2f} USDC (${current_price:.2f}/SOL)")
+        
+        return {
+            'inputMint': input_mint,
+            'inAmount': str(amount),
+            'outputMint': output_mint,
+            'outAmount': str(output_amount),
+            'price': current_price,
+            'priceImpactPct': price_impact,
+            'slippageBps': 50,
+            'otherAmountThreshold': str(int(output_amount * 0.995)),  # 0.5% slippage
+            'swapMode': 'ExactIn',
+            'timeTaken': rng.uniform(0.1, 0.5),
+            'fallback': True
+        }
+        
+    except Exception as e:
+        logging.error(f"Error generating fallback quote: {e}")
+        return None
 
 class JupiterAPI:
     """Jupiter API client for getting SOL/USDC quotes"""
     
-    def __init__(self):
-        self.base_url = "https://quote-api.jup.ag/v6"
+    def __init__(self, cache_ttl: float = 2.0, cache_size: int = 256,
+                 requests_per_second: float = 1.0, burst: int = 1, clock=None, rng=None, offline: bool = False,
+                 base_url: str = None, timeout: float = 10, pool_size: int = 10):
+        """
+        Args:
+            cache_ttl: Seconds a quote stays fresh; 0 disables caching
+            cache_size: Maximum cached quotes
+            requests_per_second: Sustained request rate shared by every caller
+            burst: Requests allowed back to back after an idle period
+            clock: Clock for cache expiry (default: wall clock)
+            rng: random.Random for fallback quotes (default: the global random module)
+            offline: Never call the API; serve fallback quotes only (for seeded, virtual-time runs)
+            base_url: Quote API root (default: JUPITER_API_URL, else https://quote-api.jup.ag/v6)
+            timeout: Seconds to wait for a quote response before falling back
+            pool_size: Keep-alive connections kept for concurrent callers
+        """
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.timeout = timeout
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.rng = rng
+        self.offline = offline
         self.session = requests.Session()
         self.session.headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'TWAP-Smart-Bot/1.0'
         })
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
-        # Cache for rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 1  # Minimum 1 second between requests
+        # Rate limiting shared by every bot using this client (default: 1 request per second)
+        self.rate_limiter = TokenBucketRateLimiter(requests_per_second, burst)
         
-    def _rate_limit(self):
-        """Implement basic rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+        # Quote cache shared by every bot using this client
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._quote_cache = OrderedDict()  # key -> (expires_at, quote), oldest first
+        self._inflight = {}  # key -> [Event, quote, priority] for requests currently on the wire
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
         
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+    def _rate_limit(self, priority: int = PRIORITY_NORMAL):
+        """Wait for a rate limiter token; higher priority callers are served first"""
+        self.rate_limiter.acquire(priority)
     
-    def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50) -> Optional[Dict[str, Any]]:
+    def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                  priority: int = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
         """
         Get a quote from Jupiter API
         
+        Identical requests within cache_ttl seconds are served from the cache, and
+        concurrent identical requests share a single HTTP call unless the later caller has
+        a higher priority, which would otherwise wait in the first caller's lane.
+        
         Args:
             input_mint: Input token mint address (SOL: So11111111111111111111111111111111111111112)
             output_mint: Output token mint address (USDC: EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v)
             amount: Amount in smallest unit (lamports for SOL, micro USDC for USDC)
             slippage_bps: Slippage tolerance in basis points (50 = 0.5%)
+            priority: Rate limiter lane (rate_limiter.PRIORITY_*) used if a request is needed
             
         Returns:
             Quote data or None if failed
         """
+        if self.cache_ttl <= 0:
+            return self._fetch_quote(input_mint, output_mint, amount, slippage_bps, priority)
+        
+        key = (input_mint, output_mint, int(amount), int(slippage_bps))
+        
+        with self._cache_lock:
+            cached = self._quote_cache.get(key)
+            if cached is not None:
+                if cached[0] > self.clock.monotonic():
+                    self._quote_cache.move_to_end(key)
+                    self.cache_stats['hits'] += 1
+                    QUOTES.labels(quote_direction(input_mint), 'cache').inc()
+                    return dict(cached[1])
+                del self._quote_cache[key]
+            
+            inflight = self._inflight.get(key)
+            if inflight is None or priority < inflight[2]:
+                # A more urgent caller fetches itself and takes over the slot for later callers;
+                # those already waiting keep waiting on the original request
+                inflight = [threading.Event(), None, priority]
+                self._inflight[key] = inflight
+                owner = True
+                self.cache_stats['misses'] += 1
+            else:
+                owner = False
+                self.cache_stats['coalesced'] += 1
+        
+        if not owner:
+            # Another caller is already fetching this quote; wait for its result
+            inflight[0].wait()
+            QUOTES.labels(quote_direction(input_mint), 'coalesced').inc()
+            return dict(inflight[1]) if inflight[1] else None
+        
+        quote = None
         try:
-            self._rate_limit()
+            quote = self._fetch_quote(input_mint, output_mint, amount, slippage_bps, priority)
+        finally:
+            with self._cache_lock:
+                # Fallback quotes are synthetic, so only real API responses are cached
+                if quote and not quote.get('fallback'):
+                    self._quote_cache[key] = (self.clock.monotonic() + self.cache_ttl, quote)
+                    self._quote_cache.move_to_end(key)
+                    while len(self._quote_cache) > self.cache_size:
+                        self._quote_cache.popitem(last=False)
+                if self._inflight.get(key) is inflight:
+                    del self._inflight[key]
+            inflight[1] = quote
+            inflight[0].set()
+        
+        return dict(quote) if quote else None
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Quote cache counters and rate limiter wait statistics"""
+        with self._cache_lock:
+            cache = dict(self.cache_stats, size=len(self._quote_cache))
+        return {'cache': cache, 'rate_limiter': self.rate_limiter.get_metrics()}
+    
+    def clear_quote_cache(self):
+        """Drop all cached quotes"""
+        with self._cache_lock:
+            self._quote_cache.clear()
+    
+    def _fetch_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                     priority: int = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
+        """Request a quote over HTTP, falling back to a simulated quote on failure"""
+        if self.offline:
+            QUOTES.labels(quote_direction(input_mint), 'fallback').inc()
+            return generate_fallback_quote(input_mint, output_mint, amount, self.rng)
+        
+        try:
+            self._rate_limit(priority)
             
             params = {
                 'inputMint': input_mint,
@@ -56,30 +235,22 @@ class JupiterAPI:
                 'asLegacyTransaction': 'false'
             }
             
-            response = self.session.get(
-                f"{self.base_url}/quote",
-                params=params,
-                timeout=10
-            )
+            direction = quote_direction(input_mint)
+            started = perf_counter()
+            try:
+                response = self.session.get(
+                    f"{self.base_url}/quote",
+                    params=params,
+                    timeout=self.timeout
+                )
+            except requests.exceptions.RequestException:
+                QUOTE_HTTP_SECONDS.labels(direction, 'exception').observe(perf_counter() - started)
+                raise
+            QUOTE_HTTP_SECONDS.labels(direction, str(response.status_code)).observe(perf_counter() - started)
             
             if response.status_code == 200:
-                data = response.json()
-                
-                # Add calculated fields
-                input_amount = int(data.get('inAmount', 0))
-                output_amount = int(data.get('outAmount', 0))
-                
-                # Calculate price (USDC per SOL)
-                if input_amount > 0:
-                    price = (output_amount / 1e6) / (input_amount / 1e9)  # Convert units
-                    data['price'] = price
-                
-                # Calculate impact and slippage estimates
-                data['priceImpactPct'] = float(data.get('priceImpactPct', 0))
-                
-                logging.debug(f"Jupiter quote: {input_amount/1e9:.4f} SOL -> {output_amount/1e6:.2f} USDC (price: ${price:.2f})")
-                
-                return data
+                QUOTES.labels(direction, 'api').inc()
+                return process_quote_response(response.json())
                 
             else:
                 logging.error(f"Jupiter API error: {response.status_code} - {response.text}")
@@ -93,53 +264,12 @@ class JupiterAPI:
             return self._generate_fallback_quote(input_mint, output_mint, amount)
     
     def _generate_fallback_quote(self, input_mint: str, output_mint: str, amount: int) -> Dict[str, Any]:
-        """
-        Generate a realistic fallback quote when API is unavailable
-        This simulates current SOL/USDC market conditions
-        """
-        try:
-            # Simulate SOL price between $150-$200 with some volatility
-            base_price = 175.0 + random.uniform(-25, 25)
-            
-            # Add some market volatility
-            volatility = random.uniform(-0.02, 0.02)  # ±2% volatility
-            current_price = base_price * (1 + volatility)
-            
-            # Calculate output amount
-            input_sol = amount / 1e9  # Convert lamports to SOL
-            output_usdc = input_sol * current_price
-            output_amount = int(output_usdc * 1e6)  # Convert to micro USDC
-            
-            # Simulate price impact (higher for larger trades)
-            trade_size_usd = input_sol * current_price
-            if trade_size_usd > 10000:
-                price_impact = 0.1 + (trade_size_usd - 10000) / 100000 * 0.1
-            elif trade_size_usd > 1000:
-                price_impact = 0.05 + (trade_size_usd - 1000) / 10000 * 0.05
-            else:
-                price_impact = 0.01 + trade_size_usd / 1000 * 0.04
-            
-            price_impact = min(price_impact, 0.5)  # Cap at 0.5%
-            
-            logging.warning(f"Using fallback quote: {input_sol:.4f} SOL -> {output_usdc:.2f} USDC (${current_price:.2f}/SOL)")
-            
-            return {
-                'inputMint': input_mint,
-                'inAmount': str(amount),
-                'outputMint': output_mint,
-                'outAmount': str(output_amount),
-                'price': current_price,
-                'priceImpactPct': price_impact,
-                'slippageBps': 50,
-                'otherAmountThreshold': str(int(output_amount * 0.995)),  # 0.5% slippage
-                'swapMode': 'ExactIn',
-                'timeTaken': random.uniform(0.1, 0.5),
-                'fallback': True
-            }
-            
-        except Exception as e:
-            logging.error(f"Error generating fallback quote: {e}")
-            return None
+        """Generate a realistic fallback quote when API is unavailable"""
+        quote = generate_fallback_quote(input_mint, output_mint, amount, self.rng)
+        QUOTES.labels(quote_direction(input_mint), 'fallback').inc()
+        if quote:
+            logging.warning(f"Using fallback quote at ${quote['price']:.2f}/SOL")
+        return quote
     
     def get_current_price(self, input_mint: str = 'So11111111111111111111111111111111111111112', 
                          output_mint: str = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v') -> Optional[float]:
@@ -0,0 +1,431 @@
+import argparse
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from backtester import DEFAULT_DATA_PATTERN, SOL_MINT, USDC_MINT, load_price_history
+from clock import make_rng
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_PRICE = 175.0
+
+TOKEN_DECIMALS = {SOL_MINT: 9, USDC_MINT: 6}
+# Served by /tokens after the two traded mints, so clients see a realistic list
+OTHER_TOKENS = [
+    'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCLenRVPPV',   # USDT
+    'JUPyiwrYJFskUPiHa7hkeR8VUtAeFoSYbKedZNsDvCN',   # JUP
+    'DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263',  # BONK
+]
+LATENCY_DISTRIBUTIONS = ('constant', 'uniform', 'normal', 'lognormal', 'exponential')
+
+
+def sample_latency(spec: Optional[Dict[str, Any]], rng) -> float:
+    """
+    Seconds to delay a response, drawn from a latency spec given in milliseconds
+
+    Specs: {'distribution': 'constant', 'value': 50}, {'distribution': 'uniform', 'min': 20, 'max': 80},
+    {'distribution': 'normal', 'mean': 50, 'stddev': 10}, {'distribution': 'lognormal', 'median': 50,
+    'sigma': 0.5} (long tail, like real API latency) or {'distribution': 'exponential', 'mean': 50}.
+    An optional 'max' caps any of them.
+    """
+    if not spec:
+        return 0.0
+    distribution = spec.get('distribution', 'constant')
+    if distribution == 'constant':
+        value = spec.get('value', 0.0)
+    elif distribution == 'uniform':
+        value = rng.uniform(spec.get('min', 0.0), spec['max'])
+    elif distribution == 'normal':
+        value = rng.gauss(spec['mean'], spec.get('stddev', 0.0))
+    elif distribution == 'lognormal':
+        value = spec['median'] * math.exp(rng.gauss(0.0, spec.get('sigma', 0.5)))
+    elif distribution == 'exponential':
+        value = rng.expovariate(1.0 / spec['mean']) if spec['mean'] > 0 else 0.0
+    else:
+        raise ValueError(f"Unknown latency distribution: {distribution}")
+    if 'max' in spec:
+        value = min(value, spec['max'])
+    return max(0.0, value) / 1000
+
+
+class PricePath:
+    """
+    SOL/USDC price over server uptime: a recorded path replayed at `speed`x, or a random walk
+
+    Recorded paths loop once they run out, so a load test can run for as long as it needs.
+    """
+
+    def __init__(self, history: Optional[List[Tuple[Any, float]]] = None, speed: float = 1.0,
+                 start_price: float = DEFAULT_PRICE, volatility: float = 0.0005, rng=None):
+        """
+        Args:
+            history: (timestamp, price) tuples, e.g. from backtester.load_price_history()
+            speed: Recorded seconds replayed per second of uptime
+            start_price, volatility: Random walk used without history (volatility per sqrt(second))
+        """
+        self.speed = speed
+        self.volatility = volatility
+        self._rng = rng if rng is not None else make_rng(None, 'PricePath')
+        self._lock = threading.Lock()
+        if history:
+            origin = history[0][0]
+            self._offsets = [(timestamp - origin).total_seconds() for timestamp, _ in history]
+            self._prices = [price for _, price in history]
+            self.span = self._offsets[-1]
+        else:
+            self._offsets = None
+            self._walk_price = start_price
+            self._walk_second = 0
+
+    @property
+    def recorded(self) -> bool:
+        return self._offsets is not None
+
+    def price_at(self, elapsed: float) -> float:
+        """Price after `elapsed` seconds of uptime"""
+        if self._offsets is not None:
+            offset = elapsed * self.speed
+            if self.span > 0:
+                offset %= self.span
+            index = bisect.bisect_right(self._offsets, offset) - 1
+            return self._prices[max(index, 0)]
+
+        # Random walk in one-second steps, advanced lazily by whichever request gets there first
+        with self._lock:
+            second = int(elapsed)
+            while self._walk_second < second:
+                self._walk_price *= math.exp(self._rng.gauss(0.0, self.volatility))
+                self._walk_second += 1
+            return self._walk_price
+
+
+class Phase:
+    """Behavior of the server for part of a scenario; every field defaults to a healthy API"""
+
+    def __init__(self, duration: Optional[float] = None, latency_ms: Optional[Dict[str, Any]] = None,
+                 error_rate: float = 0.0, error_statuses: Optional[List[int]] = None,
+                 throttle_rate: float = 0.0, rate_limit: Optional[float] = None, rate_limit_burst: int = 1,
+                 slow_loris_rate: float = 0.0, slow_loris_seconds: float = 15.0, slow_loris_chunk: int = 16,
+                 name: Optional[str] = None):
+        """
+        Args:
+            duration: Seconds the phase lasts (None: until the scenario ends)
+            latency_ms: Latency spec for sample_latency()
+            error_rate: Fraction of requests answered with a random status from error_statuses
+            throttle_rate: Fraction of requests answered 429 regardless of load
+            rate_limit: Requests per second served before answering 429 (a token bucket
+                        shared by all clients, like the real API's per-IP limit)
+            slow_loris_rate: Fraction of responses whose body is dribbled out over slow_loris_seconds
+            slow_loris_chunk: Bytes sent per dribble
+        """
+        if latency_ms:
+            distribution = latency_ms.get('distribution', 'constant')
+            if distribution not in LATENCY_DISTRIBUTIONS:
+                raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.duration = duration
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [500, 502, 503]
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = max(1, int(rate_limit_burst))
+        self.slow_loris_rate = slow_loris_rate
+        self.slow_loris_seconds = slow_loris_seconds
+        self.slow_loris_chunk = max(1, int(slow_loris_chunk))
+        self.name = name
+        self._tokens = float(self.rate_limit_burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Phase':
+        return cls(**data)
+
+    def take_token(self) -> Optional[float]:
+        """None when the request fits the rate limit, else seconds until a token is available"""
+        if self.rate_limit is None:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit_burst, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate_limit
+
+
+class Scenario:
+    """Phases played in order from server start, optionally looping"""
+
+    def __init__(self, phases: Optional[List[Phase]] = None, loop: bool = True):
+        self.phases = phases or [Phase()]
+        self.loop = loop
+        durations = [phase.duration for phase in self.phases]
+        self.cycle = sum(durations) if all(duration is not None for duration in durations) else None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Scenario':
+        return cls([Phase.from_dict(phase) for phase in data.get('phases', [{}])], data.get('loop', True))
+
+    @classmethod
+    def load(cls, path: str) -> 'Scenario':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def phase_at(self, elapsed: float) -> Phase:
+        if self.cycle and self.loop:
+            elapsed %= self.cycle
+        for phase in self.phases:
+            if phase.duration is None or elapsed < phase.duration:
+                return phase
+            elapsed -= phase.duration
+        return self.phases[-1]
+
+
+def build_quote(input_mint: str, output_mint: str, amount: int, slippage_bps: int, price: float,
+                rng) -> Dict[str, Any]:
+    """Jupiter v6 /quote payload for a SOL/USDC swap at `price` USDC per SOL"""
+    if input_mint == SOL_MINT:
+        trade_size_usd = amount / 1e9 * price
+        ideal_output = amount / 1e9 * price * 1e6
+    else:
+        trade_size_usd = amount / 1e6
+        ideal_output = amount / 1e6 / price * 1e9
+
+    # Impact grows with size, as in generate_fallback_quote, with a little pool noise
+    if trade_size_usd > 10000:
+        impact = 0.1 + (trade_size_usd - 10000) / 100000 * 0.1
+    elif trade_size_usd > 1000:
+        impact = 0.05 + (trade_size_usd - 1000) / 10000 * 0.05
+    else:
+        impact = 0.01 + trade_size_usd / 1000 * 0.04
+    impact = min(impact * rng.uniform(0.8, 1.2), 0.5)
+
+    output_amount = int(ideal_output * (1 - impact / 100))
+    fee_amount = int(amount * 0.0025)
+    return {
+        'inputMint': input_mint,
+        'inAmount': str(amount),
+        'outputMint': output_mint,
+        'outAmount': str(output_amount),
+        'otherAmountThreshold': str(int(output_amount * (1 - slippage_bps / 10000))),
+        'swapMode': 'ExactIn',
+        'slippageBps': slippage_bps,
+        'platformFee': None,
+        'priceImpactPct': f"{impact:.6f}",
+        'routePlan': [{
+            'swapInfo': {
+                'ammKey': '58oQChx4yWmvKdwLLZzBi4ChoCc2fqCUWBkwMihLYQo2',
+                'label': 'Raydium',
+                'inputMint': input_mint,
+                'outputMint': output_mint,
+                'inAmount': str(amount),
+                'outAmount': str(output_amount),
+                'feeAmount': str(fee_amount),
+                'feeMint': input_mint
+            },
+            'percent': 100
+        }],
+        'contextSlot': 250000000 + int(time.time() * 2.5),  # ~400 ms slots
+        'timeTaken': rng.uniform(0.001, 0.02)
+    }
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Serves /quote, /tokens and /stats with the current phase's faults applied"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so pooled clients reuse connections under load
+    server_version = 'JupiterStub/1.0'
+    # Headers and body go out as separate writes; with Nagle on, delayed ACKs stall each response ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # The default writes every request to stderr, which caps throughput
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        route = url.path.rstrip('/')
+        for prefix in ('/v6', ''):
+            if route.startswith(prefix + '/'):
+                route = route[len(prefix):]
+                break
+        if route == '/stats':
+            return self._send_json(200, server.get_stats())
+        if route not in ('/quote', '/tokens'):
+            return self._send_json(404, {'error': f"Not found: {url.path}"}, record=False)
+
+        elapsed = time.monotonic() - server.started
+        phase = server.scenario.phase_at(elapsed)
+        rng = server.rng
+
+        delay = sample_latency(phase.latency_ms, rng)
+        if delay:
+            time.sleep(delay)
+
+        retry_after = phase.take_token()
+        if retry_after is not None or (phase.throttle_rate and rng.random() < phase.throttle_rate):
+            return self._send_json(429, {'error': 'Rate limit exceeded'},
+                                   headers={'Retry-After': str(max(1, math.ceil(retry_after or 1)))})
+        if phase.error_rate and rng.random() < phase.error_rate:
+            status = rng.choice(phase.error_statuses)
+            return self._send_json(status, {'error': f"Injected {status}"})
+
+        if route == '/tokens':
+            payload = list(TOKEN_DECIMALS) + OTHER_TOKENS
+        else:
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            try:
+                input_mint, output_mint = params['inputMint'], params['outputMint']
+                amount = int(params['amount'])
+                slippage_bps = int(params.get('slippageBps', 50))
+            except (KeyError, ValueError) as e:
+                return self._send_json(400, {'error': f"Invalid quote request: {e}", 'errorCode': 'INVALID_REQUEST'})
+            if {input_mint, output_mint} != set(TOKEN_DECIMALS) or amount <= 0:
+                return self._send_json(400, {'error': 'No routes found', 'errorCode': 'COULD_NOT_FIND_ANY_ROUTE'})
+            payload = build_quote(input_mint, output_mint, amount, slippage_bps,
+                                  server.price_path.price_at(elapsed), rng)
+
+        slow = phase.slow_loris_rate and rng.random() < phase.slow_loris_rate
+        self._send_json(200, payload, slow_loris=phase if slow else None)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None,
+                   slow_loris: Optional[Phase] = None, record: bool = True):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if slow_loris is None:
+            self.wfile.write(body)
+        else:
+            # Headers arrive at once, then the body trickles in; each chunk resets a client's read timeout
+            chunks = [body[i:i + slow_loris.slow_loris_chunk] for i in range(0, len(body), slow_loris.slow_loris_chunk)]
+            pause = slow_loris.slow_loris_seconds / max(1, len(chunks) - 1)
+            try:
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        time.sleep(pause)
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # The client gave up, which is what we were testing
+        if record:
+            self.server.record(status, slow_loris is not None)
+
+
+class JupiterStubServer(ThreadingHTTPServer):
+    """Local stand-in for the Jupiter quote API; point JupiterAPI at `url`"""
+
+    daemon_threads = True
+    request_queue_size = 1024  # Listen backlog for load tests opening many connections at once
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, scenario: Optional[Scenario] = None,
+                 price_path: Optional[PricePath] = None, seed: Optional[int] = None):
+        super().__init__((host, port), StubRequestHandler)
+        self.scenario = scenario if scenario is not None else Scenario()
+        self.rng = make_rng(seed, 'JupiterStubServer')
+        self.price_path = price_path if price_path is not None else PricePath(rng=make_rng(seed, 'PricePath'))
+        self.started = time.monotonic()
+        self._stats = {'requests': 0, 'slow_loris': 0, 'by_status': {}}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, status: int, slow_loris: bool):
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['slow_loris'] += slow_loris
+            by_status = self._stats['by_status']
+            by_status[status] = by_status.get(status, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Responses served so far, for checking what a load test actually hit"""
+        elapsed = time.monotonic() - self.started
+        with self._stats_lock:
+            stats = {
+                'requests': self._stats['requests'],
+                'slow_loris': self._stats['slow_loris'],
+                'by_status': {str(status): count for status, count in sorted(self._stats['by_status'].items())}
+            }
+        phase = self.scenario.phase_at(elapsed)
+        stats.update({
+            'uptime': elapsed,
+            'phase': phase.name or self.scenario.phases.index(phase),
+            'price': self.price_path.price_at(elapsed)
+        })
+        return stats
+
+    def start(self) -> 'JupiterStubServer':
+        """Serve from a background thread (for in-process tests); returns self"""
+        self._thread = threading.Thread(target=self.serve_forever, name='jupiter-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Jupiter quote API")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--scenario', default=None, help="JSON file with a list of phases (see Phase for the fields)")
+    parser.add_argument('--pattern', default=DEFAULT_DATA_PATTERN,
+                        help="Recorded trade CSVs to take the price path from")
+    parser.add_argument('--no-recorded-prices', action='store_true', help="Use a random walk instead")
+    parser.add_argument('--speed', type=float, default=1.0, help="Recorded seconds replayed per second")
+    parser.add_argument('--latency', default=None, metavar='JSON',
+                        help='Latency spec in ms when no scenario is given, e.g. \'{"distribution": "lognormal", "median": 80}\'')
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered 500/502/503")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Requests per second before answering 429")
+    parser.add_argument('--slow-loris-rate', type=float, default=0.0, help="Fraction of responses sent slowly")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    if args.scenario:
+        scenario = Scenario.load(args.scenario)
+    else:
+        scenario = Scenario([Phase(latency_ms=json.loads(args.latency) if args.latency else None,
+                                   error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                   rate_limit=args.rate_limit, rate_limit_burst=max(1, int(args.rate_limit or 1)),
+                                   slow_loris_rate=args.slow_loris_rate)])
+
+    history = None if args.no_recorded_prices else load_price_history(pattern=args.pattern)
+    price_path = PricePath(history, speed=args.speed, rng=make_rng(args.seed, 'PricePath'))
+
+    server = JupiterStubServer(args.host, args.port, scenario, price_path, seed=args.seed)
+    source = f"{len(history)} recorded quotes" if price_path.recorded else "a random walk"
+    print(f"Serving Jupiter stub on {server.url} with prices from {source}")
+    print(f"Point the app at it with: JUPITER_API_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
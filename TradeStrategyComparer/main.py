@@ -1,4 +1,5 @@
-from app import app
+from app import app, install_profile_signal_handler
 
 if __name__ == '__main__':
+    install_profile_signal_handler()
     app.run(debug=True, host='0.0.0.0', port=5000)
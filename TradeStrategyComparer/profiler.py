@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.01  # 100 Hz
+DEFAULT_DURATION = 30
+MAX_DURATION = 600
+MAX_STACK_DEPTH = 128
+PROFILE_DIR = 'data/profiles'
+PROFILE_FORMATS = {'collapsed': 'text/plain', 'speedscope': 'application/json'}
+
+
+def _short_path(filename: str) -> str:
+    """Trim interpreter and site-packages prefixes so frames stay readable"""
+    for prefix in sorted({p for p in sys.path if p and os.path.isabs(p)}, key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for every thread in the process
+
+    A background thread snapshots all Python stacks every interval seconds and counts
+    identical stacks per thread, so memory grows with the number of distinct stacks
+    rather than with duration. Blocked threads are sampled too: a bot waiting on an HTTP
+    response shows up under requests' socket reads, which is usually the point.
+    """
+
+    def __init__(self, duration: float = DEFAULT_DURATION, interval: float = DEFAULT_INTERVAL):
+        self.id = uuid.uuid4().hex[:12]
+        self.duration = max(0.1, min(float(duration), MAX_DURATION))
+        self.interval = max(0.001, float(interval))
+        self.state = 'created'  # created -> running -> completed | stopped
+        self.started_at = None
+        self.elapsed = 0.0
+        self.samples = 0
+        self.sample_seconds = 0.0  # Time spent taking samples (the profiler's own overhead)
+        self._frames: List[Tuple[str, str, int]] = []  # (function, file, line)
+        self._frame_index: Dict[Any, int] = {}
+        self._stacks = Counter()  # (thread name, frame indices root -> leaf) -> samples
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.state = 'running'
+        self.started_at = datetime.now()
+        self._thread = threading.Thread(target=self._run, name=f'profiler:{self.id}', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """End the profile early; samples taken so far are kept"""
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.state != 'running'
+
+    def _frame_id(self, code) -> int:
+        index = self._frame_index.get(code)
+        if index is None:
+            index = len(self._frames)
+            self._frames.append((code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+            self._frame_index[code] = index
+        return index
+
+    def _sample(self, own_ident: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self._stacks[(names.get(ident, f'thread-{ident}'), tuple(stack))] += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + self.duration
+        next_sample = started
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_sample:
+                self._stop.wait(next_sample - now)
+                continue
+            self._sample(own_ident)
+            self.samples += 1
+            self.sample_seconds += time.perf_counter() - now
+            # Keep a steady rate; if sampling fell behind, skip the missed ticks instead of bursting
+            next_sample = max(next_sample + self.interval, time.perf_counter())
+        self.elapsed = time.perf_counter() - started
+        self.state = 'stopped' if self._stop.is_set() else 'completed'
+        logging.info(f"Profile {self.id} {self.state}: {self.samples} samples in {self.elapsed:.1f}s")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'state': self.state,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'duration': self.duration,
+            'interval': self.interval,
+            'elapsed': self.elapsed,
+            'samples': self.samples,
+            'distinct_stacks': len(self._stacks),
+            'overhead_percent': self.sample_seconds / self.elapsed * 100 if self.elapsed else 0.0
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format (flamegraph.pl, speedscope, inferno), thread as root frame"""
+        lines = []
+        for (thread_name, stack), count in sorted(self._stacks.items()):
+            names = [thread_name] + [f"{self._frames[i][0]} ({self._frames[i][1]}:{self._frames[i][2]})" for i in stack]
+            lines.append(';'.join(name.replace(';', ':') for name in names) + f" {count}")
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self) -> Dict[str, Any]:
+        """speedscope.app file: one sampled profile per thread, weighted in seconds"""
+        by_thread = OrderedDict()
+        for (thread_name, stack), count in sorted(self._stacks.items()):
+            samples, weights = by_thread.setdefault(thread_name, ([], []))
+            samples.append(list(stack))
+            weights.append(count * self.interval)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f"TradeStrategyComparer profile {self.id}",
+            'exporter': 'TradeStrategyComparer profiler',
+            'shared': {'frames': [{'name': name, 'file': file, 'line': line} for name, file, line in self._frames]},
+            'profiles': [
+                {
+                    'type': 'sampled',
+                    'name': thread_name,
+                    'unit': 'seconds',
+                    'startValue': 0,
+                    'endValue': sum(weights),
+                    'samples': samples,
+                    'weights': weights
+                }
+                for thread_name, (samples, weights) in by_thread.items()
+            ]
+        }
+
+    def export(self, profile_format: str) -> str:
+        if profile_format == 'speedscope':
+            return json.dumps(self.speedscope())
+        if profile_format == 'collapsed':
+            return self.collapsed()
+        raise ValueError(f"Unknown profile format: {profile_format}")
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+
+class ProfileManager:
+    """Runs one profile at a time and keeps the most recent ones for download"""
+
+    def __init__(self, max_profiles: int = 10):
+        self.max_profiles = max_profiles
+        self._profiles: Dict[str, SamplingProfiler] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, duration: float = DEFAULT_DURATION, interval: float = DEFAULT_INTERVAL,
+              on_finish=None) -> SamplingProfiler:
+        """
+        Start a time-boxed profile
+
+        Raises:
+            ProfilerBusyError: If a profile is already running
+        """
+        with self._lock:
+            if any(profile.state == 'running' for profile in self._profiles.values()):
+                raise ProfilerBusyError("A profile is already running")
+            profile = SamplingProfiler(duration, interval)
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+            profile.start()
+
+        if on_finish is not None:
+            def finish():
+                profile.wait()
+                on_finish(profile)
+            threading.Thread(target=finish, name=f'profiler-finish:{profile.id}', daemon=True).start()
+        return profile
+
+    def get(self, profile_id: str) -> Optional[SamplingProfiler]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list_profiles(self) -> List[SamplingProfiler]:
+        with self._lock:
+            return list(self._profiles.values())
+
+
+def save_profile(profile: SamplingProfiler, directory: str = PROFILE_DIR) -> List[str]:
+    """Write a finished profile in both formats; returns the paths"""
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f"profile_{profile.started_at.strftime('%Y%m%d_%H%M%S')}_{profile.id}")
+    paths = []
+    for profile_format, extension in (('collapsed', 'txt'), ('speedscope', 'speedscope.json')):
+        path = f"{stem}.{extension}"
+        with open(path, 'w') as f:
+            f.write(profile.export(profile_format))
+        paths.append(path)
+    return paths
+
+
+def install_signal_handler(manager: ProfileManager, signum: int = getattr(signal, 'SIGUSR2', None),
+                           duration: float = DEFAULT_DURATION) -> bool:
+    """
+    Profile for `duration` seconds whenever the process receives signum (SIGUSR2 by default)
+
+    The result is written to data/profiles/. Returns False where signals cannot be
+    installed (non-POSIX platforms, or when not called from the main thread).
+    """
+    if signum is None:
+        return False
+
+    # The handler runs on the main thread between bytecodes, possibly while that thread holds
+    # the manager's lock, so it only writes a byte to a pipe; a watcher thread does the work
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(write_fd, False)
+
+    def handle(received, frame):
+        try:
+            os.write(write_fd, b'\0')
+        except BlockingIOError:
+            pass  # Requests are already pending
+
+    def watch():
+        while True:
+            if not os.read(read_fd, 64):
+                return
+            try:
+                profile = manager.start(duration, on_finish=lambda done: logging.warning(
+                    f"Profile {done.id} written to {', '.join(save_profile(done))}"))
+                logging.warning(f"Signal {signum}: profiling all threads for {profile.duration:.0f}s")
+            except ProfilerBusyError:
+                logging.warning("Signal ignored: a profile is already running")
+            except Exception as e:
+                logging.error(f"Error starting signal-triggered profile: {e}")
+
+    try:
+        signal.signal(signum, handle)
+    except ValueError:
+        os.close(read_fd)
+        os.close(write_fd)
+        return False
+    threading.Thread(target=watch, name='profiler-signal', daemon=True).start()
+    return True
@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from metrics import RATE_LIMIT_WAIT_SECONDS
+
+# Lower value = served first
+PRIORITY_HIGH = 0    # Trade executions
+PRIORITY_NORMAL = 1  # Ad-hoc requests (price checks, dashboards)
+PRIORITY_LOW = 2     # Background polling such as SmartBot condition checks
+
+PRIORITY_NAMES = {PRIORITY_HIGH: 'high', PRIORITY_NORMAL: 'normal', PRIORITY_LOW: 'low'}
+
+
+class Reservation:
+    """A queued request for one token; see TokenBucketRateLimiter.reserve"""
+
+    __slots__ = ('priority', 'entry', 'started', 'granted')
+
+    def __init__(self, priority: int, entry: tuple, started: float):
+        self.priority = priority
+        self.entry = entry
+        self.started = started
+        self.granted = False
+
+
+class TokenBucketRateLimiter:
+    """Thread-safe token bucket with a burst allowance and priority lanes"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            burst: Bucket capacity (requests allowed back to back after an idle period)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._metrics = {
+            name: {'acquired': 0, 'waited': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _record(self, priority: int, wait: float):
+        name = PRIORITY_NAMES.get(priority, 'low')
+        RATE_LIMIT_WAIT_SECONDS.labels(name).observe(wait)
+        metrics = self._metrics[name]
+        metrics['acquired'] += 1
+        if wait > 0:
+            metrics['waited'] += 1
+            metrics['total_wait'] += wait
+            metrics['max_wait'] = max(metrics['max_wait'], wait)
+
+    def acquire(self, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting until one is available
+
+        Waiters are served strictly by priority, then arrival order.
+
+        Returns:
+            True once a token was taken, False if timeout expired first
+        """
+        started = time.monotonic()
+        with self._lock:
+            self._refill(started)
+            # Fast path: nobody queued and a token is ready
+            if not self._waiters and self._tokens >= 1:
+                self._tokens -= 1
+                self._record(priority, 0.0)
+                return True
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and self._tokens >= 1:
+                        self._tokens -= 1
+                        heapq.heappop(self._waiters)
+                        self._record(priority, now - started)
+                        # Let the next waiter re-check the bucket
+                        self._cond.notify_all()
+                        return True
+
+                    delay = max((1 - self._tokens) / self.rate, 0.001)
+                    if timeout is not None:
+                        remaining = started + timeout - now
+                        if remaining <= 0:
+                            self._waiters.remove(entry)
+                            heapq.heapify(self._waiters)
+                            self._cond.notify_all()
+                            return False
+                        delay = min(delay, remaining)
+                    self._cond.wait(delay)
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+    def reserve(self, priority: int = PRIORITY_NORMAL) -> 'Reservation':
+        """
+        Queue for a token without blocking (for asyncio callers)
+
+        The reservation takes its place in the same priority order as blocked acquire()
+        callers; poll() it until it is granted, or cancel() it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            reservation = Reservation(priority, (priority, next(self._seq)), now)
+            self._refill(now)
+            # Fast path: nobody queued and a token is ready
+            if not self._waiters and self._tokens >= 1:
+                self._tokens -= 1
+                reservation.granted = True
+                self._record(priority, 0.0)
+            else:
+                heapq.heappush(self._waiters, reservation.entry)
+            return reservation
+
+    def poll(self, reservation: 'Reservation') -> float:
+        """
+        Take the token for a reservation if it is at the head of the queue
+
+        Returns:
+            0.0 once the token was taken, otherwise seconds until it should be available
+        """
+        with self._lock:
+            if reservation.granted:
+                return 0.0
+            now = time.monotonic()
+            self._refill(now)
+            entry = reservation.entry
+            if self._waiters[0] == entry and self._tokens >= 1:
+                self._tokens -= 1
+                heapq.heappop(self._waiters)
+                reservation.granted = True
+                self._record(reservation.priority, now - reservation.started)
+                self._cond.notify_all()
+                return 0.0
+            # Every waiter ahead of us needs a token first
+            ahead = sum(1 for waiter in self._waiters if waiter < entry)
+            return max((ahead + 1 - self._tokens) / self.rate, 0.001)
+
+    def cancel(self, reservation: 'Reservation'):
+        """Give up a reservation that has not been granted"""
+        with self._lock:
+            if not reservation.granted and reservation.entry in self._waiters:
+                self._waiters.remove(reservation.entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Acquisition counts and wait times per priority lane"""
+        with self._lock:
+            self._refill(time.monotonic())
+            lanes = {}
+            for name, metrics in self._metrics.items():
+                lanes[name] = dict(metrics)
+                lanes[name]['avg_wait'] = metrics['total_wait'] / metrics['waited'] if metrics['waited'] else 0.0
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'tokens_available': self._tokens,
+                'queued': len(self._waiters),
+                'lanes': lanes
+            }
@@ -0,0 +1,213 @@
+import math
+from typing import Dict, Any
+
+
+class RunningStats:
+    """Count, sum, Welford mean/variance, min and max of a stream of values"""
+
+    __slots__ = ('count', 'total', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Fold another stream's statistics into this one (Chan et al. parallel update)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.total, self.mean, self.m2 = other.count, other.total, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def from_moments(cls, count: int, total: float, m2: float, minimum: float, maximum: float) -> 'RunningStats':
+        """Statistics of a batch summarized elsewhere (e.g. vectorized or in SQL)"""
+        stats = cls()
+        if count:
+            stats.count = int(count)
+            stats.total = float(total)
+            stats.mean = stats.total / stats.count
+            stats.m2 = max(0.0, float(m2))
+            stats.min = float(minimum)
+            stats.max = float(maximum)
+        return stats
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0 with fewer than two values)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'total': self.total, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        stats = cls()
+        stats.count = data['count']
+        stats.total = data['total']
+        stats.mean = data['mean']
+        stats.m2 = data['m2']
+        stats.min = data['min'] if data['min'] is not None else math.inf
+        stats.max = data['max'] if data['max'] is not None else -math.inf
+        return stats
+
+
+class BotAggregates:
+    """Running totals for one bot's successful trades"""
+
+    def __init__(self):
+        self.total_input = 0.0
+        self.total_output = 0.0
+        self.slippage = RunningStats()
+        self.price = RunningStats()
+
+    @property
+    def trades(self) -> int:
+        return self.slippage.count
+
+    def add(self, trade_data: Dict[str, Any]):
+        self.total_input += trade_data.get('input_amount', 0)
+        self.total_output += trade_data.get('output_received', 0)
+        self.slippage.add(trade_data.get('slippage_percent', 0))
+        self.price.add(trade_data.get('price', 0))
+
+    def merge(self, other: 'BotAggregates') -> 'BotAggregates':
+        self.total_input += other.total_input
+        self.total_output += other.total_output
+        self.slippage.merge(other.slippage)
+        self.price.merge(other.price)
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-bot block of DataLogger.get_summary_stats()"""
+        has_trades = self.trades > 0
+        return {
+            'total_trades': self.trades,
+            'total_input': float(self.total_input) if has_trades else 0,
+            'total_output': float(self.total_output) if has_trades else 0,
+            'avg_slippage': float(self.slippage.mean) if has_trades else 0,
+            'avg_price': float(self.price.mean) if has_trades else 0,
+            'slippage_std': self.slippage.std,
+            'min_slippage': self.slippage.min if has_trades else 0,
+            'max_slippage': self.slippage.max if has_trades else 0,
+            'min_price': self.price.min if has_trades else 0,
+            'max_price': self.price.max if has_trades else 0
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'total_input': self.total_input, 'total_output': self.total_output,
+                'slippage': self.slippage.to_dict(), 'price': self.price.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BotAggregates':
+        aggregates = cls()
+        aggregates.total_input = data['total_input']
+        aggregates.total_output = data['total_output']
+        aggregates.slippage = RunningStats.from_dict(data['slippage'])
+        aggregates.price = RunningStats.from_dict(data['price'])
+        return aggregates
+
+
+class TradeAggregates:
+    """Running aggregates over every logged trade, broken down by bot type"""
+
+    def __init__(self):
+        self.total_trades = 0
+        self.overall = BotAggregates()
+        self.by_bot: Dict[str, BotAggregates] = {}
+
+    def add(self, trade_data: Dict[str, Any]):
+        self.total_trades += 1
+        if not trade_data.get('success', False):
+            return
+        self.overall.add(trade_data)
+        bot_type = trade_data['bot_type']
+        if bot_type not in self.by_bot:
+            self.by_bot[bot_type] = BotAggregates()
+        self.by_bot[bot_type].add(trade_data)
+
+    def merge(self, other: 'TradeAggregates') -> 'TradeAggregates':
+        """Combine aggregates from another run or shard"""
+        self.total_trades += other.total_trades
+        self.overall.merge(other.overall)
+        for bot_type, aggregates in other.by_bot.items():
+            self.by_bot.setdefault(bot_type, BotAggregates()).merge(aggregates)
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        """Summary statistics in the DataLogger.get_summary_stats() layout"""
+        twap = self.by_bot.get('TWAPBot', BotAggregates())
+        smart = self.by_bot.get('SmartBot', BotAggregates())
+        successful = self.overall.trades
+
+        if self.total_trades == 0:
+            return {
+                'total_trades': 0,
+                'twap_trades': 0,
+                'smart_trades': 0,
+                'total_input_traded': 0,
+                'total_output_received': 0,
+                'average_slippage': 0,
+                'success_rate': 0,
+                'twap_stats': twap.summary(),
+                'smart_stats': smart.summary()
+            }
+
+        return {
+            'total_trades': self.total_trades,
+            'successful_trades': successful,
+            'twap_trades': twap.trades,
+            'smart_trades': smart.trades,
+            'total_input_traded': float(self.overall.total_input),
+            'total_output_received': float(self.overall.total_output),
+            'average_slippage': float(self.overall.slippage.mean) if successful > 0 else 0,
+            'success_rate': float(successful / self.total_trades * 100),
+            'twap_stats': twap.summary(),
+            'smart_stats': smart.summary()
+        }
+
+    def copy(self) -> 'TradeAggregates':
+        return TradeAggregates.from_dict(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'total_trades': self.total_trades, 'overall': self.overall.to_dict(),
+                'by_bot': {bot_type: aggregates.to_dict() for bot_type, aggregates in self.by_bot.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TradeAggregates':
+        aggregates = cls()
+        aggregates.total_trades = data['total_trades']
+        aggregates.overall = BotAggregates.from_dict(data['overall'])
+        aggregates.by_bot = {bot_type: BotAggregates.from_dict(bot) for bot_type, bot in data['by_bot'].items()}
+        return aggregates
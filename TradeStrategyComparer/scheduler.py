@@ -0,0 +1,274 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Any, Callable, List, Optional
+
+from running_stats import RunningStats
+
+DEFAULT_WORKERS = int(os.environ.get('BOT_SCHEDULER_WORKERS', 8))
+DEFAULT_RETRY_DELAY = 10  # Seconds before retrying a task whose step raised (matches the bots' run loops)
+
+
+class ScheduledTask:
+    """Handle for a timer registered with BotScheduler"""
+
+    __slots__ = ('fn', 'name', 'repeating', 'due', 'state', 'runs', 'done', 'on_done')
+
+    def __init__(self, fn: Callable[[], Optional[float]], name: str, repeating: bool,
+                 on_done: Optional[Callable[['ScheduledTask'], None]] = None):
+        self.fn = fn
+        self.name = name
+        self.repeating = repeating
+        self.due = 0.0
+        self.state = 'scheduled'  # 'scheduled' <-> 'running', or 'cancelled'; done is set once it retires
+        self.runs = 0
+        self.done = threading.Event()
+        self.on_done = on_done
+
+
+class BotScheduler:
+    """
+    Run many bots from one timer thread and a small worker pool
+
+    Timers live in a heap ordered by due time. The timer thread sleeps until the earliest
+    one is due, then hands it to a worker; a repeating task is re-armed only after its step
+    returns, so a bot never overlaps itself and each waits its full interval between steps
+    (the same fixed-delay behaviour as the bots' own run loops). Idle bots cost one heap
+    entry rather than one sleeping thread.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, lag_window: int = 1024):
+        """
+        Args:
+            workers: Threads executing due steps (bot steps block on quote requests)
+            lag_window: Recent lag samples kept for percentiles
+        """
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bot-worker')
+        self._heap = []  # (due, seq, task)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._tasks = 0
+        self._running_steps = 0
+        self._steps = 0
+        self._errors = 0
+        self._lag = RunningStats()
+        self._recent_lag = deque(maxlen=lag_window)
+        self._thread = threading.Thread(target=self._run, name='bot-scheduler', daemon=True)
+        self._thread.start()
+
+    def _push(self, task: ScheduledTask, delay: float):
+        task.due = time.monotonic() + max(0.0, delay)
+        task.state = 'scheduled'
+        heapq.heappush(self._heap, (task.due, next(self._seq), task))
+        # Only wake the timer thread if this is now the earliest timer
+        if self._heap[0][2] is task:
+            self._cond.notify()
+
+    def call_later(self, delay: float, fn: Callable[[], Any], name: str = 'timer',
+                   on_done: Optional[Callable[[ScheduledTask], None]] = None) -> ScheduledTask:
+        """Run fn once on a worker after delay seconds"""
+        task = ScheduledTask(fn, name, repeating=False, on_done=on_done)
+        with self._cond:
+            self._tasks += 1
+            self._push(task, delay)
+        return task
+
+    def call_every(self, fn: Callable[[], Optional[float]], first_delay: float = 0, name: str = 'task',
+                   on_done: Optional[Callable[[ScheduledTask], None]] = None) -> ScheduledTask:
+        """
+        Run fn repeatedly on a worker
+
+        fn returns the seconds to wait before its next run, or None to finish.
+        """
+        task = ScheduledTask(fn, name, repeating=True, on_done=on_done)
+        with self._cond:
+            self._tasks += 1
+            self._push(task, first_delay)
+        return task
+
+    def schedule_bot(self, bot, first_delay: float = 0) -> ScheduledTask:
+        """
+        Run a bot's step() every step_interval() seconds until bot.stop() or cancel()
+
+        Replaces calling bot.run() on a dedicated thread.
+        """
+        def tick() -> Optional[float]:
+            if not bot.running:
+                return None
+            bot.step()
+            return bot.step_interval() if bot.running else None
+
+        bot.running = True
+        bot._notify('started')
+        return self.call_every(tick, first_delay, name=bot.__class__.__name__,
+                               on_done=lambda task: bot._notify('stopped'))
+
+    def cancel(self, task: ScheduledTask):
+        """Stop a task; a step already executing finishes first"""
+        finished = False
+        with self._cond:
+            if task.done.is_set():
+                return
+            if task.state == 'scheduled':
+                # Its heap entry is discarded lazily by the timer thread
+                finished = True
+            task.state = 'cancelled'
+        if finished:
+            self._finish(task)
+
+    def _finish(self, task: ScheduledTask):
+        with self._cond:
+            if task.done.is_set():
+                return
+            task.done.set()
+            self._tasks -= 1
+        if task.on_done:
+            try:
+                task.on_done(task)
+            except Exception as e:
+                logging.error(f"Error finishing scheduled task {task.name}: {e}")
+
+    def _run(self):
+        with self._cond:
+            while not self._shutdown:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, task = self._heap[0]
+                if task.state != 'scheduled' or task.due != due:
+                    heapq.heappop(self._heap)  # Cancelled or re-armed since this entry was pushed
+                    continue
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                task.state = 'running'
+                self._running_steps += 1
+                try:
+                    self._pool.submit(self._execute, task, due)
+                except RuntimeError:
+                    # Pool shut down underneath us
+                    break
+
+    def _execute(self, task: ScheduledTask, due: float):
+        lag = time.monotonic() - due
+        with self._cond:
+            self._lag.add(lag)
+            self._recent_lag.append(lag)
+
+        next_delay = None
+        try:
+            result = task.fn()
+            if task.repeating:
+                next_delay = result
+        except Exception as e:
+            logging.error(f"Error in scheduled task {task.name}: {e}")
+            with self._cond:
+                self._errors += 1
+            if task.repeating:
+                next_delay = DEFAULT_RETRY_DELAY
+
+        with self._cond:
+            self._running_steps -= 1
+            self._steps += 1
+            task.runs += 1
+            if next_delay is not None and task.state == 'running' and not self._shutdown:
+                self._push(task, next_delay)
+                return
+        self._finish(task)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the timer thread and workers; pending timers never fire"""
+        with self._cond:
+            self._shutdown = True
+            pending = [task for _, _, task in self._heap if task.state == 'scheduled']
+            self._heap.clear()
+            self._cond.notify_all()
+        for task in pending:
+            task.state = 'cancelled'
+            self._finish(task)
+        self._pool.shutdown(wait=wait)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Task counts and timer lag (seconds between a step falling due and starting)"""
+        with self._cond:
+            recent = sorted(self._recent_lag)
+            lag = self._lag
+            metrics = {
+                'workers': self.workers,
+                'tasks': self._tasks,
+                'timers_pending': len(self._heap),
+                'steps_running': self._running_steps,
+                'steps_completed': self._steps,
+                'step_errors': self._errors,
+                'lag_mean': lag.mean,
+                'lag_max': lag.max if lag.count else 0.0,
+            }
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] if recent else 0.0
+
+        metrics['lag_p50'] = percentile(0.50)
+        metrics['lag_p95'] = percentile(0.95)
+        metrics['lag_p99'] = percentile(0.99)
+        return metrics
+
+
+def run_virtual(bots: List[Any], clock, duration_seconds: float,
+                stop_event: Optional[threading.Event] = None) -> int:
+    """
+    Run bots to completion in virtual time on the calling thread
+
+    The single-threaded counterpart of BotScheduler.schedule_bot: the clock jumps straight
+    to the next due step, so an hour-long comparison takes as long as its steps compute.
+    Bots due at the same moment step in list order.
+
+    Args:
+        bots: Bots sharing `clock` (a VirtualClock)
+        clock: Clock to advance
+        duration_seconds: Virtual time to run for
+        stop_event: Set from another thread to end the run early, after the current step
+
+    Returns:
+        Number of steps executed
+    """
+    end = clock.now() + timedelta(seconds=duration_seconds)
+    heap = [(clock.now(), order, bot) for order, bot in enumerate(bots)]
+    heapq.heapify(heap)
+    for bot in bots:
+        bot.running = True
+        bot._notify('started')
+
+    steps = 0
+    while heap and heap[0][0] <= end:
+        if stop_event is not None and stop_event.is_set():
+            break
+        due, order, bot = heapq.heappop(heap)
+        if not bot.running:
+            continue
+        clock.advance_to(due)
+        try:
+            bot.step()
+            delay = bot.step_interval()
+        except Exception as e:
+            logging.error(f"Error in {bot.__class__.__name__} step: {e}")
+            delay = DEFAULT_RETRY_DELAY
+        steps += 1
+        heapq.heappush(heap, (due + timedelta(seconds=delay), order, bot))
+
+    if stop_event is None or not stop_event.is_set():
+        clock.advance_to(max(clock.now(), end))
+    for bot in bots:
+        if bot.running:
+            bot.stop()
+            bot._notify('stopped')
+    return steps
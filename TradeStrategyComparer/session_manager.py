@@ -0,0 +1,307 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from clock import VIRTUAL_EPOCH, WALL_CLOCK, VirtualClock, make_rng
+from data_logger import DataLogger
+from jupiter_api import JupiterAPI
+from scheduler import BotScheduler, run_virtual
+from status_stream import StatusBroadcaster
+from trading_bots import TWAPBot, SmartBot
+
+# Each session schedules one task per bot (TWAP and Smart)
+WORKERS_PER_SESSION = 2
+DEFAULT_WORKER_BUDGET = int(os.environ.get('SIMULATION_WORKER_BUDGET', 64))
+DEFAULT_MAX_FINISHED_SESSIONS = int(os.environ.get('SIMULATION_MAX_FINISHED_SESSIONS', 50))
+
+
+class SessionCapacityError(Exception):
+    """Raised when starting a session would exceed the worker budget"""
+
+
+class SimulationSession:
+    """One TWAP-vs-Smart comparison: its bots, trade log, lifecycle and status stream"""
+
+    def __init__(self, session_id: str, jupiter_api, scheduler: BotScheduler, trade_amount: float = 1.0,
+                 slippage_threshold: float = 0.2, duration_minutes: int = 60, trade_direction: str = 'SOL_TO_USDC',
+                 interval_minutes: int = 5, seed: Optional[int] = None, virtual_time: bool = False,
+                 log_file: Optional[str] = None, start_time: Optional[datetime] = None):
+        """
+        Args:
+            seed: Seeds every random stream (bots' simulated slippage, fallback quotes) for a reproducible run
+            virtual_time: Run against a virtual clock with offline fallback quotes; the whole duration
+                          completes in milliseconds instead of real time
+            log_file: CSV trade log path (default: a new data/trading_data_<time>_<run id>.csv, or TRADE_LOG_STORAGE)
+            start_time: Virtual clock start (default VIRTUAL_EPOCH for seeded runs, else now); together
+                        with the seed it makes a virtual-time run replay exactly
+        """
+        self.id = session_id
+        self.scheduler = scheduler
+        self.config = {
+            'trade_amount': trade_amount,
+            'slippage_threshold': slippage_threshold,
+            'duration_minutes': duration_minutes,
+            'trade_direction': trade_direction,
+            'interval_minutes': interval_minutes,
+            'seed': seed,
+            'virtual_time': virtual_time
+        }
+        self.duration_minutes = duration_minutes
+        self.virtual_time = virtual_time
+        if virtual_time:
+            if start_time is None:
+                start_time = VIRTUAL_EPOCH if seed is not None else datetime.now()
+            self.config['start_time'] = start_time.isoformat()
+            # Live quotes cannot be replayed, so accelerated runs use seeded synthetic quotes
+            self.clock = VirtualClock(start_time)
+            jupiter_api = JupiterAPI(cache_ttl=0, clock=self.clock, rng=make_rng(seed, 'JupiterAPI'), offline=True)
+        else:
+            self.clock = WALL_CLOCK
+        self.data_logger = DataLogger(log_file=log_file)
+        self.twap_bot = TWAPBot(
+            trade_amount=trade_amount,
+            interval_minutes=interval_minutes,
+            jupiter_api=jupiter_api,
+            data_logger=self.data_logger,
+            trade_direction=trade_direction,
+            clock=self.clock,
+            rng=make_rng(seed, 'TWAPBot')
+        )
+        self.smart_bot = SmartBot(
+            trade_amount=trade_amount,
+            slippage_threshold=slippage_threshold,
+            jupiter_api=jupiter_api,
+            data_logger=self.data_logger,
+            trade_direction=trade_direction,
+            clock=self.clock,
+            rng=make_rng(seed, 'SmartBot')
+        )
+        self.state = 'created'  # created -> running [-> stopping] -> completed | stopped | failed
+        self.created_at = datetime.now()
+        self.start_time = None
+        self.end_time = None
+        self._finish_lock = threading.Lock()
+        self._bot_tasks = []
+        self._deadline = None
+        self._virtual_stop = threading.Event()  # Ends _run_virtual early
+        self._virtual_done = threading.Event()  # Set once _run_virtual has returned from run_virtual
+        self._on_finish = None
+
+        # Push a status event to this session's dashboards whenever either bot acts
+        self.broadcaster = StatusBroadcaster(self.status_snapshot)
+        self.twap_bot.add_listener(self.broadcaster.notify)
+        self.smart_bot.add_listener(self.broadcaster.notify)
+
+    @property
+    def running(self) -> bool:
+        return self.state == 'running'
+
+    @property
+    def active(self) -> bool:
+        """Still holding workers (running, or stopping while the bots wind down)"""
+        return self.state in ('running', 'stopping')
+
+    def start(self, on_finish=None):
+        """Schedule both bots and the end of the run; no threads are started"""
+        logging.info(f"Starting simulation {self.id} for {self.duration_minutes} minutes")
+        self._on_finish = on_finish
+        self.start_time = self.clock.now()
+        self.state = 'running'
+        if self.virtual_time:
+            self.scheduler.call_later(0, self._run_virtual, name=f"virtual:{self.id}")
+        else:
+            self._bot_tasks = [self.scheduler.schedule_bot(self.twap_bot), self.scheduler.schedule_bot(self.smart_bot)]
+            self._deadline = self.scheduler.call_later(self.duration_minutes * 60, lambda: self._finish(stopped=False),
+                                                       name=f"deadline:{self.id}")
+        self.broadcaster.notify()
+
+    def _run_virtual(self):
+        """Play the whole duration through on one scheduler worker"""
+        started = time.perf_counter()
+        try:
+            steps = run_virtual([self.twap_bot, self.smart_bot], self.clock, self.duration_minutes * 60,
+                                stop_event=self._virtual_stop)
+            logging.info(f"Simulation {self.id} ran {steps} steps of virtual time in {time.perf_counter() - started:.3f}s")
+        finally:
+            self._virtual_done.set()
+        self._finish(stopped=False)
+
+    def stop(self):
+        """Ask the session to stop early"""
+        with self._finish_lock:
+            if self.state != 'running':
+                return
+            self.state = 'stopping'
+        if self._deadline is not None:
+            self.scheduler.cancel(self._deadline)
+        self.scheduler.call_later(0, lambda: self._finish(stopped=True), name=f"stop:{self.id}")
+        self.broadcaster.notify()
+
+    def _finish(self, stopped: bool):
+        """Stop the bots and settle the trade log (runs on a scheduler worker)"""
+        with self._finish_lock:
+            if self.end_time is not None:
+                return
+            self.end_time = self.clock.now()
+        try:
+            # Stop bots; a step already in progress completes first
+            for bot in (self.twap_bot, self.smart_bot):
+                bot.stop()
+            for task in self._bot_tasks:
+                self.scheduler.cancel(task)
+            for task in self._bot_tasks:
+                task.done.wait(timeout=10)
+            if self.virtual_time and self.start_time is not None:
+                # run_virtual restarts the bots when it begins, so it needs its own stop signal
+                self._virtual_stop.set()
+                self._virtual_done.wait(timeout=10)
+
+            # Make sure every trade has reached the CSV log
+            self.data_logger.flush(timeout=10)
+
+            self.state = 'stopped' if stopped else 'completed'
+            logging.info(f"Simulation {self.id} {self.state}")
+
+        except Exception as e:
+            logging.error(f"Error in simulation {self.id}: {e}")
+            self.state = 'failed'
+        finally:
+            self.broadcaster.notify()
+            if self._on_finish:
+                self._on_finish(self)
+
+    def elapsed_minutes(self) -> float:
+        if not self.start_time:
+            return 0
+        end = self.end_time or self.clock.now()
+        return (end - self.start_time).total_seconds() / 60
+
+    def status_snapshot(self) -> Dict[str, Any]:
+        """Live performance data for the status API and the status stream"""
+        elapsed_minutes = self.elapsed_minutes()
+        progress = min(100, (elapsed_minutes / self.duration_minutes) * 100) if self.duration_minutes else 100
+        if self.state == 'completed':
+            progress = 100
+        return {
+            'session_id': self.id,
+            'state': self.state,
+            'running': self.running,
+            'elapsed_minutes': elapsed_minutes,
+            'duration_minutes': self.duration_minutes,
+            'twap_stats': self.twap_bot.get_stats(),
+            'smart_stats': self.smart_bot.get_stats(),
+            'progress_percent': progress
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Short description for session listings"""
+        return {
+            'session_id': self.id,
+            'state': self.state,
+            'created_at': self.created_at.isoformat(),
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'config': dict(self.config),
+            'total_trades': self.data_logger.get_summary_stats()['total_trades']
+        }
+
+    def close(self):
+        """Release the session's trade log"""
+        self.data_logger.close()
+
+
+class SessionManager:
+    """Registry of concurrent simulation sessions sharing one quote pipeline"""
+
+    def __init__(self, jupiter_api=None, worker_budget: int = DEFAULT_WORKER_BUDGET,
+                 max_finished_sessions: int = DEFAULT_MAX_FINISHED_SESSIONS, scheduler: BotScheduler = None):
+        """
+        Args:
+            jupiter_api: Shared quote client (one cache, rate limiter and in-flight table for all sessions)
+            worker_budget: Bots that may run at once; each session needs WORKERS_PER_SESSION
+            max_finished_sessions: Finished sessions kept for results/downloads before the oldest is evicted
+            scheduler: Runs every session's bots from one timer thread and a small worker pool
+        """
+        self.jupiter_api = jupiter_api if jupiter_api is not None else JupiterAPI()
+        self.scheduler = scheduler if scheduler is not None else BotScheduler()
+        self.worker_budget = worker_budget
+        self.max_finished_sessions = max_finished_sessions
+        self._sessions: Dict[str, SimulationSession] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_active_sessions(self) -> int:
+        return self.worker_budget // WORKERS_PER_SESSION
+
+    def active_sessions(self) -> List[SimulationSession]:
+        with self._lock:
+            return [session for session in self._sessions.values() if session.active]
+
+    def create_session(self, **config) -> SimulationSession:
+        """
+        Create and start a session
+
+        Raises:
+            SessionCapacityError: If the worker budget is already in use
+        """
+        with self._lock:
+            active = sum(1 for session in self._sessions.values() if session.active)
+            if active >= self.max_active_sessions:
+                raise SessionCapacityError(
+                    f"{active} simulations are already running (worker budget {self.worker_budget})"
+                )
+            session = SimulationSession(uuid.uuid4().hex[:12], self.jupiter_api, self.scheduler, **config)
+            self._sessions[session.id] = session
+            # Reserve the slot before releasing the lock
+            session.start(on_finish=self._session_finished)
+        return session
+
+    def _session_finished(self, session: SimulationSession):
+        """Evict the oldest finished sessions beyond the retention limit"""
+        with self._lock:
+            finished = [s for s in self._sessions.values() if s.state not in ('created', 'running', 'stopping')]
+            evicted = finished[:max(0, len(finished) - self.max_finished_sessions)]
+            for old in evicted:
+                del self._sessions[old.id]
+        for old in evicted:
+            old.close()
+            logging.info(f"Evicted finished simulation {old.id}")
+
+    def get(self, session_id: str) -> Optional[SimulationSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def latest(self) -> Optional[SimulationSession]:
+        """Most recently created session"""
+        with self._lock:
+            return next(reversed(self._sessions.values()), None)
+
+    def list_sessions(self) -> List[SimulationSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stop(self, session_id: str) -> bool:
+        session = self.get(session_id)
+        if session is None or not session.running:
+            return False
+        session.stop()
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            states = {}
+            for session in self._sessions.values():
+                states[session.state] = states.get(session.state, 0) + 1
+        active = states.get('running', 0) + states.get('stopping', 0)
+        return {
+            'sessions': states,
+            'worker_budget': self.worker_budget,
+            'workers_in_use': active * WORKERS_PER_SESSION,
+            'max_active_sessions': self.max_active_sessions,
+            'scheduler': self.scheduler.get_metrics()
+        }
@@ -0,0 +1,237 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import (Boolean, Column, DateTime, Float, Index, Integer, MetaData, String, Table, case,
+                        create_engine, event, func, select)
+
+from running_stats import BotAggregates, RunningStats, TradeAggregates
+from trade_storage import normalize_row
+from trade_store import COLUMN_ORDER
+from trade_writer import BufferedTradeWriter
+
+DEFAULT_DATABASE_URL = os.environ.get('DATABASE_URL') or 'sqlite:///data/trades.db'
+
+metadata = MetaData()
+
+trades_table = Table(
+    'trades', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('run_id', String(32), nullable=False),
+    Column('timestamp', DateTime, nullable=False),
+    Column('bot_type', String(32), nullable=False),
+    Column('trade_direction', String(16), nullable=False),
+    Column('input_amount', Float, nullable=False),
+    Column('input_symbol', String(16), nullable=False),
+    Column('output_received', Float, nullable=False),
+    Column('output_symbol', String(16), nullable=False),
+    Column('expected_output', Float, nullable=False),
+    Column('slippage_percent', Float, nullable=False),
+    Column('price', Float, nullable=False),
+    Column('success', Boolean, nullable=False),
+    # Per-bot aggregates and series of one run
+    Index('ix_trades_run_bot_time', 'run_id', 'bot_type', 'timestamp'),
+    # Latest trades of a run across bots
+    Index('ix_trades_run_time', 'run_id', 'timestamp'),
+)
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _configure_sqlite(connection, _):
+    """WAL lets app workers read while a simulation writes; readers wait out short write locks"""
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
+
+def get_engine(url: str = DEFAULT_DATABASE_URL):
+    """Shared engine (and connection pool) per database URL, with the schema created"""
+    if url.startswith('postgres://'):
+        # Hosted Postgres URLs often use the scheme SQLAlchemy dropped
+        url = 'postgresql://' + url[len('postgres://'):]
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            if url.startswith('sqlite'):
+                database = url.split(':///', 1)[-1]
+                if database and database != ':memory:':
+                    os.makedirs(os.path.dirname(database) or '.', exist_ok=True)
+                engine = create_engine(url, connect_args={'check_same_thread': False})
+                event.listen(engine, 'connect', _configure_sqlite)
+            else:
+                engine = create_engine(url, pool_pre_ping=True)
+            metadata.create_all(engine)
+            _engines[url] = engine
+        return engine
+
+
+class SQLTradeStore:
+    """Trades of many runs in one SQL database; statistics are computed by the database"""
+
+    def __init__(self, url: str = DEFAULT_DATABASE_URL):
+        self.engine = get_engine(url)
+
+    @property
+    def display_url(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+    def insert(self, run_id: str, rows: List[Dict[str, Any]]):
+        """Insert trade rows in one transaction as a single executemany"""
+        records = []
+        for row in rows:
+            record = normalize_row(row)
+            record['run_id'] = run_id
+            records.append(record)
+        with self.engine.begin() as connection:
+            connection.execute(trades_table.insert(), records)
+
+    def count(self, run_id: str, successful_only: bool = False) -> int:
+        statement = select(func.count()).select_from(trades_table).where(trades_table.c.run_id == run_id)
+        if successful_only:
+            statement = statement.where(trades_table.c.success.is_(True))
+        with self.engine.connect() as connection:
+            return connection.execute(statement).scalar_one()
+
+    def get_aggregates(self, run_id: str) -> TradeAggregates:
+        """Per-bot TradeAggregates from two GROUP BY queries"""
+        t = trades_table.c
+        totals = select(func.count()).select_from(trades_table).where(t.run_id == run_id)
+        per_bot = (
+            select(
+                t.bot_type, func.count(),
+                func.sum(t.input_amount), func.sum(t.output_received),
+                func.sum(t.slippage_percent), func.sum(t.slippage_percent * t.slippage_percent),
+                func.min(t.slippage_percent), func.max(t.slippage_percent),
+                func.sum(t.price), func.sum(t.price * t.price), func.min(t.price), func.max(t.price)
+            )
+            .where(t.run_id == run_id, t.success.is_(True))
+            .group_by(t.bot_type)
+        )
+        with self.engine.connect() as connection:
+            total_trades = connection.execute(totals).scalar_one()
+            rows = connection.execute(per_bot).all()
+
+        def stats(count, total, sum_squares, minimum, maximum):
+            # Sum of squared deviations from the raw moments
+            return RunningStats.from_moments(count, total, sum_squares - total * total / count, minimum, maximum)
+
+        aggregates = TradeAggregates()
+        aggregates.total_trades = total_trades
+        for (bot_type, count, total_input, total_output, slippage_sum, slippage_squares, slippage_min, slippage_max,
+             price_sum, price_squares, price_min, price_max) in rows:
+            bot = BotAggregates()
+            bot.total_input = float(total_input)
+            bot.total_output = float(total_output)
+            bot.slippage = stats(count, slippage_sum, slippage_squares, slippage_min, slippage_max)
+            bot.price = stats(count, price_sum, price_squares, price_min, price_max)
+            aggregates.by_bot[bot_type] = bot
+            aggregates.overall.merge(bot)
+        return aggregates
+
+    def get_summary_stats(self, run_id: str) -> Dict[str, Any]:
+        """DataLogger.get_summary_stats() layout"""
+        return self.get_aggregates(run_id).summary()
+
+    def get_time_series_data(self, run_id: str, since: int = 0, until: Optional[int] = None) -> Dict[str, List]:
+        """
+        DataLogger.get_time_series_data() layout, with the running totals computed by window functions
+
+        Points follow insertion order, one per successful trade; timestamps are clamped to
+        the running maximum so the series stays sorted.
+        """
+        t = trades_table.c
+        window = {'order_by': t.id}
+        statement = (
+            select(
+                func.max(t.timestamp).over(**window),
+                func.sum(case((t.bot_type == 'TWAPBot', t.output_received), else_=0.0)).over(**window),
+                func.sum(case((t.bot_type == 'SmartBot', t.output_received), else_=0.0)).over(**window)
+            )
+            .where(t.run_id == run_id, t.success.is_(True))
+            .order_by(t.id)
+            .offset(max(0, since))
+        )
+        if until is not None:
+            statement = statement.limit(max(0, until - max(0, since)))
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+
+        if rows:
+            next_index = max(0, since) + len(rows)
+        else:
+            next_index = min(max(0, since), self.count(run_id, successful_only=True))
+        return {
+            'timestamps': [_as_datetime(timestamp).isoformat() for timestamp, _, _ in rows],
+            'twap_cumulative': [float(twap) for _, twap, _ in rows],
+            'smart_cumulative': [float(smart) for _, _, smart in rows],
+            'next_index': next_index
+        }
+
+    def get_recent_trades(self, run_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """The `limit` latest trades by timestamp, newest first"""
+        t = trades_table.c
+        statement = (
+            select(*[t[name] for name in COLUMN_ORDER])
+            .where(t.run_id == run_id)
+            .order_by(t.timestamp.desc(), t.id.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as connection:
+            trades = [dict(row._mapping) for row in connection.execute(statement)]
+        for trade in trades:
+            trade['timestamp'] = _as_datetime(trade['timestamp'])
+            trade['success'] = bool(trade['success'])
+        return trades
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        """Every run in the database with its trade count and time range"""
+        t = trades_table.c
+        statement = (
+            select(t.run_id, func.count(), func.min(t.timestamp), func.max(t.timestamp))
+            .group_by(t.run_id)
+            .order_by(func.min(t.timestamp))
+        )
+        with self.engine.connect() as connection:
+            return [
+                {'run_id': run_id, 'trades': count, 'start': _as_datetime(start).isoformat(),
+                 'end': _as_datetime(end).isoformat()}
+                for run_id, count, start, end in connection.execute(statement)
+            ]
+
+
+def _as_datetime(value) -> datetime:
+    # Window-function results lose their column type on SQLite and come back as strings
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class SQLTradeWriter(BufferedTradeWriter):
+    """
+    Insert a run's trades from any thread; each batch is one executemany transaction
+
+    A committed batch is as durable as the database makes it; the durability setting has
+    no further effect.
+    """
+
+    thread_prefix = 'sql-writer'
+
+    def __init__(self, store: SQLTradeStore, run_id: str, **kwargs):
+        self.store = store
+        self.run_id = run_id
+        super().__init__(store.display_url, COLUMN_ORDER, **kwargs)
+
+    def _open(self):
+        pass
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        self.store.insert(self.run_id, rows)
+
+    def _flush_file(self, fsync: bool):
+        pass
+
+    def _close_file(self):
+        pass
@@ -1,9 +1,15 @@
 // Dashboard JavaScript for real-time updates
 class SimulationDashboard {
     constructor() {
-        this.updateInterval = 2000; // Update every 2 seconds
+        this.sessionId = document.body.dataset.sessionId;
+        this.updateInterval = 2000; // Polling fallback when EventSource is unavailable
         this.chart = null;
         this.intervalId = null;
+        this.eventSource = null;
+        this.clockId = null;
+        this.lastStatus = null;
+        this.lastStatusAt = 0;
+        this.wasRunning = false;
         this.init();
     }
 
@@ -16,102 +22,72 @@ class SimulationDashboard {
         const ctx = document.getElementById('real-time-chart');
         if (!ctx) return;
 
-        this.chart = new Chart(ctx, {
-            type: 'line',
-            data: {
-                labels: [],
-                datasets: [
-                    {
-                        label: 'TWAP Bot Output',
-                        data: [],
-                        borderColor: '#00ff88',
-                        backgroundColor: 'rgba(0, 255, 136, 0.1)',
-                        tension: 0.2,
-                        fill: false
-                    },
-                    {
-                        label: 'Smart Bot Output',
-                        data: [],
-                        borderColor: '#ff6b6b',
-                        backgroundColor: 'rgba(255, 107, 107, 0.1)',
-                        tension: 0.2,
-                        fill: false
-                    }
-                ]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {
-                    title: {
-                        display: true,
-                        text: 'Cumulative Output Over Time',
-                        color: '#ffffff'
-                    },
-                    legend: {
-                        labels: {
-                            color: '#ffffff'
-                        }
-                    }
-                },
-                scales: {
-                    x: {
-                        display: true,
-                        title: {
-                            display: true,
-                            text: 'Time',
-                            color: '#ffffff'
-                        },
-                        ticks: {
-                            color: '#cccccc'
-                        },
-                        grid: {
-                            color: 'rgba(255, 255, 255, 0.1)'
-                        }
-                    },
-                    y: {
-                        display: true,
-                        title: {
-                            display: true,
-                            text: 'Output Amount',
-                            color: '#ffffff'
-                        },
-                        ticks: {
-                            color: '#cccccc',
-                            callback: function(value) {
-                                return value.toFixed(4);
-                            }
-                        },
-                        grid: {
-                            color: 'rgba(255, 255, 255, 0.1)'
-                        }
-                    }
-                },
-                interaction: {
-                    intersect: false,
-                    mode: 'index'
-                }
-            }
-        });
+        // Full run history, downsampled on the server
+        this.chart = new SeriesChart(ctx, 'cumulative', { sessionId: this.sessionId });
+        this.chart.refresh();
     }
 
     startUpdates() {
-        this.updateStatus();
-        this.intervalId = setInterval(() => {
+        // The server pushes a status event whenever a bot trades, skips or changes state
+        if (window.EventSource) {
+            // EventSource reconnects by itself and resumes with Last-Event-ID
+            this.eventSource = new EventSource(`/api/status_stream/${this.sessionId}`);
+            this.eventSource.addEventListener('status', (event) => {
+                this.receiveStatus(JSON.parse(event.data));
+            });
+            this.eventSource.onerror = () => {
+                console.warn('Status stream interrupted; reconnecting');
+            };
+        } else {
             this.updateStatus();
-        }, this.updateInterval);
+            this.intervalId = setInterval(() => {
+                this.updateStatus();
+            }, this.updateInterval);
+        }
+
+        // Elapsed time and progress advance locally between events
+        this.clockId = setInterval(() => this.tickClock(), 1000);
     }
 
     stopUpdates() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
         if (this.intervalId) {
             clearInterval(this.intervalId);
             this.intervalId = null;
         }
+        if (this.clockId) {
+            clearInterval(this.clockId);
+            this.clockId = null;
+        }
+    }
+
+    receiveStatus(data) {
+        if (data.error) {
+            console.error('Error fetching status:', data.error);
+            return;
+        }
+        this.lastStatus = data;
+        this.lastStatusAt = Date.now();
+        this.updateUI(data);
+    }
+
+    tickClock() {
+        const data = this.lastStatus;
+        if (!data || !data.running) return;
+        const elapsedMinutes = data.elapsed_minutes + (Date.now() - this.lastStatusAt) / 60000;
+        this.updateProgress({
+            running: true,
+            elapsed_minutes: elapsedMinutes,
+            progress_percent: Math.min(100, elapsedMinutes / data.duration_minutes * 100)
+        });
     }
 
     async updateStatus() {
         try {
-            const response = await fetch('/api/simulation_status');
+            const response = await fetch(`/api/simulation_status/${this.sessionId}`);
             const data = await response.json();
 
             if (!response.ok) {
@@ -119,7 +95,7 @@ class SimulationDashboard {
                 return;
             }
 
-            this.updateUI(data);
+            this.receiveStatus(data);
         } catch (error) {
             console.error('Error updating status:', error);
         }
@@ -140,36 +116,7 @@ class SimulationDashboard {
             }
         }
 
-        // Update elapsed time
-        const elapsedTime = document.getElementById('elapsed-time');
-        if (elapsedTime) {
-            const minutes = Math.floor(data.elapsed_minutes);
-            const seconds = Math.floor((data.elapsed_minutes - minutes) * 60);
-            elapsedTime.textContent = `${minutes}:${seconds.toString().padStart(2, '0')}`;
-        }
-
-        // Update progress
-        const progressPercent = Math.min(100, data.progress_percent || 0);
-        const progressElement = document.getElementById('progress-percent');
-        const progressBar = document.getElementById('progress-bar');
-        
-        if (progressElement) {
-            progressElement.textContent = `${progressPercent.toFixed(1)}%`;
-        }
-        
-        if (progressBar) {
-            progressBar.style.width = `${progressPercent}%`;
-            progressBar.textContent = `${progressPercent.toFixed(1)}%`;
-            
-            // Update progress bar color based on completion
-            progressBar.className = 'progress-bar progress-bar-striped';
-            if (data.running) {
-                progressBar.classList.add('progress-bar-animated');
-            }
-            if (progressPercent >= 100) {
-                progressBar.classList.add('bg-success');
-            }
-        }
+        this.updateProgress(data);
 
         // Update total trades
         const totalTrades = document.getElementById('total-trades');
@@ -195,10 +142,11 @@ class SimulationDashboard {
             this.updateElement('smart-execution-rate', (data.smart_stats.execution_rate || 0).toFixed(2) + '%');
         }
 
-        // Update chart if running
-        if (data.running && this.chart) {
+        // Update chart while running, plus once more to pick up the final trades
+        if (this.chart && (data.running || this.wasRunning)) {
             this.updateChart(data);
         }
+        this.wasRunning = data.running;
 
         // Stop updates if simulation is complete
         if (!data.running && data.progress_percent >= 100) {
@@ -206,6 +154,39 @@ class SimulationDashboard {
         }
     }
 
+    updateProgress(data) {
+        // Update elapsed time
+        const elapsedTime = document.getElementById('elapsed-time');
+        if (elapsedTime) {
+            const minutes = Math.floor(data.elapsed_minutes);
+            const seconds = Math.floor((data.elapsed_minutes - minutes) * 60);
+            elapsedTime.textContent = `${minutes}:${seconds.toString().padStart(2, '0')}`;
+        }
+
+        // Update progress
+        const progressPercent = Math.min(100, data.progress_percent || 0);
+        const progressElement = document.getElementById('progress-percent');
+        const progressBar = document.getElementById('progress-bar');
+        
+        if (progressElement) {
+            progressElement.textContent = `${progressPercent.toFixed(1)}%`;
+        }
+        
+        if (progressBar) {
+            progressBar.style.width = `${progressPercent}%`;
+            progressBar.textContent = `${progressPercent.toFixed(1)}%`;
+            
+            // Update progress bar color based on completion
+            progressBar.className = 'progress-bar progress-bar-striped';
+            if (data.running) {
+                progressBar.classList.add('progress-bar-animated');
+            }
+            if (progressPercent >= 100) {
+                progressBar.classList.add('bg-success');
+            }
+        }
+    }
+
     updateElement(elementId, value) {
         const element = document.getElementById(elementId);
         if (element) {
@@ -214,24 +195,8 @@ class SimulationDashboard {
     }
 
     updateChart(data) {
-        if (!this.chart || !data.twap_stats || !data.smart_stats) return;
-
-        const currentTime = new Date().toLocaleTimeString();
-        const maxDataPoints = 20; // Keep last 20 data points
-
-        // Add new data point
-        this.chart.data.labels.push(currentTime);
-        this.chart.data.datasets[0].data.push(data.twap_stats.total_output_received || 0);
-        this.chart.data.datasets[1].data.push(data.smart_stats.total_output_received || 0);
-
-        // Remove old data points if too many
-        if (this.chart.data.labels.length > maxDataPoints) {
-            this.chart.data.labels.shift();
-            this.chart.data.datasets[0].data.shift();
-            this.chart.data.datasets[1].data.shift();
-        }
-
-        this.chart.update('none'); // Update without animation for performance
+        if (!this.chart) return;
+        this.chart.refresh();
     }
 
     destroy() {
@@ -0,0 +1,94 @@
+// Client-side charts fed by the downsampled /api/series endpoints
+const SERIES_COLORS = {
+    TWAPBot: { border: '#00ff88', background: 'rgba(0, 255, 136, 0.1)' },
+    SmartBot: { border: '#ff6b6b', background: 'rgba(255, 107, 107, 0.1)' }
+};
+
+const SERIES_TITLES = {
+    cumulative: 'Cumulative Output Over Time',
+    slippage: 'Slippage Over Time (%)',
+    price: 'Execution Price Over Time'
+};
+
+class SeriesChart {
+    constructor(canvas, kind, options = {}) {
+        this.canvas = canvas;
+        this.kind = kind;
+        this.sessionId = options.sessionId || document.body.dataset.sessionId;
+        // Roughly one point per horizontal pixel; the server never sends more than it is asked for
+        this.maxPoints = options.maxPoints || Math.min(2000, Math.max(200, canvas.clientWidth || 800));
+        this.version = null;
+        this.chart = new Chart(canvas, {
+            type: 'line',
+            data: { datasets: [] },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                animation: false,
+                parsing: false,
+                normalized: true,
+                elements: { point: { radius: 0 } },
+                plugins: {
+                    title: { display: true, text: SERIES_TITLES[kind] || kind, color: '#ffffff' },
+                    legend: { labels: { color: '#ffffff' } }
+                },
+                scales: {
+                    x: {
+                        type: 'linear',
+                        title: { display: true, text: 'Time', color: '#ffffff' },
+                        // Trade timestamps are wall-clock times encoded as UTC epoch milliseconds
+                        ticks: { color: '#cccccc', callback: (value) => new Date(value).toISOString().substring(11, 19) },
+                        grid: { color: 'rgba(255, 255, 255, 0.1)' }
+                    },
+                    y: {
+                        ticks: { color: '#cccccc', callback: (value) => value.toFixed(4) },
+                        grid: { color: 'rgba(255, 255, 255, 0.1)' }
+                    }
+                },
+                interaction: { intersect: false, mode: 'nearest', axis: 'x' }
+            }
+        });
+    }
+
+    setKind(kind) {
+        this.kind = kind;
+        this.version = null;
+        this.chart.options.plugins.title.text = SERIES_TITLES[kind] || kind;
+        return this.refresh();
+    }
+
+    async refresh(range = {}) {
+        const params = new URLSearchParams({ max_points: this.maxPoints });
+        if (range.start !== undefined) params.set('start', range.start);
+        if (range.end !== undefined) params.set('end', range.end);
+
+        try {
+            const response = await fetch(`/api/series/${this.sessionId}/${this.kind}?${params}`);
+            const data = await response.json();
+            if (!response.ok) {
+                console.error('Error fetching series:', data.error);
+                return;
+            }
+            // Nothing new was logged since the last fetch
+            if (data.version === this.version && range.start === undefined && range.end === undefined) return;
+            this.version = data.version;
+
+            this.chart.data.datasets = Object.entries(data.series).map(([botType, points]) => ({
+                label: botType,
+                data: points.t.map((t, i) => ({ x: t, y: points.y[i] })),
+                borderColor: (SERIES_COLORS[botType] || {}).border,
+                backgroundColor: (SERIES_COLORS[botType] || {}).background,
+                borderWidth: 1.5,
+                tension: 0,
+                fill: false
+            }));
+            this.chart.update('none');
+        } catch (error) {
+            console.error('Error updating series chart:', error);
+        }
+    }
+
+    destroy() {
+        this.chart.destroy();
+    }
+}
@@ -0,0 +1,117 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Any, Callable, Iterator, Optional
+
+
+class StatusBroadcaster:
+    """
+    Fan one status snapshot out to every Server-Sent Events subscriber
+
+    Producers call notify() when something changes (a bot trades, skips, starts or stops).
+    While anyone is subscribed, a single publisher thread builds one snapshot, at most every
+    min_interval seconds, and every subscriber streams that same serialized event. Idle
+    subscribers only wake for heartbeats, and a stream nobody watches costs no thread.
+    """
+
+    def __init__(self, snapshot_fn: Callable[[], Dict[str, Any]], min_interval: float = 0.25,
+                 heartbeat_interval: float = 15.0):
+        """
+        Args:
+            snapshot_fn: Builds the status payload (called on the publisher thread only)
+            min_interval: Minimum seconds between published snapshots; bursts are coalesced
+            heartbeat_interval: Seconds of silence before a subscriber is sent a comment frame
+        """
+        self.snapshot_fn = snapshot_fn
+        self.min_interval = min_interval
+        self.heartbeat_interval = heartbeat_interval
+        # Event ids carry a per-process prefix so ids from before a restart are never mistaken for current ones
+        self._stream_id = uuid.uuid4().hex[:8]
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._seq = 0
+        self._event = None  # Latest serialized SSE frame
+        self._subscribers = 0
+        self._published = 0
+        self._thread = None
+
+    def notify(self, *args):
+        """Mark the status as changed; safe to call from any thread (accepts and ignores listener args)"""
+        with self._cond:
+            self._dirty = True
+            self._cond.notify_all()
+
+    def _ensure_publisher(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='status-publisher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or not self._subscribers)
+                if not self._subscribers:
+                    # Last subscriber left; the next one restarts the publisher
+                    self._thread = None
+                    return
+                self._dirty = False
+            self.publish()
+            time.sleep(self.min_interval)
+
+    def publish(self):
+        """Build a snapshot now and hand it to every subscriber"""
+        try:
+            payload = json.dumps(self.snapshot_fn(), default=str)
+        except Exception as e:
+            logging.error(f"Error building status snapshot: {e}")
+            return
+        with self._cond:
+            self._seq += 1
+            self._event = f"id: {self._stream_id}-{self._seq}\nevent: status\ndata: {payload}\n\n"
+            self._published += 1
+            self._cond.notify_all()
+
+    def _parse_event_id(self, last_event_id: Optional[str]) -> int:
+        """Sequence number a resuming client already has (0 if unknown)"""
+        if not last_event_id:
+            return 0
+        stream_id, _, seq = last_event_id.partition('-')
+        if stream_id != self._stream_id or not seq.isdigit():
+            return 0
+        return int(seq)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate SSE frames for one client
+
+        Every event is a complete snapshot, so a client resuming with Last-Event-ID only
+        needs the latest one, and only if it is newer than what the client has seen.
+        """
+        seen = self._parse_event_id(last_event_id)
+        with self._cond:
+            self._subscribers += 1
+            # Changes made while nobody was subscribed have not been published yet
+            self._dirty = True
+            self._ensure_publisher()
+            self._cond.notify_all()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq > seen, timeout=self.heartbeat_interval)
+                    event, seq = self._event, self._seq
+                if seq > seen:
+                    seen = seq
+                    yield event
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+                self._cond.notify_all()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {'subscribers': self._subscribers, 'events_published': self._published}
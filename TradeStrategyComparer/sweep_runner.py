@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Set
+
+import pandas as pd
+
+from backtester import Backtester, load_price_history, DEFAULT_DATA_PATTERN
+
+MANIFEST_FILE = 'manifest.json'
+RESULTS_FILE = 'results.csv'
+
+# Per-process cache so each worker parses the recorded history only once
+_price_history_cache = {}
+
+
+def config_id(config: Dict[str, Any]) -> str:
+    """Stable identifier for a sweep configuration"""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def build_grid(trade_amounts: List[float], slippage_thresholds: List[float], interval_minutes: List[int],
+               trade_directions: List[str] = ('SOL_TO_USDC',), seeds: List[Optional[int]] = (None,),
+               **common) -> List[Dict[str, Any]]:
+    """Cartesian product of backtest parameters as a list of sweep configurations"""
+    configs = []
+    for amount, threshold, interval, direction, seed in itertools.product(
+            trade_amounts, slippage_thresholds, interval_minutes, trade_directions, seeds):
+        config = dict(common)
+        config.update({
+            'trade_amount': amount,
+            'slippage_threshold': threshold,
+            'interval_minutes': interval,
+            'trade_direction': direction,
+            'seed': seed
+        })
+        configs.append(config)
+    return configs
+
+
+def _shard_path(output_dir: str, shard: int) -> str:
+    return os.path.join(output_dir, f"shard_{shard:04d}.jsonl")
+
+
+def _completed_ids(path: str) -> Set[str]:
+    """Config ids already written to a shard file; a torn last line is ignored"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['config_id'])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def _run_shard(output_dir: str, shard: int, configs: List[Dict[str, Any]], paths: Optional[List[str]],
+               pattern: str, keep_trade_logs: bool) -> int:
+    """Worker entry point: run one shard's configs, appending each result as it completes"""
+    # Per-trade INFO lines from the bots would dominate worker time
+    logging.getLogger().setLevel(logging.WARNING)
+
+    cache_key = (tuple(paths) if paths else None, pattern)
+    if cache_key not in _price_history_cache:
+        _price_history_cache[cache_key] = load_price_history(paths, pattern)
+    price_history = _price_history_cache[cache_key]
+
+    shard_file = _shard_path(output_dir, shard)
+    done = _completed_ids(shard_file)
+    completed = 0
+
+    with open(shard_file, 'a') as f:
+        # Terminate a line torn by a killed worker so the next record starts cleanly
+        if f.tell() > 0:
+            with open(shard_file, 'rb') as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b'\n':
+                    f.write('\n')
+
+        for config in configs:
+            cid = config_id(config)
+            if cid in done:
+                continue
+
+            params = dict(config)
+
+            if keep_trade_logs:
+                log_file = os.path.join(output_dir, 'trades', f"{cid}.csv")
+            else:
+                log_file = os.devnull
+
+            try:
+                result = Backtester(price_history, log_file=log_file, **params).run()
+                record = {'config_id': cid, 'config': config, 'result': result}
+            except Exception as e:
+                logging.error(f"Sweep config {cid} failed: {e}")
+                record = {'config_id': cid, 'config': config, 'error': str(e)}
+
+            f.write(json.dumps(record, default=str) + '\n')
+            f.flush()
+            completed += 1
+
+    return completed
+
+
+def _load_manifest(output_dir: str, configs: List[Dict[str, Any]], shards: int) -> Dict[str, Any]:
+    """Create the sweep manifest, or check that a resumed sweep matches it"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    ids = [config_id(config) for config in configs]
+
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest['config_ids'] != ids:
+            raise ValueError(f"{output_dir} holds a different sweep; use a new output directory")
+        return manifest
+
+    manifest = {'shards': shards, 'config_ids': ids, 'configs': configs}
+    with open(path, 'w') as f:
+        json.dump(manifest, f, default=str)
+    return manifest
+
+
+def run_sweep(configs: List[Dict[str, Any]], output_dir: str, workers: Optional[int] = None,
+              shards: Optional[int] = None, paths: Optional[List[str]] = None,
+              pattern: str = DEFAULT_DATA_PATTERN, keep_trade_logs: bool = False) -> pd.DataFrame:
+    """
+    Run backtest configurations across a process pool, resuming any earlier progress
+
+    Args:
+        configs: Backtester keyword arguments per run, optionally with a 'seed'
+        output_dir: Directory holding the manifest, per-shard results and merged table
+        workers: Worker processes (default: all cores)
+        shards: Number of result shards (default: 4 per worker, fixed once a sweep starts)
+        paths: Recorded trade CSVs to replay (default: files matching pattern)
+        pattern: Glob used when paths is not given
+        keep_trade_logs: Write each run's trades to output_dir/trades instead of discarding them
+
+    Returns:
+        Merged results table, also written to output_dir/results.csv
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    if keep_trade_logs:
+        os.makedirs(os.path.join(output_dir, 'trades'), exist_ok=True)
+
+    manifest = _load_manifest(output_dir, configs, shards or workers * 4)
+    shards = manifest['shards']
+
+    assignments = [[] for _ in range(shards)]
+    for index, config in enumerate(configs):
+        assignments[index % shards].append(config)
+
+    done = set()
+    for shard in range(shards):
+        done |= _completed_ids(_shard_path(output_dir, shard))
+    remaining = len(configs) - len(done)
+    logging.info(f"Sweep of {len(configs)} configs: {len(done)} already done, {remaining} to run on {workers} workers")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_run_shard, output_dir, shard, shard_configs, paths, pattern, keep_trade_logs): shard
+            for shard, shard_configs in enumerate(assignments) if shard_configs
+        }
+        finished = 0
+        for future in as_completed(futures):
+            finished += future.result()
+            logging.info(f"Shard {futures[future]} finished ({finished}/{remaining} configs run)")
+
+    logging.info(f"Sweep completed in {time.perf_counter() - started:.1f}s")
+    return merge_shards(output_dir)
+
+
+def merge_shards(output_dir: str) -> pd.DataFrame:
+    """Merge every shard into one flat table and write it to output_dir/results.csv"""
+    rows = []
+    for name in sorted(os.listdir(output_dir)):
+        if not (name.startswith('shard_') and name.endswith('.jsonl')):
+            continue
+        with open(os.path.join(output_dir, name)) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+
+                row = {'config_id': record['config_id'], **record['config']}
+                if 'error' in record:
+                    row['error'] = record['error']
+                else:
+                    result = record['result']
+                    row['elapsed_seconds'] = result['elapsed_seconds']
+                    for bot in ('twap', 'smart'):
+                        for key, value in result[f'{bot}_stats'].items():
+                            row[f'{bot}_{key}'] = value
+                rows.append(row)
+
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df = df.drop_duplicates('config_id', keep='last')
+    df.to_csv(os.path.join(output_dir, RESULTS_FILE), index=False)
+    return df
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run a resumable multi-process backtest parameter sweep")
+    parser.add_argument('output_dir', help="Sweep directory; rerun with the same arguments to resume")
+    parser.add_argument('--trade-amounts', type=float, nargs='+', default=[1.0])
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.2])
+    parser.add_argument('--intervals', type=int, nargs='+', default=[5])
+    parser.add_argument('--directions', nargs='+', choices=['SOL_TO_USDC', 'USDC_TO_SOL'], default=['SOL_TO_USDC'])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[None])
+    parser.add_argument('--duration-minutes', type=float, default=None)
+    parser.add_argument('--pattern', default=DEFAULT_DATA_PATTERN)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shards', type=int, default=None)
+    parser.add_argument('--keep-trade-logs', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    configs = build_grid(args.trade_amounts, args.thresholds, args.intervals, args.directions, args.seeds,
+                         duration_minutes=args.duration_minutes)
+    df = run_sweep(configs, args.output_dir, workers=args.workers, shards=args.shards,
+                   pattern=args.pattern, keep_trade_logs=args.keep_trade_logs)
+    print(f"{len(df)} results written to {os.path.join(args.output_dir, RESULTS_FILE)}")
+
+
+if __name__ == '__main__':
+    main()
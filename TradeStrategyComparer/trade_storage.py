@@ -0,0 +1,292 @@
+import argparse
+import csv
+import glob
+import importlib.util
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional
+
+from trade_store import COLUMN_ORDER, COLUMN_DEFAULTS, NUMERIC_COLUMNS
+from trade_writer import BufferedTradeWriter
+
+# pyarrow is optional (CSV logging works without it) and heavy, so it is imported by
+# _require_pyarrow() on first use rather than by every process that logs trades
+pa = ds = pq = None
+
+DEFAULT_STORE_ROOT = 'data/trades'
+CSV_LOG_PATTERN = 'data/trading_data_*.csv'
+DEFAULT_COMPRESSION = 'zstd'
+
+# Legacy CSV columns (SOL -> USDC only) and their current names
+LEGACY_COLUMNS = {
+    'sol_amount': 'input_amount',
+    'usdc_received': 'output_received',
+    'expected_usdc': 'expected_output',
+}
+
+
+def parquet_available() -> bool:
+    return pa is not None or importlib.util.find_spec('pyarrow') is not None
+
+
+def _require_pyarrow():
+    global pa, ds, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.dataset
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Columnar trade storage needs pyarrow: install the parquet extra (pip install -e '.[parquet]')")
+        ds, pq, pa = pyarrow.dataset, pyarrow.parquet, pyarrow
+
+
+def open_parquet_file(path: str):
+    """Memory-mapped pyarrow ParquetFile, for reading row groups one at a time"""
+    _require_pyarrow()
+    return pq.ParquetFile(path, memory_map=True)
+
+
+def trade_schema():
+    """Typed Arrow schema for one trade row (partition columns date/run live in the path)"""
+    _require_pyarrow()
+    categorical = pa.dictionary(pa.int8(), pa.string())
+    fields = [pa.field('timestamp', pa.timestamp('us'))]
+    for name in COLUMN_ORDER[1:]:
+        if name == 'success':
+            fields.append(pa.field(name, pa.bool_()))
+        elif name in NUMERIC_COLUMNS:
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            fields.append(pa.field(name, categorical))
+    return pa.schema(fields)
+
+
+def partition_dir(root: str, day: date, run_id: str) -> str:
+    """Hive-style partition directory: <root>/date=YYYY-MM-DD/run=<run_id>"""
+    return os.path.join(root, f"date={day.isoformat()}", f"run={run_id}")
+
+
+def normalize_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Typed trade row from either CSV schema (or a DataLogger row dict)
+
+    The legacy schema (sol_amount, usdc_received, expected_usdc) only ever recorded
+    SOL -> USDC trades, so its direction and symbols are filled in accordingly.
+    """
+    row = {LEGACY_COLUMNS.get(key, key): value for key, value in row.items()}
+
+    timestamp = row['timestamp']
+    trade = {'timestamp': datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp}
+    for name in COLUMN_ORDER[1:]:
+        value = row.get(name)
+        if name == 'success':
+            trade[name] = value if isinstance(value, bool) else str(value) == 'True'
+        elif name in NUMERIC_COLUMNS:
+            trade[name] = float(value) if value not in (None, '') else 0.0
+        else:
+            trade[name] = value or COLUMN_DEFAULTS.get(name, '')
+    return trade
+
+
+def rows_to_table(rows: List[Dict[str, Any]]):
+    """Arrow table over normalized trade rows"""
+    schema = trade_schema()
+    columns = {name: [row[name] for row in rows] for name in COLUMN_ORDER}
+    return pa.table([pa.array(columns[field.name], type=field.type) for field in schema], schema=schema)
+
+
+def _group_by_day(rows: List[Dict[str, Any]]) -> Dict[date, List[Dict[str, Any]]]:
+    groups = {}
+    for row in rows:
+        groups.setdefault(row['timestamp'].date(), []).append(row)
+    return groups
+
+
+def write_run(rows: List[Dict[str, Any]], run_id: str, root: str = DEFAULT_STORE_ROOT,
+              compression: str = DEFAULT_COMPRESSION) -> List[str]:
+    """
+    Write a whole run's normalized rows in one go, one Parquet file per date partition
+
+    Returns:
+        Paths of the files written
+    """
+    paths = []
+    for day, day_rows in sorted(_group_by_day(rows).items()):
+        directory = partition_dir(root, day, run_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'part-0.parquet')
+        pq.write_table(rows_to_table(day_rows), path, compression=compression)
+        paths.append(path)
+    return paths
+
+
+class ParquetTradeWriter(BufferedTradeWriter):
+    """
+    Append trades to a run's date partitions from any thread
+
+    Each batch becomes one Parquet row group. A file's footer is only written on close(),
+    so the partitions of a run that crashes before closing are unreadable; keep the CSV
+    log where every trade must survive a crash.
+    """
+
+    thread_prefix = 'parquet-writer'
+
+    def __init__(self, root: str, run_id: str, compression: str = DEFAULT_COMPRESSION, **kwargs):
+        """
+        Args:
+            root: Store root; files go to <root>/date=YYYY-MM-DD/run=<run_id>/part-0.parquet
+            run_id: Run partition key
+            compression: Parquet codec ('zstd', 'snappy', 'gzip' or 'none')
+            **kwargs: Batching and durability options of BufferedTradeWriter
+        """
+        _require_pyarrow()
+        self.root = root
+        self.run_id = run_id
+        self.compression = compression
+        super().__init__(root, COLUMN_ORDER, **kwargs)
+
+    def _open(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._schema = trade_schema()
+        self._files = {}  # date -> (file object, pq.ParquetWriter)
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        for day, day_rows in _group_by_day([normalize_row(row) for row in rows]).items():
+            if day not in self._files:
+                directory = partition_dir(self.root, day, self.run_id)
+                os.makedirs(directory, exist_ok=True)
+                sink = open(os.path.join(directory, 'part-0.parquet'), 'wb')
+                self._files[day] = (sink, pq.ParquetWriter(sink, self._schema, compression=self.compression))
+            self._files[day][1].write_table(rows_to_table(day_rows))
+
+    def _flush_file(self, fsync: bool):
+        for sink, _ in self._files.values():
+            sink.flush()
+            if fsync:
+                os.fsync(sink.fileno())
+
+    def _close_file(self):
+        for sink, writer in self._files.values():
+            writer.close()
+            sink.close()
+        self._files = {}
+
+
+def read_trades(root: str = DEFAULT_STORE_ROOT, columns: Optional[List[str]] = None,
+                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                runs: Optional[List[str]] = None, bot_types: Optional[List[str]] = None):
+    """
+    Load trades from the store as a DataFrame, reading only the needed columns and partitions
+
+    Date and run filters prune whole directories before any file is opened; the timestamp
+    and bot filters are pushed down to Parquet row-group statistics.
+
+    Args:
+        columns: Trade columns to load (default: all, plus the date and run partition keys)
+        start, end: Inclusive timestamp bounds
+        runs: Run IDs to load
+        bot_types: Bots to load
+    """
+    _require_pyarrow()
+    if not os.path.isdir(root):
+        import pandas as pd
+        return pd.DataFrame()
+
+    partitioning = ds.partitioning(pa.schema([('date', pa.string()), ('run', pa.string())]), flavor='hive')
+    # Files of runs still being written have no footer yet; skip rather than fail on them
+    dataset = ds.dataset(root, format='parquet', partitioning=partitioning, exclude_invalid_files=True)
+
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field('date') >= start.date().isoformat())
+        conditions.append(ds.field('timestamp') >= pa.scalar(start, pa.timestamp('us')))
+    if end is not None:
+        conditions.append(ds.field('date') <= end.date().isoformat())
+        conditions.append(ds.field('timestamp') <= pa.scalar(end, pa.timestamp('us')))
+    if runs is not None:
+        conditions.append(ds.field('run').isin(list(runs)))
+    if bot_types is not None:
+        conditions.append(ds.field('bot_type').isin(list(bot_types)))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def run_id_for_csv(path: str) -> str:
+    """Run partition key for a recorded CSV log (its timestamp and run id suffix)"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem[len('trading_data_'):] if stem.startswith('trading_data_') else stem
+
+
+def migrate_csv_logs(paths: Optional[List[str]] = None, pattern: str = CSV_LOG_PATTERN,
+                     root: str = DEFAULT_STORE_ROOT, overwrite: bool = False,
+                     compression: str = DEFAULT_COMPRESSION) -> Dict[str, Any]:
+    """
+    Convert recorded CSV trade logs (either schema) into the partitioned Parquet store
+
+    Runs already in the store and logs without trades are skipped (unless overwrite is set
+    for the former), so the migration can be re-run safely as new logs are recorded. The CSV
+    files are left in place.
+
+    Returns:
+        Counts of files migrated and skipped, rows written, and bytes before and after
+    """
+    _require_pyarrow()
+    if paths is None:
+        paths = sorted(glob.glob(pattern))
+
+    report = {'migrated': 0, 'skipped': 0, 'failed': 0, 'rows': 0, 'csv_bytes': 0, 'parquet_bytes': 0}
+    for path in paths:
+        run_id = run_id_for_csv(path)
+        existing = glob.glob(os.path.join(root, 'date=*', f"run={run_id}"))
+        if existing and not overwrite:
+            report['skipped'] += 1
+            continue
+
+        try:
+            with open(path, newline='') as csvfile:
+                rows = [normalize_row(row) for row in csv.DictReader(csvfile)]
+            if not rows:
+                # A header-only log writes no partition, so it could never count as migrated
+                report['skipped'] += 1
+                continue
+            for directory in existing:
+                shutil.rmtree(directory)
+            written = write_run(rows, run_id, root, compression)
+        except Exception as e:
+            logging.error(f"Error migrating {path}: {e}")
+            report['failed'] += 1
+            continue
+
+        report['migrated'] += 1
+        report['rows'] += len(rows)
+        report['csv_bytes'] += os.path.getsize(path)
+        report['parquet_bytes'] += sum(os.path.getsize(written_path) for written_path in written)
+        logging.info(f"Migrated {len(rows)} trades from {path} to run {run_id}")
+
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Migrate recorded CSV trade logs into the partitioned Parquet store")
+    parser.add_argument('files', nargs='*', help="CSV logs to migrate (default: all files matching --pattern)")
+    parser.add_argument('--pattern', default=CSV_LOG_PATTERN)
+    parser.add_argument('--root', default=DEFAULT_STORE_ROOT, help="Store root directory")
+    parser.add_argument('--compression', default=DEFAULT_COMPRESSION)
+    parser.add_argument('--overwrite', action='store_true', help="Re-migrate runs already in the store")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    report = migrate_csv_logs(args.files or None, args.pattern, args.root, args.overwrite, args.compression)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Column order matches DataLogger.csv_headers
+NUMERIC_COLUMNS = {
+    'input_amount': np.float64,
+    'output_received': np.float64,
+    'expected_output': np.float64,
+    'slippage_percent': np.float64,
+    'price': np.float64,
+}
+CATEGORICAL_COLUMNS = ('bot_type', 'trade_direction', 'input_symbol', 'output_symbol')
+COLUMN_ORDER = [
+    'timestamp', 'bot_type', 'trade_direction', 'input_amount', 'input_symbol',
+    'output_received', 'output_symbol', 'expected_output', 'slippage_percent', 'price', 'success'
+]
+COLUMN_DEFAULTS = {
+    'trade_direction': 'SOL_TO_USDC',
+    'input_symbol': 'SOL',
+    'output_symbol': 'USDC',
+}
+
+
+def to_epoch_us(timestamp: datetime) -> int:
+    """Naive wall-clock datetime -> microseconds since 1970-01-01 (numpy datetime64[us] convention)"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class ColumnarTradeStore:
+    """Append-optimized columnar trade storage backed by growable NumPy arrays"""
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._size = 0
+        self._capacity = max(16, initial_capacity)
+        self._timestamps = np.empty(self._capacity, dtype=np.int64)
+        self._success = np.empty(self._capacity, dtype=np.bool_)
+        self._numeric = {name: np.empty(self._capacity, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        self._codes = {name: np.empty(self._capacity, dtype=np.uint8) for name in CATEGORICAL_COLUMNS}
+        self._categories = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._category_index = {name: {} for name in CATEGORICAL_COLUMNS}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self):
+        """Double every buffer; views handed out earlier keep pointing at the old buffers"""
+        capacity = self._capacity * 2
+
+        def grown(array):
+            new = np.empty(capacity, dtype=array.dtype)
+            new[:self._size] = array[:self._size]
+            return new
+
+        self._timestamps = grown(self._timestamps)
+        self._success = grown(self._success)
+        self._numeric = {name: grown(array) for name, array in self._numeric.items()}
+        self._codes = {name: grown(array) for name, array in self._codes.items()}
+        self._capacity = capacity
+
+    def _code(self, column: str, value: str) -> int:
+        index = self._category_index[column]
+        code = index.get(value)
+        if code is None:
+            code = len(self._categories[column])
+            if code > np.iinfo(np.uint8).max:
+                raise ValueError(f"Too many distinct values for {column}")
+            self._categories[column].append(value)
+            index[value] = code
+        return code
+
+    def append(self, trade_data: Dict[str, Any]):
+        """Append one trade dict (same keys as BaseTradingBot.execute_trade produces)"""
+        with self._lock:
+            if self._size == self._capacity:
+                self._grow()
+            i = self._size
+            self._timestamps[i] = to_epoch_us(trade_data['timestamp'])
+            self._success[i] = bool(trade_data.get('success', False))
+            for name, array in self._numeric.items():
+                array[i] = trade_data.get(name, 0) or 0
+            for name, array in self._codes.items():
+                array[i] = self._code(name, trade_data.get(name, COLUMN_DEFAULTS.get(name, '')))
+            # Publish the row only once every column is written
+            self._size = i + 1
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Zero-copy read-only view of one column
+
+        timestamp is datetime64[us]; categorical columns return their uint8 codes
+        (see categories()).
+        """
+        return self._column(name, self._size)
+
+    def _column(self, name: str, n: int) -> np.ndarray:
+        if name == 'timestamp':
+            view = self._timestamps[:n].view('datetime64[us]')
+        elif name == 'success':
+            view = self._success[:n]
+        elif name in self._numeric:
+            view = self._numeric[name][:n]
+        elif name in self._codes:
+            view = self._codes[name][:n]
+        else:
+            raise KeyError(name)
+        view = view.view()
+        view.flags.writeable = False
+        return view
+
+    def categories(self, name: str) -> List[str]:
+        """Values behind the codes of a categorical column"""
+        return list(self._categories[name])
+
+    def to_dataframe(self, rows: Optional[int] = None) -> 'pd.DataFrame':
+        """
+        DataFrame over the stored columns; categorical columns use pandas Categoricals
+
+        Args:
+            rows: Only the first `rows` trades, e.g. a count taken earlier to read a fixed version
+        """
+        import pandas as pd  # Deferred so the live trade path never loads pandas
+
+        # Snapshot the row count, buffers and categories together so a concurrent append
+        # cannot leave the columns with different lengths
+        with self._lock:
+            n = self._size if rows is None else min(rows, self._size)
+            columns = {name: self._column(name, n) for name in COLUMN_ORDER}
+            categories = {name: list(self._categories[name]) for name in CATEGORICAL_COLUMNS}
+
+        if n == 0:
+            return pd.DataFrame()
+
+        data = {}
+        for name in COLUMN_ORDER:
+            values = columns[name]
+            if name in categories:
+                values = pd.Categorical.from_codes(values, categories=categories[name])
+            data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Rebuild the trade dict for one row"""
+        timestamp = _EPOCH + timedelta(microseconds=int(self._timestamps[index]))
+        trade = {'timestamp': timestamp}
+        for name in COLUMN_ORDER[1:]:
+            if name == 'success':
+                trade[name] = bool(self._success[index])
+            elif name in self._numeric:
+                trade[name] = float(self._numeric[name][index])
+            else:
+                trade[name] = self._categories[name][self._codes[name][index]]
+        return trade
+
+    def rows(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Trade dicts in insertion order (all, or the last `limit`)"""
+        n = self._size
+        start = 0 if limit is None else max(0, n - limit)
+        return [self.row(i) for i in range(start, n)]
+
+    def most_recent(self, limit: int) -> List[Dict[str, Any]]:
+        """The `limit` latest trades by timestamp, newest first"""
+        n = self._size
+        if n == 0 or limit <= 0:
+            return []
+        timestamps = self._timestamps[:n]
+        if limit < n:
+            candidates = np.argpartition(timestamps, n - limit)[n - limit:]
+        else:
+            candidates = np.arange(n)
+        order = candidates[np.argsort(timestamps[candidates], kind='stable')[::-1]]
+        return [self.row(int(i)) for i in order]
+
+    def memory_bytes(self) -> int:
+        """Bytes allocated for column buffers"""
+        total = self._timestamps.nbytes + self._success.nbytes
+        total += sum(array.nbytes for array in self._numeric.values())
+        total += sum(array.nbytes for array in self._codes.values())
+        return total
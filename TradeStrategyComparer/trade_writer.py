@@ -0,0 +1,236 @@
+import atexit
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from typing import Dict, Any, List
+
+DURABILITY_MODES = ('none', 'flush', 'fsync')
+
+_open_writers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_writers():
+    """Drain every writer still open at interpreter shutdown"""
+    for writer in list(_open_writers):
+        writer.close()
+
+
+class _FlushMarker:
+    """Queue item that is acknowledged once every row queued before it is written"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_CLOSE = object()
+
+
+class BufferedTradeWriter:
+    """
+    Append rows from any thread; a dedicated writer thread batches them to disk
+
+    Subclasses supply the file format through _open, _write_rows, _flush_file and _close_file,
+    all of which run on the writer thread except _open.
+    """
+
+    def __init__(self, path: str, fieldnames: List[str], max_queue: int = 100000, batch_size: int = 500,
+                 flush_interval: float = 1.0, durability: str = 'flush'):
+        """
+        Args:
+            path: File (or directory, for partitioned formats) to append to
+            fieldnames: Columns, in order
+            max_queue: Rows buffered before write() applies backpressure
+            batch_size: Write a batch once this many rows are pending
+            flush_interval: Write pending rows at least this often (seconds)
+            durability: 'none' (OS buffers), 'flush' (flush each batch) or 'fsync' (fsync each batch)
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+
+        self.path = path
+        self.fieldnames = fieldnames
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Held while checking _closed and queueing, so nothing can be queued behind _CLOSE
+        self._state_lock = threading.Lock()
+        self._closed = False
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'rows_written': 0,
+            'batches_written': 0,
+            'write_errors': 0,
+            'blocked_puts': 0,
+            'last_batch_seconds': 0.0,
+            'max_batch_seconds': 0.0,
+            'total_batch_seconds': 0.0
+        }
+
+        self._open()
+        self._thread = threading.Thread(target=self._run, name=f"{self.thread_prefix}:{os.path.basename(path)}",
+                                        daemon=True)
+        self._thread.start()
+        _open_writers.add(self)
+
+    thread_prefix = 'trade-writer'
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def _flush_file(self, fsync: bool):
+        raise NotImplementedError
+
+    def _close_file(self):
+        raise NotImplementedError
+
+    def write(self, row: Dict[str, Any]):
+        """Queue one row; only blocks if the queue is full (the disk has fallen far behind)"""
+        with self._state_lock:
+            if self._closed:
+                raise RuntimeError(f"Writer for {self.path} is closed")
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                with self._metrics_lock:
+                    self._metrics['blocked_puts'] += 1
+                logging.warning(f"Trade log queue for {self.path} is full; waiting for the writer")
+                self._queue.put(row)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every row queued so far has been written with the configured durability"""
+        marker = _FlushMarker()
+        with self._state_lock:
+            if self._closed:
+                return True
+            self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float = 10):
+        """Write everything still queued, then stop the writer thread and close the file"""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+        _open_writers.discard(self)
+
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        started = time.perf_counter()
+        try:
+            self._write_rows(rows)
+            if self.durability in ('flush', 'fsync'):
+                self._flush_file(fsync=self.durability == 'fsync')
+        except Exception as e:
+            logging.error(f"Error writing {len(rows)} rows to {self.path}: {e}")
+            with self._metrics_lock:
+                self._metrics['write_errors'] += 1
+            return
+
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            self._metrics['rows_written'] += len(rows)
+            self._metrics['batches_written'] += 1
+            self._metrics['last_batch_seconds'] = elapsed
+            self._metrics['max_batch_seconds'] = max(self._metrics['max_batch_seconds'], elapsed)
+            self._metrics['total_batch_seconds'] += elapsed
+
+    def _run(self):
+        pending = []
+        markers = []
+        deadline = None
+        closing = False
+
+        while not closing:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _CLOSE:
+                closing = True
+            elif isinstance(item, _FlushMarker):
+                markers.append(item)
+            elif item is not None:
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if pending and (closing or markers or due or len(pending) >= self.batch_size):
+                self._write_batch(pending)
+                pending = []
+                deadline = None
+
+            if markers and not pending:
+                if self.durability == 'none':
+                    # An explicit flush always reaches the OS
+                    try:
+                        self._flush_file(fsync=False)
+                    except Exception as e:
+                        logging.error(f"Error flushing {self.path}: {e}")
+                for marker in markers:
+                    marker.done.set()
+                markers = []
+
+        # Nothing should follow _CLOSE, but never leave a row unwritten or a flush() waiting
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushMarker):
+                markers.append(item)
+            elif item is not _CLOSE:
+                leftover.append(item)
+        if leftover:
+            self._write_batch(leftover)
+        for marker in markers:
+            marker.done.set()
+
+        try:
+            self._close_file()
+        except Exception as e:
+            logging.error(f"Error closing {self.path}: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and batch write latency"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        batches = metrics['batches_written']
+        metrics['avg_batch_seconds'] = metrics['total_batch_seconds'] / batches if batches else 0.0
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['durability'] = self.durability
+        return metrics
+
+
+class BufferedCSVWriter(BufferedTradeWriter):
+    """Append CSV rows from any thread; the header must already be written"""
+
+    thread_prefix = 'csv-writer'
+
+    def _open(self):
+        self._file = open(self.path, 'a', newline='')
+        self._csv = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        self._csv.writerows(rows)
+
+    def _flush_file(self, fsync: bool):
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def _close_file(self):
+        self._file.close()
@@ -1,18 +1,25 @@
-import time
 import threading
 import logging
 from datetime import datetime
 from typing import Dict, Any
 import random
+from time import perf_counter
+from clock import WALL_CLOCK
+from metrics import EXECUTE_TRADE_SECONDS
+from rate_limiter import PRIORITY_HIGH, PRIORITY_LOW
+from running_stats import RunningStats
 
 class BaseTradingBot:
     """Base class for trading bots"""
     
-    def __init__(self, trade_amount: float, jupiter_api, data_logger, trade_direction='SOL_TO_USDC'):
+    def __init__(self, trade_amount: float, jupiter_api, data_logger, trade_direction='SOL_TO_USDC', clock=None,
+                 rng=None):
         self.trade_amount = trade_amount
         self.jupiter_api = jupiter_api
         self.data_logger = data_logger
         self.trade_direction = trade_direction  # 'SOL_TO_USDC' or 'USDC_TO_SOL'
+        self.clock = clock if clock is not None else WALL_CLOCK  # WallClock, or a VirtualClock for accelerated runs
+        self.rng = rng if rng is not None else random.Random()  # Simulated market noise; seed it to reproduce a run
         self.running = False
         self.stats = {
             'total_trades': 0,
@@ -23,19 +30,47 @@ class BaseTradingBot:
             'average_slippage': 0.0,
             'total_pnl': 0.0
         }
+        self.slippage_stats = RunningStats()
+        self.listeners = []  # Callables notified as listener(bot, event) on trades, skips, start and stop
+        
+    def add_listener(self, listener):
+        """Register a callable for bot events ('started', 'stopped', 'trade', 'trade_failed', 'skipped')"""
+        self.listeners.append(listener)
+        
+    def _notify(self, event: str):
+        for listener in self.listeners:
+            try:
+                listener(self, event)
+            except Exception as e:
+                logging.error(f"Error in {self.__class__.__name__} listener: {e}")
         
     def stop(self):
         """Stop the bot"""
         self.running = False
         
+    def _now(self) -> datetime:
+        """Current time according to the bot's clock"""
+        return self.clock.now()
+        
     def get_stats(self) -> Dict[str, Any]:
         """Get current bot statistics"""
         if self.stats['total_trades'] > 0:
             self.stats['average_slippage'] = self.stats['total_slippage'] / self.stats['total_trades']
-        return self.stats.copy()
+        stats = self.stats.copy()
+        stats['slippage_std'] = self.slippage_stats.std
+        stats['min_slippage'] = self.slippage_stats.min if self.slippage_stats.count else 0
+        stats['max_slippage'] = self.slippage_stats.max if self.slippage_stats.count else 0
+        return stats
     
     def execute_trade(self) -> Dict[str, Any]:
         """Execute a single trade and return trade data"""
+        started = perf_counter()
+        trade_data = self._execute_trade()
+        EXECUTE_TRADE_SECONDS.labels(self.__class__.__name__, self.trade_direction,
+                                     'success' if trade_data.get('success') else 'failed').observe(perf_counter() - started)
+        return trade_data
+    
+    def _execute_trade(self) -> Dict[str, Any]:
         try:
             # Determine input/output mints based on trade direction
             if self.trade_direction == 'SOL_TO_USDC':
@@ -53,11 +88,12 @@ class BaseTradingBot:
                 output_symbol = 'SOL'
                 output_decimals = 1e9  # SOL has 9 decimals
             
-            # Get quote from Jupiter API
+            # Get quote from Jupiter API (executions pre-empt polling at the rate limiter)
             quote_data = self.jupiter_api.get_quote(
                 input_mint=input_mint,
                 output_mint=output_mint,
-                amount=amount
+                amount=amount,
+                priority=PRIORITY_HIGH
             )
             
             if not quote_data:
@@ -65,7 +101,7 @@ class BaseTradingBot:
             
             # Calculate slippage
             expected_output = int(quote_data.get('outAmount', 0)) / output_decimals
-            actual_output = expected_output * (1 - random.uniform(0.001, 0.01))  # Simulate slippage
+            actual_output = expected_output * (1 - self.rng.uniform(0.001, 0.01))  # Simulate slippage
             slippage = abs(expected_output - actual_output) / expected_output * 100 if expected_output > 0 else 0
             
             # Update statistics
@@ -74,6 +110,7 @@ class BaseTradingBot:
             self.stats['total_input_traded'] += self.trade_amount
             self.stats['total_output_received'] += actual_output
             self.stats['total_slippage'] += slippage
+            self.slippage_stats.add(slippage)
             
             # Calculate price and PnL
             if self.trade_direction == 'SOL_TO_USDC':
@@ -86,7 +123,7 @@ class BaseTradingBot:
             self.stats['total_pnl'] += (current_price - expected_price) * self.trade_amount
             
             trade_data = {
-                'timestamp': datetime.now(),
+                'timestamp': self._now(),
                 'bot_type': self.__class__.__name__,
                 'trade_direction': self.trade_direction,
                 'input_amount': self.trade_amount,
@@ -114,48 +151,65 @@ class BaseTradingBot:
 class TWAPBot(BaseTradingBot):
     """TWAP (Time-Weighted Average Price) Bot - executes trades at fixed intervals"""
     
-    def __init__(self, trade_amount: float, interval_minutes: int, jupiter_api, data_logger, trade_direction='SOL_TO_USDC'):
-        super().__init__(trade_amount, jupiter_api, data_logger, trade_direction)
+    def __init__(self, trade_amount: float, interval_minutes: int, jupiter_api, data_logger, trade_direction='SOL_TO_USDC', clock=None, rng=None):
+        super().__init__(trade_amount, jupiter_api, data_logger, trade_direction, clock, rng)
         self.interval_minutes = interval_minutes
         self.interval_seconds = interval_minutes * 60
         
+    def step_interval(self) -> float:
+        """Seconds to wait after a step before the next one"""
+        return self.interval_seconds
+        
+    def step(self) -> Dict[str, Any]:
+        """Run a single TWAP interval: execute one trade"""
+        trade_result = self.execute_trade()
+        
+        if not trade_result.get('success', False):
+            logging.warning(f"TWAP Bot trade failed: {trade_result.get('error', 'Unknown error')}")
+        
+        self._notify('trade' if trade_result.get('success', False) else 'trade_failed')
+        return trade_result
+        
     def run(self):
         """Run the TWAP bot"""
         self.running = True
         input_symbol = 'SOL' if self.trade_direction == 'SOL_TO_USDC' else 'USDC'
         logging.info(f"TWAP Bot started - trading {self.trade_amount} {input_symbol} every {self.interval_minutes} minutes")
+        self._notify('started')
         
         while self.running:
             try:
                 # Execute trade
-                trade_result = self.execute_trade()
-                
-                if not trade_result.get('success', False):
-                    logging.warning(f"TWAP Bot trade failed: {trade_result.get('error', 'Unknown error')}")
+                self.step()
                 
                 # Wait for next interval
-                time.sleep(self.interval_seconds)
+                self.clock.sleep(self.step_interval())
                 
             except Exception as e:
                 logging.error(f"Error in TWAP Bot main loop: {e}")
-                time.sleep(10)  # Wait 10 seconds before retrying
+                self.clock.sleep(10)  # Wait 10 seconds before retrying
         
         logging.info("TWAP Bot stopped")
+        self._notify('stopped')
 
 class SmartBot(BaseTradingBot):
     """Smart Bot - only executes trades when slippage is below threshold"""
     
-    def __init__(self, trade_amount: float, slippage_threshold: float, jupiter_api, data_logger, trade_direction='SOL_TO_USDC'):
-        super().__init__(trade_amount, jupiter_api, data_logger, trade_direction)
+    def __init__(self, trade_amount: float, slippage_threshold: float, jupiter_api, data_logger, trade_direction='SOL_TO_USDC', clock=None, rng=None):
+        super().__init__(trade_amount, jupiter_api, data_logger, trade_direction, clock, rng)
         self.slippage_threshold = slippage_threshold
         self.check_interval = 30  # Check every 30 seconds
         self.stats['trades_skipped'] = 0
         
+    def step_interval(self) -> float:
+        """Seconds to wait after a step before the next one"""
+        return self.check_interval
+        
     def should_execute_trade(self, quote_data: Dict[str, Any]) -> bool:
         """Determine if trade should be executed based on slippage"""
         try:
             # Estimate slippage based on quote data
-            estimated_slippage = random.uniform(0.05, 0.5)  # Simulate market conditions
+            estimated_slippage = self.rng.uniform(0.05, 0.5)  # Simulate market conditions
             
             return estimated_slippage <= self.slippage_threshold
             
@@ -163,50 +217,62 @@ class SmartBot(BaseTradingBot):
             logging.error(f"Error checking trade conditions: {e}")
             return False
     
+    def step(self) -> Dict[str, Any]:
+        """Run a single check: fetch a quote and trade only if conditions are favorable"""
+        # Determine input/output mints based on trade direction
+        if self.trade_direction == 'SOL_TO_USDC':
+            input_mint = 'So11111111111111111111111111111111111111112'  # SOL
+            output_mint = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'  # USDC
+            amount = int(self.trade_amount * 1e9)  # Convert SOL to lamports
+        else:  # USDC_TO_SOL
+            input_mint = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'  # USDC
+            output_mint = 'So11111111111111111111111111111111111111112'  # SOL
+            amount = int(self.trade_amount * 1e6)  # Convert USDC to micro USDC
+        
+        # Get current quote to check conditions
+        quote_data = self.jupiter_api.get_quote(
+            input_mint=input_mint,
+            output_mint=output_mint,
+            amount=amount,
+            priority=PRIORITY_LOW
+        )
+        
+        if quote_data and self.should_execute_trade(quote_data):
+            # Execute trade
+            trade_result = self.execute_trade()
+            
+            if not trade_result.get('success', False):
+                logging.warning(f"Smart Bot trade failed: {trade_result.get('error', 'Unknown error')}")
+            
+            self._notify('trade' if trade_result.get('success', False) else 'trade_failed')
+            return trade_result
+        
+        # Skip trade due to unfavorable conditions
+        self.stats['trades_skipped'] += 1
+        logging.debug(f"Smart Bot skipped trade - conditions not favorable")
+        self._notify('skipped')
+        return {'success': False, 'skipped': True}
+    
     def run(self):
         """Run the Smart bot"""
         self.running = True
         input_symbol = 'SOL' if self.trade_direction == 'SOL_TO_USDC' else 'USDC'
         logging.info(f"Smart Bot started - trading {self.trade_amount} {input_symbol} when slippage < {self.slippage_threshold}%")
+        self._notify('started')
         
         while self.running:
             try:
-                # Determine input/output mints based on trade direction
-                if self.trade_direction == 'SOL_TO_USDC':
-                    input_mint = 'So11111111111111111111111111111111111111112'  # SOL
-                    output_mint = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'  # USDC
-                    amount = int(self.trade_amount * 1e9)  # Convert SOL to lamports
-                else:  # USDC_TO_SOL
-                    input_mint = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'  # USDC
-                    output_mint = 'So11111111111111111111111111111111111111112'  # SOL
-                    amount = int(self.trade_amount * 1e6)  # Convert USDC to micro USDC
-                
-                # Get current quote to check conditions
-                quote_data = self.jupiter_api.get_quote(
-                    input_mint=input_mint,
-                    output_mint=output_mint,
-                    amount=amount
-                )
-                
-                if quote_data and self.should_execute_trade(quote_data):
-                    # Execute trade
-                    trade_result = self.execute_trade()
-                    
-                    if not trade_result.get('success', False):
-                        logging.warning(f"Smart Bot trade failed: {trade_result.get('error', 'Unknown error')}")
-                else:
-                    # Skip trade due to unfavorable conditions
-                    self.stats['trades_skipped'] += 1
-                    logging.debug(f"Smart Bot skipped trade - conditions not favorable")
+                self.step()
                 
                 # Wait before next check
-                time.sleep(self.check_interval)
+                self.clock.sleep(self.step_interval())
                 
             except Exception as e:
                 logging.error(f"Error in Smart Bot main loop: {e}")
-                time.sleep(10)  # Wait 10 seconds before retrying
+                self.clock.sleep(10)  # Wait 10 seconds before retrying
         
         logging.info("Smart Bot stopped")
+        self._notify('stopped')
     
     def get_stats(self) -> Dict[str, Any]:
         """Get Smart Bot statistics including skipped trades"""
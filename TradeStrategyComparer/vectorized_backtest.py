@@ -0,0 +1,196 @@
+import logging
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+RESULT_COLUMNS = [
+    'bot_type', 'trade_amount', 'interval_minutes', 'slippage_threshold',
+    'total_trades', 'successful_trades', 'total_input_traded', 'total_output_received',
+    'total_slippage', 'average_slippage', 'total_pnl', 'trades_skipped', 'execution_rate'
+]
+
+
+def price_history_to_arrays(price_history: List[Tuple[datetime, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert backtester price history into (epoch seconds, price) arrays"""
+    timestamps = np.array([ts.timestamp() for ts, _ in price_history], dtype=np.float64)
+    prices = np.array([price for _, price in price_history], dtype=np.float64)
+    return timestamps, prices
+
+
+def _prices_at(timestamps: np.ndarray, prices: np.ndarray, moments: np.ndarray) -> np.ndarray:
+    """Latest recorded price at or before each moment (same rule as ReplayJupiterAPI)"""
+    index = np.searchsorted(timestamps, moments, side='right') - 1
+    return prices[np.clip(index, 0, None)]
+
+
+def _fills(trade_amounts: np.ndarray, quote_prices: np.ndarray, slippage_draws: np.ndarray, trade_direction: str):
+    """
+    Compute per-trade fills for every trade amount at once
+
+    trade_amounts broadcasts against quote_prices/slippage_draws; the arithmetic mirrors
+    ReplayJupiterAPI.get_quote and BaseTradingBot.execute_trade operation for operation.
+
+    Returns:
+        (actual_output, slippage_percent, pnl) arrays
+    """
+    if trade_direction == 'SOL_TO_USDC':
+        amount = np.trunc(trade_amounts * 1e9)  # lamports
+        expected_output = np.trunc(amount / 1e9 * quote_prices * 1e6) / 1e6
+    else:
+        amount = np.trunc(trade_amounts * 1e6)  # micro USDC
+        expected_output = np.trunc(amount / 1e6 / quote_prices * 1e9) / 1e9
+
+    actual_output = expected_output * (1 - slippage_draws)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slippage = np.where(expected_output > 0, np.abs(expected_output - actual_output) / expected_output * 100, 0.0)
+
+        if trade_direction == 'SOL_TO_USDC':
+            current_price = actual_output / trade_amounts
+            expected_price = expected_output / trade_amounts
+        else:
+            current_price = trade_amounts / actual_output
+            expected_price = np.where(expected_output > 0, trade_amounts / expected_output, 0.0)
+
+    pnl = (current_price - expected_price) * trade_amounts
+    return actual_output, slippage, pnl
+
+
+def run_parameter_grid(timestamps: Sequence[float], prices: Sequence[float],
+                       trade_amounts: Sequence[float], slippage_thresholds: Sequence[float],
+                       interval_minutes: Sequence[float], check_interval: float = 30,
+                       trade_direction: str = 'SOL_TO_USDC', duration_seconds: Optional[float] = None,
+                       seed: Optional[int] = None,
+                       twap_slippage_draws: Optional[np.ndarray] = None,
+                       smart_decision_draws: Optional[np.ndarray] = None,
+                       smart_slippage_draws: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Backtest a whole grid of TWAP and Smart bot configurations in one vectorized pass
+
+    Every configuration sees the same replayed quotes and the same random draws (common
+    random numbers), so differences between rows come from the parameters alone. Feeding
+    the draws a bot would make reproduces its get_stats() numbers.
+
+    Args:
+        timestamps: Recorded quote times in epoch seconds, sorted ascending
+        prices: Recorded SOL/USDC price for each timestamp
+        trade_amounts: Trade sizes to evaluate (input token units)
+        slippage_thresholds: SmartBot thresholds to evaluate (percent)
+        interval_minutes: TWAP intervals to evaluate
+        check_interval: SmartBot check interval in seconds
+        trade_direction: 'SOL_TO_USDC' or 'USDC_TO_SOL'
+        duration_seconds: Replay window from the first quote (default: whole series)
+        seed: Seed for the draws that are not passed explicitly
+        twap_slippage_draws: Fill slippage fraction for the k-th TWAP trade, U(0.001, 0.01)
+        smart_decision_draws: Estimated slippage for the j-th SmartBot check, U(0.05, 0.5)
+        smart_slippage_draws: Fill slippage fraction for the j-th SmartBot check, U(0.001, 0.01)
+
+    Returns:
+        DataFrame with one row per (bot, trade_amount, interval or threshold); TWAP rows
+        report no skipped trades and a 100% execution rate
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    amounts = np.asarray(trade_amounts, dtype=np.float64)
+    thresholds = np.asarray(slippage_thresholds, dtype=np.float64)
+    intervals = np.asarray(interval_minutes, dtype=np.float64)
+
+    if timestamps.size == 0 or timestamps.size != prices.size:
+        raise ValueError("timestamps and prices must be non-empty and the same length")
+
+    start = timestamps[0]
+    span = timestamps[-1] - start if duration_seconds is None else float(duration_seconds)
+    rng = np.random.default_rng(seed)
+
+    # TWAP: trade k of interval i happens at start + k * interval, padded to the longest schedule
+    interval_seconds = intervals * 60
+    twap_counts = np.floor(span / interval_seconds).astype(np.int64) + 1
+    max_twap = int(twap_counts.max()) if twap_counts.size else 0
+    if twap_slippage_draws is None:
+        twap_slippage_draws = rng.uniform(0.001, 0.01, max_twap)
+    twap_slippage_draws = np.asarray(twap_slippage_draws, dtype=np.float64)
+    if twap_slippage_draws.size < max_twap:
+        raise ValueError(f"Need {max_twap} TWAP slippage draws, got {twap_slippage_draws.size}")
+
+    steps = np.arange(max_twap)
+    twap_mask = steps[None, :] < twap_counts[:, None]  # (intervals, steps)
+    twap_prices = _prices_at(timestamps, prices, start + steps[None, :] * interval_seconds[:, None])
+    twap_output, twap_slippage, twap_pnl = _fills(
+        amounts[:, None, None], twap_prices[None, :, :], twap_slippage_draws[None, None, :max_twap], trade_direction
+    )  # (amounts, intervals, steps)
+    twap_output = np.where(twap_mask, twap_output, 0.0).sum(axis=2)
+    twap_slippage = np.where(twap_mask, twap_slippage, 0.0).sum(axis=2)
+    twap_pnl = np.where(twap_mask, twap_pnl, 0.0).sum(axis=2)
+
+    # SmartBot: one shared check schedule; thresholds only change which checks trade
+    smart_checks = int(np.floor(span / check_interval)) + 1
+    if smart_decision_draws is None:
+        smart_decision_draws = rng.uniform(0.05, 0.5, smart_checks)
+    if smart_slippage_draws is None:
+        smart_slippage_draws = rng.uniform(0.001, 0.01, smart_checks)
+    smart_decision_draws = np.asarray(smart_decision_draws, dtype=np.float64)[:smart_checks]
+    smart_slippage_draws = np.asarray(smart_slippage_draws, dtype=np.float64)[:smart_checks]
+    if smart_decision_draws.size < smart_checks or smart_slippage_draws.size < smart_checks:
+        raise ValueError(f"Need {smart_checks} SmartBot decision and slippage draws")
+
+    smart_prices = _prices_at(timestamps, prices, start + np.arange(smart_checks) * check_interval)
+    executes = (smart_decision_draws[None, :] <= thresholds[:, None]).astype(np.float64)  # (thresholds, checks)
+    smart_output, smart_slippage, smart_pnl = _fills(
+        amounts[:, None], smart_prices[None, :], smart_slippage_draws[None, :], trade_direction
+    )  # (amounts, checks)
+    smart_trades = executes.sum(axis=1)
+    smart_output = smart_output @ executes.T  # (amounts, thresholds)
+    smart_slippage = smart_slippage @ executes.T
+    smart_pnl = smart_pnl @ executes.T
+
+    # Assemble the result table
+    n_amounts, n_intervals, n_thresholds = amounts.size, intervals.size, thresholds.size
+    twap_trades = np.broadcast_to(twap_counts, (n_amounts, n_intervals)).ravel().astype(np.float64)
+    twap_amounts = np.repeat(amounts, n_intervals)
+    smart_trade_counts = np.broadcast_to(smart_trades, (n_amounts, n_thresholds)).ravel()
+    smart_amounts = np.repeat(amounts, n_thresholds)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        twap_avg_slippage = np.where(twap_trades > 0, twap_slippage.ravel() / twap_trades, 0.0)
+        smart_avg_slippage = np.where(smart_trade_counts > 0, smart_slippage.ravel() / smart_trade_counts, 0.0)
+
+    twap = pd.DataFrame({
+        'bot_type': 'TWAPBot',
+        'trade_amount': twap_amounts,
+        'interval_minutes': np.tile(intervals, n_amounts),
+        'slippage_threshold': np.nan,
+        'total_trades': twap_trades,
+        'successful_trades': twap_trades,
+        'total_input_traded': twap_trades * twap_amounts,
+        'total_output_received': twap_output.ravel(),
+        'total_slippage': twap_slippage.ravel(),
+        'average_slippage': twap_avg_slippage,
+        'total_pnl': twap_pnl.ravel(),
+        'trades_skipped': 0.0,
+        'execution_rate': 100.0
+    })
+
+    smart = pd.DataFrame({
+        'bot_type': 'SmartBot',
+        'trade_amount': smart_amounts,
+        'interval_minutes': np.nan,
+        'slippage_threshold': np.tile(thresholds, n_amounts),
+        'total_trades': smart_trade_counts,
+        'successful_trades': smart_trade_counts,
+        'total_input_traded': smart_trade_counts * smart_amounts,
+        'total_output_received': smart_output.ravel(),
+        'total_slippage': smart_slippage.ravel(),
+        'average_slippage': smart_avg_slippage,
+        'total_pnl': smart_pnl.ravel(),
+        'trades_skipped': smart_checks - smart_trade_counts,
+        'execution_rate': smart_trade_counts / smart_checks * 100
+    })
+
+    result = pd.concat([twap, smart], ignore_index=True)[RESULT_COLUMNS]
+    for column in ('total_trades', 'successful_trades', 'trades_skipped'):
+        result[column] = result[column].astype(np.int64)
+
+    logging.info(f"Vectorized backtest evaluated {len(result)} configurations over {span:.0f}s of quotes")
+    return result